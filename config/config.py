@@ -1,7 +1,8 @@
 import os
 
 # ─── Language & Base URL ────────────────────────────────────────────────
-# Change this to "ar" to run tests in Arabic
+# Default language of tools and of tests outside the language matrix
+# (see LANGS below)
 
 LANG = "en"
 BASE_URLS = {
@@ -22,6 +23,50 @@ DEFAULT_TIMEOUT = 10000   # e.g. page.goto, navigation
 SHORT_TIMEOUT   =  5000   # quick visibility checks
 LONG_TIMEOUT    = 30000   # slow ops (AI streaming)
 
+# A streamed answer counts as complete after this long without any change
+STREAM_SETTLE_MS = int(os.getenv("STREAM_SETTLE_MS", "1500"))
+
+# Adaptive timeouts (see utils.timeouts): once an operation has
+# TIMEOUT_MIN_SAMPLES recorded latencies for a case / language, its deadline
+# is their TIMEOUT_PERCENTILE × TIMEOUT_MARGIN + TIMEOUT_PAD_MS, within
+# per-operation bounds; until then the fixed values above apply.
+ADAPTIVE_TIMEOUTS   = os.getenv("ADAPTIVE_TIMEOUTS", "true").lower() == "true"
+TIMEOUT_PERCENTILE  = float(os.getenv("TIMEOUT_PERCENTILE", "99"))
+TIMEOUT_MARGIN      = float(os.getenv("TIMEOUT_MARGIN", "1.5"))
+TIMEOUT_PAD_MS      = int(os.getenv("TIMEOUT_PAD_MS", "250"))
+TIMEOUT_MIN_SAMPLES = int(os.getenv("TIMEOUT_MIN_SAMPLES", "5"))
+TIMEOUT_HISTORY     = int(os.getenv("TIMEOUT_HISTORY", "50"))   # latest samples kept per key
+
+# Per-test time budget: TEST_BUDGET_MARGIN × the p95 duration of the test's
+# recent passes (at least TEST_BUDGET_MIN_S); every wait is capped by what
+# is left of it. Tests without history get TEST_BUDGET_S (0 = unlimited).
+TEST_BUDGET_MARGIN = float(os.getenv("TEST_BUDGET_MARGIN", "2.0"))
+TEST_BUDGET_MIN_S  = float(os.getenv("TEST_BUDGET_MIN_S", "30"))
+TEST_BUDGET_S      = float(os.getenv("TEST_BUDGET_S", "0"))
+
+if not 50 <= TIMEOUT_PERCENTILE <= 100:
+    raise ValueError(f"TIMEOUT_PERCENTILE={TIMEOUT_PERCENTILE} must be between 50 and 100.")
+
+
+# ─── Input Profiles ─────────────────────────────────────────────────────
+
+# How send_message enters text:
+#   "fill"      → set the input value in one call
+#   "insert"    → one keyboard.insert_text call (single input event)
+#   "paste"     → simulated clipboard paste into the input
+#   "humanized" → per-keystroke typing with random pauses (anti-bot)
+# Override per test with @pytest.mark.input_profile("fill")
+INPUT_PROFILES = ("fill", "insert", "paste", "humanized")
+INPUT_PROFILE  = os.getenv("INPUT_PROFILE", "humanized").lower()
+
+# Humanized typing speed multiplier (2.0 = twice as fast as a person)
+TYPING_SPEED = float(os.getenv("TYPING_SPEED", "1.0"))
+
+if INPUT_PROFILE not in INPUT_PROFILES:
+    raise ValueError(
+        f"Unsupported INPUT_PROFILE='{INPUT_PROFILE}'; must be one of {INPUT_PROFILES}."
+    )
+
 
 # ─── Playwright Launch Settings ────────────────────────────────────────
 
@@ -29,13 +74,274 @@ LONG_TIMEOUT    = 30000   # slow ops (AI streaming)
 HEADLESS = os.getenv("HEADLESS", "false").lower() == "true"
 
 
+# ─── Parallel Execution ─────────────────────────────────────────────────
+
+# Worker processes started by `python -m utils.parallel` (1 = plain serial run)
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# Set by the parallel runner (or pytest-xdist); "main" for a serial run
+WORKER_ID = os.getenv("UASK_WORKER") or os.getenv("PYTEST_XDIST_WORKER") or "main"
+
+# Pages kept loaded (cookies accepted) per language & device, ready to hand out
+PAGE_POOL_SIZE = int(os.getenv("PAGE_POOL_SIZE", "1"))
+
+
+# ─── Devices ────────────────────────────────────────────────────────────
+
+# Context options per device: each (lang, device) pair gets its own context
+# built with these, so pages never need resizing or emulation afterwards
+DEVICE_PROFILES = {
+    "Desktop": {
+        "viewport": {"width": 1280, "height": 800},
+        "device_scale_factor": 1,
+        "is_mobile": False,
+        "has_touch": False,
+    },
+    "Mobile": {
+        "viewport": {"width": 375, "height": 812},
+        "device_scale_factor": 3,
+        "is_mobile": True,
+        "has_touch": True,
+        "user_agent": (
+            "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36"
+        ),
+    },
+}
+
+# Browser locale of each language's contexts
+LANG_LOCALES = {"en": "en-US", "ar": "ar-AE"}
+
+# The test matrix: every test taking `lang` / `device` runs once per entry
+# (narrow a run with --lang / --device)
+LANGS   = tuple(l.strip() for l in os.getenv("LANGS", "en,ar").split(",") if l.strip())
+DEVICES = tuple(d.strip() for d in os.getenv("DEVICES", "Desktop,Mobile").split(",") if d.strip())
+
+for _lang in LANGS:
+    if _lang not in BASE_URLS:
+        raise ValueError(f"Unsupported language '{_lang}' in LANGS; must be one of {tuple(BASE_URLS)}.")
+for _device in DEVICES:
+    if _device not in DEVICE_PROFILES:
+        raise ValueError(
+            f"Unsupported device '{_device}' in DEVICES; must be one of {tuple(DEVICE_PROFILES)}."
+        )
+
+
 # ─── Reporting & Artifacts ──────────────────────────────────────────────
 
 ALLURE_RESULTS_DIR = os.getenv("ALLURE_DIR", "report/allure-results")
 TRACE_RESULTS_DIR  = os.getenv("TRACE_DIR",  "report/traces")
 
+# Playwright traces, one zip per test:
+#   "on"                → keep every test's trace
+#   "retain-on-failure" → record every test, keep only the failing ones
+#   "off"               → no tracing
+TRACE_MODE        = os.getenv("TRACE_MODE", "retain-on-failure").lower()
+TRACE_SCREENSHOTS = os.getenv("TRACE_SCREENSHOTS", "true").lower() == "true"
+TRACE_SNAPSHOTS   = os.getenv("TRACE_SNAPSHOTS", "true").lower() == "true"
+TRACE_SOURCES     = os.getenv("TRACE_SOURCES", "false").lower() == "true"
+
+if TRACE_MODE not in ("on", "retain-on-failure", "off"):
+    raise ValueError(
+        f"Unsupported TRACE_MODE='{TRACE_MODE}'; must be 'on', 'retain-on-failure' or 'off'."
+    )
+
+# Step screenshots: "always", "on_failure" or "off"
+SCREENSHOT_POLICY         = os.getenv("SCREENSHOT_POLICY", "always").lower()
+SCREENSHOT_FULL_PAGE      = os.getenv("SCREENSHOT_FULL_PAGE", "true").lower() == "true"   # false → viewport only
+SCREENSHOT_FORMAT         = os.getenv("SCREENSHOT_FORMAT", "png").lower()                 # "png" or "jpeg"
+SCREENSHOT_QUALITY        = int(os.getenv("SCREENSHOT_QUALITY", "70"))                     # jpeg only
+SCREENSHOT_SKIP_UNCHANGED = os.getenv("SCREENSHOT_SKIP_UNCHANGED", "false").lower() == "true"
+
+if SCREENSHOT_POLICY not in ("always", "on_failure", "off"):
+    raise ValueError(
+        f"Unsupported SCREENSHOT_POLICY='{SCREENSHOT_POLICY}'; must be 'always', 'on_failure' or 'off'."
+    )
+if SCREENSHOT_FORMAT not in ("png", "jpeg"):
+    raise ValueError(f"Unsupported SCREENSHOT_FORMAT='{SCREENSHOT_FORMAT}'; must be 'png' or 'jpeg'.")
+
+# Timing spans of every step and ChatbotPage call, exported as a
+# Chrome-trace / Perfetto timeline (one file per worker, merged by the
+# parallel runner) plus the TIMELINE_TOP slowest operations in the summary
+TIMELINE           = os.getenv("TIMELINE", "true").lower() == "true"
+TIMELINE_PATH      = os.getenv("TIMELINE_PATH", "report/timeline.json")
+TIMELINE_TOP       = int(os.getenv("TIMELINE_TOP", "15"))
+TIMELINE_MAX_SPANS = int(os.getenv("TIMELINE_MAX_SPANS", "500000"))   # later spans are dropped
+
+
+# ─── Log Capture ────────────────────────────────────────────────────────
+
+# Per-test log capture attached to Allure. Only loggers under these
+# comma-separated names are kept (empty = every library); once a test holds
+# more than LOG_CAPTURE_MAX_RECORDS lines the oldest ones spill to disk.
+LOG_CAPTURE_LEVEL       = os.getenv("LOG_CAPTURE_LEVEL", "DEBUG").upper()
+LOG_CAPTURE_LOGGERS     = [n.strip() for n in os.getenv("LOG_CAPTURE_LOGGERS", "uask").split(",") if n.strip()]
+LOG_CAPTURE_MAX_RECORDS = int(os.getenv("LOG_CAPTURE_MAX_RECORDS", "2000"))
+LOG_SPILL_DIR           = os.getenv("LOG_SPILL_DIR", "report/logs")
+
+
+# ─── Test Data ──────────────────────────────────────────────────────────
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Case sources per suite: a .json array, a .jsonl file, a directory of shards
+# or a glob; relative paths are resolved against PROJECT_ROOT
+DATA_SOURCES = {
+    "ai":       os.getenv("AI_DATA", "data/test_ai.json"),
+    "security": os.getenv("SECURITY_DATA", "data/test_security.json"),
+}
+
+# Schema verdicts and case indexes, keyed by file hash
+DATA_INDEX_CACHE = os.getenv("DATA_INDEX_CACHE", os.path.join(PROJECT_ROOT, ".cache", "data_index.json"))
+
+
+# ─── Results History ────────────────────────────────────────────────────
+
+# SQLite store of every test's outcome and duration (utils.results_db)
+RESULTS_DB_PATH = os.getenv("RESULTS_DB", os.path.join(PROJECT_ROOT, ".cache", "results.sqlite"))
+RESULTS_RECORD  = os.getenv("RESULTS_RECORD", "true").lower() == "true"
+
+# Latest results per test used for expected durations and flakiness
+RESULTS_HISTORY = int(os.getenv("RESULTS_HISTORY", "10"))
+
+# --skip-unchanged only trusts passes younger than this (hours)
+RESULTS_SKIP_MAX_AGE_H = float(os.getenv("RESULTS_SKIP_MAX_AGE_H", "24"))
+
+# Deployed chatbot build (e.g. a release tag). Unset, the target is only
+# identified by traffic mode and URL, so the age limit does the invalidating.
+TARGET_BUILD = os.getenv("TARGET_BUILD", "")
+
+if RESULTS_HISTORY < 1:
+    raise ValueError(f"RESULTS_HISTORY must be at least 1, got {RESULTS_HISTORY}.")
+
 
 # ─── Session Persistence ────────────────────────────────────────────────
 
 # storage_state.json for re-using login/CAPTCHA
 STORAGE_STATE_PATH = os.getenv("STORAGE_STATE_PATH", "storage/auth.json")
+
+# Probe the saved session (headless) before browser tests start; the verdict
+# is cached next to the state for SESSION_PROBE_TTL seconds and shared by workers
+SESSION_CHECK         = os.getenv("SESSION_CHECK", "true").lower() == "true"
+SESSION_PROBE_TTL     = int(os.getenv("SESSION_PROBE_TTL", "1800"))
+# Treat cookies expiring within this many seconds as already expired
+SESSION_EXPIRY_MARGIN = int(os.getenv("SESSION_EXPIRY_MARGIN", "600"))
+
+
+# ─── Response Corpus ────────────────────────────────────────────────────
+
+# Every captured reply is appended to CORPUS_DIR/responses*.jsonl, so the
+# validators can be re-run offline (`python -m utils.corpus`)
+CORPUS_RECORD = os.getenv("CORPUS_RECORD", "true").lower() == "true"
+CORPUS_DIR    = os.getenv("CORPUS_DIR", "storage/corpus")
+
+
+# ─── Traffic Record / Replay ────────────────────────────────────────────
+
+# "live"   → talk to BASE_URL as usual
+# "record" → talk to BASE_URL and archive every exchange under TRAFFIC_ARCHIVE_DIR
+# "replay" → serve the archive offline (no network, no CAPTCHA session needed)
+TRAFFIC_MODE        = os.getenv("TRAFFIC_MODE", "live").lower()
+TRAFFIC_ARCHIVE_DIR = os.getenv("TRAFFIC_ARCHIVE", "storage/traffic")
+
+# Replay with the recorded time-to-first-byte / duration; "false" serves instantly
+REPLAY_REALTIME = os.getenv("REPLAY_REALTIME", "true").lower() == "true"
+
+# Regex (matched against the URL path) identifying chatbot API calls
+CHAT_API_PATTERN = os.getenv("CHAT_API_PATTERN", r"/(api|chat|conversations?|hubs?)/")
+
+# Where ChatbotPage reads answers from:
+# "dom"     → the rendered bot bubbles
+# "network" → the chat API traffic itself (utils.chat_capture), DOM as fallback
+ANSWER_SOURCE = os.getenv("ANSWER_SOURCE", "dom").lower()
+
+# JSON keys holding answer text in chat API messages, searched in this order
+CHAT_TEXT_KEYS = tuple(
+    k.strip() for k in os.getenv("CHAT_TEXT_KEYS", "delta,content,text,answer,token,message").split(",")
+    if k.strip()
+)
+
+if TRAFFIC_MODE not in ("live", "record", "replay"):
+    raise ValueError(
+        f"Unsupported TRAFFIC_MODE='{TRAFFIC_MODE}'; must be 'live', 'record' or 'replay'."
+    )
+if ANSWER_SOURCE not in ("dom", "network"):
+    raise ValueError(f"Unsupported ANSWER_SOURCE='{ANSWER_SOURCE}'; must be 'dom' or 'network'.")
+
+
+# ─── Resource Blocking ──────────────────────────────────────────────────
+
+# Requests each context lets through (see utils.resource_blocking):
+# "full"      → everything (layout tests)
+# "no-media"  → no images, video, audio or web fonts
+# "chat-only" → also no trackers or other third-party resources
+# Empty → per module, @pytest.mark.block_profile("chat-only"), else "full"
+BLOCK_PROFILES = ("full", "no-media", "chat-only")
+BLOCK_PROFILE  = os.getenv("BLOCK_PROFILE", "").lower()
+
+# Extra domains chat-only must not block (comma-separated, subdomains included)
+BLOCK_ALLOW_DOMAINS = tuple(
+    d.strip().lower() for d in os.getenv("BLOCK_ALLOW_DOMAINS", "").split(",") if d.strip()
+)
+
+# Sizes of previously loaded resources, to report the bytes a profile saved
+BLOCK_SIZE_CACHE = os.getenv("BLOCK_SIZE_CACHE", os.path.join(PROJECT_ROOT, ".cache", "resource_sizes.json"))
+
+if BLOCK_PROFILE and BLOCK_PROFILE not in BLOCK_PROFILES:
+    raise ValueError(
+        f"Unsupported BLOCK_PROFILE='{BLOCK_PROFILE}'; must be one of {BLOCK_PROFILES}."
+    )
+
+
+# ─── Load Testing ───────────────────────────────────────────────────────
+
+# Synthetic stand-in bot (`python -m utils.standin --synthetic`): time to the
+# first streamed token, streaming speed and share of requests failing with 503
+STANDIN_TTFT_MS       = int(os.getenv("STANDIN_TTFT_MS", "400"))
+STANDIN_CHARS_PER_SEC = float(os.getenv("STANDIN_CHARS_PER_SEC", "300"))
+STANDIN_ERROR_RATE    = float(os.getenv("STANDIN_ERROR_RATE", "0"))
+
+# Defaults for `python -m utils.loadgen`
+LOAD_USERS      = int(os.getenv("LOAD_USERS", "10"))
+LOAD_DURATION_S = float(os.getenv("LOAD_DURATION_S", "60"))
+LOAD_REPORT_DIR = os.getenv("LOAD_REPORT_DIR", "report/load")
+
+if not 0 <= STANDIN_ERROR_RATE <= 1:
+    raise ValueError(
+        f"Unsupported STANDIN_ERROR_RATE={STANDIN_ERROR_RATE}; must be between 0 and 1."
+    )
+
+
+# ─── Security Fuzzing ───────────────────────────────────────────────────
+
+# Defaults for `python -m utils.fuzz`: variants generated from the security
+# seeds (each applies 1..FUZZ_MAX_DEPTH mutators) and conversations at once
+FUZZ_VARIANTS    = int(os.getenv("FUZZ_VARIANTS", "2000"))
+FUZZ_CONCURRENCY = int(os.getenv("FUZZ_CONCURRENCY", "16"))
+FUZZ_MAX_DEPTH   = int(os.getenv("FUZZ_MAX_DEPTH", "3"))
+
+# Replies within this many differing bits of a 64-bit SimHash are one cluster
+FUZZ_CLUSTER_BITS = int(os.getenv("FUZZ_CLUSTER_BITS", "10"))
+
+# Re-sends the delta-debugging minimizer may spend per failing input
+FUZZ_MINIMIZE_MAX_TESTS = int(os.getenv("FUZZ_MINIMIZE_MAX_TESTS", "150"))
+
+FUZZ_OUT_DIR       = os.getenv("FUZZ_OUT_DIR", "report/fuzz")
+FUZZ_CLUSTERS_PATH = os.getenv("FUZZ_CLUSTERS_PATH", ".cache/fuzz_clusters.json")   # seen across runs
+
+
+# ─── Benchmarks ─────────────────────────────────────────────────────────
+
+# Timing baseline written by `pytest --bench-rounds N --bench-save`
+BENCH_BASELINE_PATH = os.getenv("BENCH_BASELINE", "benchmarks/baseline.json")
+BENCH_REPORT_PATH   = os.getenv("BENCH_REPORT", "report/benchmark.json")
+
+# A metric regresses when its median grows by more than BENCH_REL_THRESHOLD
+# (fraction) AND BENCH_ABS_THRESHOLD_MS, and the slowdown is significant
+# (one-sided Mann-Whitney U, p < BENCH_ALPHA)
+BENCH_REL_THRESHOLD    = float(os.getenv("BENCH_REL_THRESHOLD", "0.20"))
+BENCH_ABS_THRESHOLD_MS = float(os.getenv("BENCH_ABS_THRESHOLD_MS", "100"))
+BENCH_ALPHA            = float(os.getenv("BENCH_ALPHA", "0.05"))
+
+if not 0 < BENCH_ALPHA < 1:
+    raise ValueError(f"Unsupported BENCH_ALPHA={BENCH_ALPHA}; must be between 0 and 1.")
@@ -0,0 +1,280 @@
+"""
+Page-side scripts and selector handling shared by ChatbotPage and
+AsyncChatbotPage, so the sync page and its asyncio twin measure and check
+the page the same way.
+"""
+import re
+from typing import Callable, Optional
+
+
+# ——— In-page stream watcher ———————————————————————————————————————
+# Armed right before a prompt is sent: a MutationObserver follows the newest
+# bot bubble and timestamps the first non-empty text and every later change.
+
+ARM_STREAM_JS = """
+([sel, rewind]) => {
+  const prev = window.__uaskStream;
+  if (prev) prev.observer.disconnect();
+  const s = {
+    t0: performance.now(),
+    baseline: Math.max(document.querySelectorAll(sel).length - rewind, 0),
+    first: null, last: null, text: ""
+  };
+  s.check = () => {
+    const nodes = document.querySelectorAll(sel);
+    if (nodes.length <= s.baseline) return;
+    const text = (nodes[nodes.length - 1].textContent || "").trim();
+    if (!text) return;
+    const now = performance.now();
+    if (s.first === null) s.first = now;
+    if (text !== s.text) { s.text = text; s.last = now; }
+  };
+  s.observer = new MutationObserver(s.check);
+  s.observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+  window.__uaskStream = s;
+}
+"""
+
+# Simulated clipboard paste: the page gets a real `paste` event and, unless it
+# handles the paste itself, the text is inserted the way the browser would.
+PASTE_JS = """
+([sel, text]) => {
+  const el = document.querySelector(sel);
+  el.focus();
+  const data = new DataTransfer();
+  data.setData("text/plain", text);
+  const evt = new ClipboardEvent("paste", {clipboardData: data, bubbles: true, cancelable: true});
+  if (el.dispatchEvent(evt)) document.execCommand("insertText", false, text);
+}
+"""
+
+STREAM_STARTED_JS = """
+() => { const s = window.__uaskStream; s.check(); return s.first !== null; }
+"""
+
+STREAM_SETTLED_JS = """
+(settle) => {
+  const s = window.__uaskStream; s.check();
+  return s.last !== null && performance.now() - s.last >= settle;
+}
+"""
+
+# Navigation start → load event end of the current document
+PAGE_LOAD_JS = """
+() => {
+  const nav = performance.getEntriesByType("navigation")[0];
+  return nav && nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null;
+}
+"""
+
+# When the cookie banner's accept button shows up, in ms after arming: a late
+# banner's locator handler only runs before the page's next action, so the
+# time it runs says nothing about when the banner appeared
+BANNER_WATCH_JS = """
+(name) => {
+  const t0 = performance.now();
+  const w = window.__uaskBanner = {seen: null};
+  const check = () => {
+    const shown = [...document.querySelectorAll("button, [role=button]")]
+      .some(b => b.textContent.trim() === name && b.getClientRects().length);
+    if (shown && w.seen === null) { w.seen = performance.now() - t0; observer.disconnect(); }
+  };
+  const observer = new MutationObserver(check);
+  observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+}
+"""
+
+BANNER_SEEN_JS = "() => window.__uaskBanner ? window.__uaskBanner.seen : null"
+
+# ——— Batched visibility check ——————————————————————————————————————
+# One round trip per poll for every pending element. Page JS cannot run
+# Playwright's selector engines, so the few forms the page object uses
+# (CSS, `role=x[name='y']`, `text=y`, `:has-text('y')`, `>> nth=k`) are
+# turned into queries resolved here the same way (case-insensitive
+# substring names, role matches exclude hidden elements); anything else is
+# left to Playwright. Each query reports "visible", "hidden" or "missing"
+# for its first match, or null if the page could not run it.
+
+VISIBILITY_JS = """
+(queries) => {
+  const ROLES = {
+    button: "button, [role=button], input[type=button], input[type=submit], input[type=reset]",
+    link: "a[href], [role=link]",
+    combobox: "select, [role=combobox], input[list]",
+  };
+  const norm = (s) => (s || "").replace(/\\s+/g, " ").trim().toLowerCase();
+  const shown = (el) => el.getClientRects().length > 0
+    && getComputedStyle(el).visibility !== "hidden" && !el.closest("[aria-hidden=true]");
+  const name = (el) => norm(
+    el.getAttribute("aria-label")
+    || (el.getAttribute("aria-labelledby") || "").split(" ")
+         .map((id) => (document.getElementById(id) || {}).textContent || "").join(" ").trim()
+    || el.textContent
+    || [...el.querySelectorAll("img[alt]")].map((img) => img.alt).join(" ")
+    || el.getAttribute("title")
+  );
+  const leafText = (text) => [...document.querySelectorAll("body *")].filter((el) =>
+    norm(el.textContent).includes(text)
+    && ![...el.children].some((c) => norm(c.textContent).includes(text)));
+  return queries.map((q) => {
+    let els;
+    try {
+      if (q.role) {
+        els = [...document.querySelectorAll(ROLES[q.role] || `[role=${q.role}]`)].filter(shown);
+        if (q.name) els = els.filter((el) => name(el).includes(norm(q.name)));
+      } else if (q.text) {
+        els = leafText(norm(q.text));
+      } else {
+        els = [...document.querySelectorAll(q.css)];
+        if (q.has_text) els = els.filter((el) => norm(el.textContent).includes(norm(q.has_text)));
+      }
+    } catch (e) {
+      return null;
+    }
+    if (q.nth !== null) els = els.slice(q.nth, q.nth + 1);
+    if (!els.length) return "missing";
+    return shown(els[0]) ? "visible" : "hidden";
+  });
+}
+"""
+
+_NTH = re.compile(r"(.+?) >> nth=(\d+)")
+_ROLE = re.compile(r"role=(\w+)(?:\[name='([^']*)'\])?")
+_TEXT = re.compile(r"text=([^/'\"].*)")
+_HAS_TEXT = re.compile(r"(.+):has-text\('([^']*)'\)")
+_ENGINE = re.compile(r"^[\w-]+=|>>")
+
+
+def dom_query(selector: str) -> Optional[dict]:
+    """
+    The in-page query (see VISIBILITY_JS) for a selector string, or None
+    if it needs Playwright's own engines. CSS the page rejects (e.g.
+    Playwright-only pseudo-classes) is reported as null by the page.
+    """
+    query = {"selector": selector, "nth": None}
+    m = _NTH.fullmatch(selector)
+    if m:
+        selector, query["nth"] = m.group(1), int(m.group(2))
+    m = _ROLE.fullmatch(selector)
+    if m:
+        return dict(query, role=m.group(1), name=m.group(2))
+    m = _TEXT.fullmatch(selector)
+    if m:
+        return dict(query, text=m.group(1))
+    if _ENGINE.search(selector):
+        return None
+    m = _HAS_TEXT.fullmatch(selector)
+    if m:
+        return dict(query, css=m.group(1), has_text=m.group(2))
+    return dict(query, css=selector)
+
+
+class VisibilityCheck:
+    """
+    Bookkeeping of one `check_visibility` call: which checks the page
+    resolves itself (one VISIBILITY_JS evaluate per poll for all of them),
+    which need a Playwright locator (`locator_for(target)`), and the report
+    so far. The page objects only add the waiting, sync or async.
+    """
+
+    def __init__(self, checks: list, locator_for: Callable):
+        self.queries, self.locators = {}, {}
+        self._locator_for = locator_for
+        for target, name in checks:
+            query = dom_query(target) if isinstance(target, str) else None
+            if query is None:
+                self.locators[name] = locator_for(target)
+            else:
+                self.queries[name] = query
+        self.report = {name: "missing" for _, name in checks}
+        self.pending = list(self.report)
+
+    def in_page(self) -> list:
+        """
+        Pending checks for the next VISIBILITY_JS evaluate.
+        """
+        return [name for name in self.pending if name in self.queries]
+
+    def args(self, names: list) -> list:
+        return [self.queries[name] for name in names]
+
+    def take(self, names: list, states: list):
+        for name, state in zip(names, states):
+            if state is None:
+                # The page could not run it; let Playwright resolve it
+                self.locators[name] = self._locator_for(self.queries.pop(name)["selector"])
+            else:
+                self.report[name] = state
+
+    def by_locator(self) -> list:
+        """
+        Pending checks Playwright has to answer, one by one.
+        """
+        return [name for name in self.pending if name in self.locators]
+
+    def settle(self) -> list:
+        """
+        Drop the checks that became visible from `pending` and return them.
+        """
+        visible = [name for name in self.pending if self.report[name] == "visible"]
+        self.pending = [name for name in self.pending if self.report[name] != "visible"]
+        return visible
+
+
+# ——— In-page message tracker ——————————————————————————————————————
+# Conversation items are collected by a MutationObserver as they are added,
+# so each read returns only the items after the cursor: one round trip and
+# constant work per turn, however long the history. While an answer is still
+# being watched, a trailing bot bubble is held back until it is complete.
+
+TRACK_MESSAGES_JS = """
+([itemSel, userSel, textSel, timeSel]) => {
+  let t = window.__uaskMsgs;
+  const fresh = !t;
+  if (fresh) {
+    const seen = new WeakSet();
+    t = window.__uaskMsgs = {nodes: [], cursor: 0};
+    t.add = (el) => { if (!seen.has(el)) { seen.add(el); t.nodes.push(el); } };
+    document.querySelectorAll(itemSel).forEach(t.add);
+    t.observer = new MutationObserver((records) => {
+      for (const r of records) for (const n of r.addedNodes) {
+        if (n.nodeType !== 1) continue;
+        if (n.matches(itemSel)) t.add(n);
+        n.querySelectorAll(itemSel).forEach(t.add);
+      }
+    });
+    t.observer.observe(document.body, {childList: true, subtree: true});
+  }
+  let end = t.nodes.length;
+  if (window.__uaskStream && end > t.cursor && !t.nodes[end - 1].matches(userSel)) end--;
+  const out = [];
+  for (; t.cursor < end; t.cursor++) {
+    const el = t.nodes[t.cursor];
+    const text = el.querySelector(textSel), time = el.querySelector(timeSel);
+    out.push({
+      role: el.matches(userSel) ? "user" : "bot",
+      text: text ? text.textContent.trim() : "",
+      msg_time: time ? time.textContent.trim() : "",
+      direction: el.classList.contains("rtl") ? "rtl" : "ltr",
+    });
+  }
+  return {fresh, items: out};
+}
+"""
+
+TRACK_RESET_JS = """
+() => {
+  const t = window.__uaskMsgs;
+  if (t) t.observer.disconnect();
+  window.__uaskMsgs = null;
+}
+"""
+
+STREAM_RESULT_JS = """
+() => {
+  const s = window.__uaskStream;
+  s.observer.disconnect();
+  window.__uaskStream = null;
+  return {text: s.text, ttft: s.first - s.t0, total: s.last - s.t0};
+}
+"""
@@ -0,0 +1,329 @@
+import asyncio
+import random
+import time
+from typing import Optional
+from playwright.async_api import Page, TimeoutError as PlaywrightTO, Locator
+from config.config import (
+    DEFAULT_TIMEOUT,
+    SHORT_TIMEOUT,
+    STREAM_SETTLE_MS,
+    INPUT_PROFILE,
+    INPUT_PROFILES,
+    TYPING_SPEED,
+)
+from pages._chat_js import (
+    ARM_STREAM_JS,
+    BANNER_SEEN_JS,
+    BANNER_WATCH_JS,
+    PAGE_LOAD_JS,
+    PASTE_JS,
+    STREAM_RESULT_JS,
+    STREAM_SETTLED_JS,
+    STREAM_STARTED_JS,
+    TRACK_MESSAGES_JS,
+    TRACK_RESET_JS,
+    VISIBILITY_JS,
+    VisibilityCheck,
+)
+from pages.chatbot_page import ChatbotPage, ChatMessage, ResponseMetrics
+from utils.benchmark import RECORDER
+from utils.logger import get_logger
+from utils.timeouts import TIMEOUTS
+
+
+class AsyncChatbotPage:
+    """
+    asyncio twin of ChatbotPage (same selectors, UI text, page scripts and
+    learned deadlines) on playwright.async_api, so one event loop can drive
+    many conversations. Answers are always read from the DOM: network
+    capture (ANSWER_SOURCE=network) is built on the sync API and only
+    available on ChatbotPage.
+    """
+
+    UI_TEXT = ChatbotPage.UI_TEXT
+    _SEL = ChatbotPage._SEL
+    SAMPLE_Q_PATTERN = ChatbotPage.SAMPLE_Q_PATTERN
+    SAMPLE_QUESTIONS = ChatbotPage.SAMPLE_QUESTIONS
+
+    # Overridden per test by the `input_profile` marker (see conftest)
+    default_input_profile = INPUT_PROFILE
+
+    def __init__(self, page: Page, lang: str = "en", input_profile: str = None):
+        self.page = page
+        self.lang = lang
+        self.text = self.UI_TEXT[lang]
+        self._input_profile = input_profile
+        self.logger = get_logger(self.__class__.__name__)
+        self.last_metrics: Optional[ResponseMetrics] = None
+        self.history: list[ChatMessage] = []
+        self.last_visibility_report: dict = {}
+        self._late_banner_armed = False
+
+        # Format selectors with UI text
+        self.sel = {
+            name: tpl.format(**self.text)
+            for name, tpl in self._SEL.items()
+        }
+
+        # Prepare sample-question locators
+        self.sample_q_locators = [
+            page.locator(self.SAMPLE_Q_PATTERN.format(q))
+            for q in self.SAMPLE_QUESTIONS[lang]
+        ]
+
+        self.logger.debug(f"Initialized AsyncChatbotPage (lang={lang})")
+
+    @property
+    def input_profile(self) -> str:
+        return self._input_profile or self.default_input_profile
+
+    def _first_locator(self, target):
+        return (target if isinstance(target, Locator) else self.page.locator(target)).first
+
+    async def _wait_visible(self, target, name: str = None, timeout: int = SHORT_TIMEOUT) -> bool:
+        """
+        Wait up to `timeout` ms for either:
+          - a CSS selector string, or
+          - a Locator
+        to become visible.
+        """
+        locator = target if isinstance(target, Locator) else self.page.locator(target)
+        try:
+            await locator.wait_for(state="visible", timeout=timeout)
+            if name:
+                self.logger.debug(f"[OK] Visible: {name}")
+            return True
+        except PlaywrightTO:
+            if name:
+                self.logger.warning(f"[FAIL] Not visible within {timeout}ms: {name}")
+            return False
+
+    # ——— Page actions —————————————————————————————————————————————
+
+    async def open(self, url: str):
+        self.logger.debug(f"Navigating to {url}")
+        with TIMEOUTS.waiting("navigation", self.lang) as timeout:
+            await self.page.goto(url, timeout=timeout, wait_until="commit")
+        with TIMEOUTS.waiting("page_load", self.lang) as timeout:
+            await self.page.wait_for_load_state("networkidle", timeout=timeout)
+        self.logger.debug("Page loaded (network idle)")
+        if RECORDER.recording:
+            RECORDER.record("page_load_ms", await self.page.evaluate(PAGE_LOAD_JS))
+
+    async def reset_conversation(self):
+        """
+        See ChatbotPage.reset_conversation.
+        """
+        history = self.page.locator(f"{self.sel['user_msgs']}, {self.sel['bot_msgs']}")
+        new_chat = self.page.locator(self.sel["new_chat"]).first
+        if await history.count() and await new_chat.is_visible():
+            await new_chat.click()
+        try:
+            await history.first.wait_for(state="detached", timeout=1000)
+        except PlaywrightTO:
+            self.logger.debug("No in-place reset available, reloading")
+            with TIMEOUTS.waiting("page_load", self.lang) as timeout:
+                await self.page.reload(wait_until="networkidle", timeout=timeout)
+            await self.accept_cookies()
+        self.last_metrics = None
+        await self.forget_messages()
+        self.logger.debug("Conversation reset")
+
+    async def accept_cookies(self):
+        """
+        See ChatbotPage.accept_cookies.
+        """
+        sel = self.sel["accept_btn"]
+        self.logger.debug("Attempting to accept cookies")
+        started = time.perf_counter()
+        if await self._wait_visible(sel, "Accept cookies", TIMEOUTS.deadline("cookie_banner", self.lang)):
+            TIMEOUTS.observe("cookie_banner", self.lang, (time.perf_counter() - started) * 1000)
+            await self.page.click(sel)
+        elif not self._late_banner_armed:
+            self._late_banner_armed = True
+            armed_ms = (time.perf_counter() - started) * 1000
+            await self.page.evaluate(BANNER_WATCH_JS, self.text["accept"])
+
+            async def late_banner():
+                self._late_banner_armed = False
+                seen = await self.page.evaluate(BANNER_SEEN_JS)
+                if seen is not None:
+                    TIMEOUTS.observe("cookie_banner", self.lang, armed_ms + seen)
+                self.logger.debug("Accepting a late cookie banner")
+                await self.page.click(sel)
+
+            await self.page.add_locator_handler(self.page.locator(sel), late_banner, times=1)
+
+    async def send_message(self, msg: str = None, profile: str = None):
+        text = msg or self.text["default_q"]
+        profile = profile or self.input_profile
+        if profile not in INPUT_PROFILES:
+            raise ValueError(f"Unknown input profile {profile!r}; expected one of {INPUT_PROFILES}")
+        self.logger.debug(f"Sending message ({profile}): {text!r}")
+        await self.page.click(self.sel["input"])
+
+        if profile == "fill":
+            await self.page.fill(self.sel["input"], text)
+        elif profile == "insert":
+            await self.page.keyboard.insert_text(text)
+        elif profile == "paste":
+            await self.page.evaluate(PASTE_JS, [self.sel["input"], text])
+        else:
+            for ch in text:
+                await asyncio.sleep(random.uniform(0.08, 0.15) / TYPING_SPEED)
+                await self.page.keyboard.type(ch)
+            await asyncio.sleep(random.uniform(0.5, 1.2) / TYPING_SPEED)
+
+        await self.arm_response_watch()
+        await self.page.keyboard.press("Enter")
+
+    async def arm_response_watch(self, rewind: int = 0):
+        await self.page.evaluate(ARM_STREAM_JS, [self.sel["bot_msgs"], rewind])
+
+    async def wait_for_response(self, timeout: int = None,
+                                settle_ms: int = STREAM_SETTLE_MS,
+                                stream_timeout: int = None) -> ResponseMetrics:
+        """
+        See ChatbotPage.wait_for_response.
+        """
+        self.logger.debug("Waiting for AI response text")
+        if not await self.page.evaluate("() => !!window.__uaskStream"):
+            await self.arm_response_watch(rewind=1)
+
+        with TIMEOUTS.waiting("first_token", self.lang, timeout) as ms:
+            await self.page.wait_for_function(STREAM_STARTED_JS, timeout=ms, polling=100)
+        with TIMEOUTS.waiting("answer", self.lang, stream_timeout) as ms:
+            await self.page.wait_for_function(
+                STREAM_SETTLED_JS, arg=settle_ms, timeout=ms, polling=100
+            )
+        metrics = ResponseMetrics.from_stream(await self.page.evaluate(STREAM_RESULT_JS))
+        self.last_metrics = metrics
+        RECORDER.record("ttft_ms", metrics.ttft_ms)
+        RECORDER.record("response_ms", metrics.total_ms)
+        self.logger.debug(
+            f"Response complete: ttft={metrics.ttft_ms}ms total={metrics.total_ms}ms "
+            f"({metrics.chars_per_sec} chars/s, {len(metrics.text)} chars)"
+        )
+        return metrics
+
+    # ——— Verifications & data getters —————————————————————————————————
+
+    async def verify_main_elements_loaded(self) -> bool:
+        """
+        Quick‐fail check that all key UI controls are visible.
+        """
+        checks = [
+            (self.sel["logo"],    "Logo"),
+            (self.sel["lang_btn"],"Language toggle"),
+            (self.sel["samples"], "Sample questions label"),
+            (self.sel["input"],   "Input box"),
+            (self.sel["send_btn"],"Send button"),
+            (self.sel["mic_btn"], "Microphone button"),
+            (self.sel["combo"],   "Language combobox"),
+            (self.sel["terms"],   "Terms link"),
+        ]
+        for idx, q in enumerate(self.SAMPLE_QUESTIONS[self.lang], start=1):
+            checks.append((self.SAMPLE_Q_PATTERN.format(q), f"Sample question #{idx}"))
+
+        report = await self.check_visibility(checks)
+        self.last_visibility_report = report
+        all_ok = all(state == "visible" for state in report.values())
+        self.logger.debug(f"verify_main_elements_loaded → {all_ok}")
+        return all_ok
+
+    async def check_visibility(self, checks: list, timeout: int = None,
+                               poll_ms: int = 100) -> dict:
+        """
+        See ChatbotPage.check_visibility.
+        """
+        check = VisibilityCheck(checks, self._first_locator)
+        timeout = TIMEOUTS.deadline("visibility", self.lang, timeout)
+        started = time.monotonic()
+        deadline = started + timeout / 1000
+
+        while check.pending:
+            names = check.in_page()
+            if names:
+                check.take(names, await self.page.evaluate(VISIBILITY_JS, check.args(names)))
+            for name in check.by_locator():
+                if await check.locators[name].is_visible():
+                    check.report[name] = "visible"
+            for name in check.settle():
+                self.logger.debug(f"[OK] Visible: {name}")
+            if not check.pending or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(poll_ms / 1000)
+
+        if not check.pending:
+            TIMEOUTS.observe("visibility", self.lang, (time.monotonic() - started) * 1000)
+        for name in check.pending:
+            if name in check.locators:
+                check.report[name] = "hidden" if await check.locators[name].count() else "missing"
+            self.logger.warning(f"[FAIL] {check.report[name].title()} after {timeout}ms: {name}")
+        return check.report
+
+    async def new_messages(self) -> list[ChatMessage]:
+        res = await self.page.evaluate(TRACK_MESSAGES_JS, [
+            f"{self.sel['user_conts']}, {self.sel['bot_conts']}",
+            self.sel["user_conts"], self.sel["msg_text"], self.sel["msg_time"],
+        ])
+        if res["fresh"] and self.history:
+            self.history = []
+        new = [ChatMessage(**item) for item in res["items"]]
+        self.history.extend(new)
+        return new
+
+    async def forget_messages(self):
+        await self.page.evaluate(TRACK_RESET_JS)
+        self.history = []
+
+    async def messages(self, role: str = None) -> list[ChatMessage]:
+        await self.new_messages()
+        return [m for m in self.history if role is None or m.role == role]
+
+    async def get_all_bot_messages(self) -> list[str]:
+        clean = [m.text for m in await self.messages("bot") if m.text]
+        self.logger.debug(f"All bot messages: {len(clean)}")
+        return clean
+
+    async def get_last_bot_message(self) -> str:
+        msgs = await self.get_all_bot_messages()
+        last = msgs[-1] if msgs else ""
+        self.logger.debug(f"Last bot message: {last!r}")
+        return last
+
+    async def input_is_cleared(self) -> bool:
+        content = await self.page.locator(self.sel["input"]).text_content() or ""
+        cleared = not content.strip()
+        self.logger.debug(f"Input cleared: {cleared}")
+        return cleared
+
+    async def get_last_message_direction(self) -> str:
+        cls = await self.page.locator(self.sel["bot_conts"]).last.get_attribute("class") or ""
+        direction = "rtl" if "rtl" in cls.split() else "ltr"
+        self.logger.debug(f"Last message direction: {direction}")
+        return direction
+
+    async def scroll_required(self) -> bool:
+        area = self.page.locator(".chat-msg-history.scroll-container")
+        req = await area.evaluate("el => el.scrollHeight > el.clientHeight")
+        self.logger.debug(f"Scroll required: {req}")
+        return req
+
+    async def has_accessibility_roles(self) -> bool:
+        ok = (
+            await self.page.locator(self.sel["role_log"]).is_visible(timeout=DEFAULT_TIMEOUT)
+            and await self.page.locator(self.sel["aria_label"]).count() > 0
+        )
+        self.logger.debug(f"Accessibility roles present: {ok}")
+        return ok
+
+    async def get_message_timestamp(self, container_locator) -> str:
+        ts = (await container_locator.locator(self.sel["msg_time"]).text_content()).strip()
+        self.logger.debug(f"Message timestamp: {ts}")
+        return ts
+
+    async def get_user_messages(self) -> list[str]:
+        clean = [m.text for m in await self.messages("user") if m.text]
+        self.logger.debug(f"User messages: {len(clean)}")
+        return clean
@@ -1,9 +1,71 @@
 import random
 import time
+from dataclasses import dataclass
+from typing import Optional
 from playwright.sync_api import Page, TimeoutError as PlaywrightTO, Locator
-from config.config import DEFAULT_TIMEOUT, SHORT_TIMEOUT
+from config.config import (
+    ANSWER_SOURCE,
+    DEFAULT_TIMEOUT,
+    SHORT_TIMEOUT,
+    STREAM_SETTLE_MS,
+    INPUT_PROFILE,
+    INPUT_PROFILES,
+    TYPING_SPEED,
+)
+from pages._chat_js import (
+    ARM_STREAM_JS,
+    BANNER_SEEN_JS,
+    BANNER_WATCH_JS,
+    PAGE_LOAD_JS,
+    PASTE_JS,
+    STREAM_RESULT_JS,
+    STREAM_SETTLED_JS,
+    STREAM_STARTED_JS,
+    TRACK_MESSAGES_JS,
+    TRACK_RESET_JS,
+    VISIBILITY_JS,
+    VisibilityCheck,
+)
+from utils.benchmark import RECORDER
+from utils.chat_capture import CapturedAnswer, ChatCapture
 from utils.logger import get_logger
+from utils.timeline import SPANS, traced_methods
+from utils.timeouts import TIMEOUTS
 
+
+@dataclass
+class ResponseMetrics:
+    """
+    Final streamed answer plus its latency profile (ms since the prompt was sent).
+    """
+    text: str
+    ttft_ms: Optional[float]
+    total_ms: float
+    chars_per_sec: float
+
+    @classmethod
+    def from_stream(cls, res: dict) -> "ResponseMetrics":
+        seconds = res["total"] / 1000
+        return cls(
+            text=res["text"],
+            ttft_ms=round(res["ttft"], 1),
+            total_ms=round(res["total"], 1),
+            chars_per_sec=round(len(res["text"]) / seconds, 1) if seconds > 0 else 0.0,
+        )
+
+
+@dataclass
+class ChatMessage:
+    """
+    One conversation item as the tracker saw it.
+    """
+    role: str          # "user" or "bot"
+    text: str
+    msg_time: str
+    direction: str     # "ltr" or "rtl"
+
+
+@traced_methods("page")
 class ChatbotPage:
     # ——— UI text / i18n ——————————————————————————————
     UI_TEXT = {
@@ -13,6 +75,7 @@ class ChatbotPage:
             "samples":      "Sample questions",
             "terms":        "Terms of Service",
             "send":         "Send",
+            "new_chat":     "New chat",
             "default_q":    "What is the golden visa?",
             "scroll_q":     "What is the golden visa?",
             "expected_dir": "ltr"
@@ -23,6 +86,7 @@ class ChatbotPage:
             "samples":      "عيّنة من أسئلة",
             "terms":        "شروط الخدمة",
             "send":         "إرسال",
+            "new_chat":     "محادثة جديدة",
             "default_q":    "ما هي متطلبات الحصول على تأشيرة الإقامة الذهبية؟",
             "scroll_q":     "ما هي متطلبات الحصول على تأشيرة الإقامة الذهبية؟",
             "expected_dir": "rtl"
@@ -40,9 +104,12 @@ class ChatbotPage:
         "mic_btn":    "role=button >> nth=2",
         "combo":      "role=combobox",
         "terms":      "role=link[name='{terms}']",
+        "new_chat":   "role=button[name='{new_chat}']",
         "user_msgs":  ".chat-item.chat-message-out .chat-text.chat-message-text",
+        "user_conts": ".chat-item.chat-message-out",
         "bot_msgs":   ".chat-item.chatbot.chat-message-in .chat-text.chat-message-text",
         "bot_conts":  ".chat-item.chatbot.chat-message-in",
+        "msg_text":   ".chat-text.chat-message-text",
         "msg_time":   ".chat-datetime.date-time",
         "role_log":   "[role=log]",
         "aria_label": "textarea[aria-label]"
@@ -50,12 +117,27 @@ class ChatbotPage:
 
     # Pattern for sample questions
     SAMPLE_Q_PATTERN = "#chat-welcome-tab div.question:has-text('{}')"
+    SAMPLE_QUESTIONS = {
+        "en": ["golden visa", "driving license", "sponsoring visa"],
+        "ar": ["تأشيرة الإقامة الذهبية", "رخصة قيادة", "تأشيرة إقامة للأسرة"]
+    }
 
-    def __init__(self, page: Page, lang: str = "en"):
+    # Overridden per test by the `input_profile` marker (see conftest)
+    default_input_profile = INPUT_PROFILE
+
+    def __init__(self, page: Page, lang: str = "en", input_profile: str = None,
+                 device: str = None):
         self.page = page
         self.lang = lang
+        self.device = device
         self.text = self.UI_TEXT[lang]
+        self._input_profile = input_profile
         self.logger = get_logger(self.__class__.__name__)
+        self.last_metrics: Optional[ResponseMetrics] = None
+        self.last_visibility_report: dict = {}
+        self.capture: Optional[ChatCapture] = None
+        self.history: list[ChatMessage] = []
+        self._late_banner_armed = False
 
         # Format selectors with UI text
         self.sel = {
@@ -64,17 +146,24 @@ class ChatbotPage:
         }
 
         # Prepare sample-question locators
-        sample_texts = {
-            "en": ["golden visa", "driving license", "sponsoring visa"],
-            "ar": ["تأشيرة الإقامة الذهبية", "رخصة قيادة", "تأشيرة إقامة للأسرة"]
-        }[lang]
         self.sample_q_locators = [
             page.locator(self.SAMPLE_Q_PATTERN.format(q))
-            for q in sample_texts
+            for q in self.SAMPLE_QUESTIONS[lang]
         ]
 
+        if ANSWER_SOURCE == "network":
+            self.enable_network_capture()
+
         self.logger.debug(f"Initialized ChatbotPage (lang={lang})")
 
+    @property
+    def input_profile(self) -> str:
+        # Resolved per call so pooled pages follow the current test's marker
+        return self._input_profile or self.default_input_profile
+
+    def _first_locator(self, target):
+        return (target if isinstance(target, Locator) else self.page.locator(target)).first
+
     def _wait_visible(self, target, name: str = None, timeout: int = SHORT_TIMEOUT) -> bool:
         """
         Wait up to `timeout` ms for either:
@@ -96,31 +185,169 @@ class ChatbotPage:
     # ——— Page actions —————————————————————————————————————————————
 
     def open(self, url: str):
+        self.start_open(url)
+        self.finish_open()
+
+    def start_open(self, url: str):
+        """
+        Navigate only until the response commits; the browser keeps loading
+        the page while the caller moves on (see finish_open).
+        """
         self.logger.debug(f"Navigating to {url}")
-        self.page.goto(url, timeout=DEFAULT_TIMEOUT)
-        self.page.wait_for_load_state("networkidle", timeout=DEFAULT_TIMEOUT)
+        with TIMEOUTS.waiting("navigation", self.lang) as timeout:
+            self.page.goto(url, timeout=timeout, wait_until="commit")
+
+    def finish_open(self):
+        with SPANS.span("networkidle", "wait", lang=self.lang), \
+                TIMEOUTS.waiting("page_load", self.lang) as timeout:
+            self.page.wait_for_load_state("networkidle", timeout=timeout)
         self.logger.debug("Page loaded (network idle)")
+        if RECORDER.recording:
+            RECORDER.record("page_load_ms", self.page.evaluate(PAGE_LOAD_JS))
+
+    def reset_conversation(self):
+        """
+        Start an empty conversation in place: use the page's "new chat"
+        control when it has one, and only reload (assets cached) if the
+        history is still there afterwards.
+        """
+        history = self.page.locator(f"{self.sel['user_msgs']}, {self.sel['bot_msgs']}")
+        new_chat = self.page.locator(self.sel["new_chat"]).first
+        if history.count() and new_chat.is_visible():
+            new_chat.click()
+        try:
+            history.first.wait_for(state="detached", timeout=1000)
+        except PlaywrightTO:
+            self.logger.debug("No in-place reset available, reloading")
+            with TIMEOUTS.waiting("page_load", self.lang) as timeout:
+                self.page.reload(wait_until="networkidle", timeout=timeout)
+            self.accept_cookies()
+        self.last_metrics = None
+        self.forget_messages()
+        if self.capture:
+            self.capture.clear()
+        self.logger.debug("Conversation reset")
 
     def accept_cookies(self):
+        """
+        Click the cookie banner if it shows up within the time it usually
+        takes (learned, 100 ms without history). A banner that comes later
+        is still clicked away, before the page's next action, by a locator
+        handler; when it appeared (timed in the page) is learned too, so the
+        deadline can grow past the first observed times.
+        """
         sel = self.sel["accept_btn"]
         self.logger.debug("Attempting to accept cookies")
-        if self._wait_visible(sel, "Accept cookies", 100):
+        started = time.perf_counter()
+        if self._wait_visible(sel, "Accept cookies", TIMEOUTS.deadline("cookie_banner", self.lang)):
+            TIMEOUTS.observe("cookie_banner", self.lang, (time.perf_counter() - started) * 1000)
             self.page.click(sel)
+        elif not self._late_banner_armed:
+            self._late_banner_armed = True
+            armed_ms = (time.perf_counter() - started) * 1000
+            self.page.evaluate(BANNER_WATCH_JS, self.text["accept"])
+
+            def late_banner():
+                self._late_banner_armed = False
+                seen = self.page.evaluate(BANNER_SEEN_JS)
+                if seen is not None:
+                    TIMEOUTS.observe("cookie_banner", self.lang, armed_ms + seen)
+                self.logger.debug("Accepting a late cookie banner")
+                self.page.click(sel)
 
-    def send_message(self, msg: str = None):
+            self.page.add_locator_handler(self.page.locator(sel), late_banner, times=1)
+
+    def send_message(self, msg: str = None, profile: str = None):
         text = msg or self.text["default_q"]
-        self.logger.debug(f"Sending message: {text!r}")
+        profile = profile or self.input_profile
+        if profile not in INPUT_PROFILES:
+            raise ValueError(f"Unknown input profile {profile!r}; expected one of {INPUT_PROFILES}")
+        self.logger.debug(f"Sending message ({profile}): {text!r}")
         self.page.click(self.sel["input"])
-        for ch in text:
-            time.sleep(random.uniform(0.08, 0.15))
-            self.page.keyboard.type(ch)
-        time.sleep(random.uniform(0.5, 1.2))
+
+        if profile == "fill":
+            self.page.fill(self.sel["input"], text)
+        elif profile == "insert":
+            self.page.keyboard.insert_text(text)
+        elif profile == "paste":
+            self.page.evaluate(PASTE_JS, [self.sel["input"], text])
+        else:
+            for ch in text:
+                time.sleep(random.uniform(0.08, 0.15) / TYPING_SPEED)
+                self.page.keyboard.type(ch)
+            time.sleep(random.uniform(0.5, 1.2) / TYPING_SPEED)
+
+        self.arm_response_watch()
+        if self.capture:
+            self.capture.mark()
         self.page.keyboard.press("Enter")
 
-    def wait_for_response(self, timeout: int = DEFAULT_TIMEOUT):
-        sel = self.sel["bot_msgs"]
+    def enable_network_capture(self) -> ChatCapture:
+        """
+        Put answers together from the chat API traffic of this page from now
+        on (see utils.chat_capture); `get_last_bot_message` then prefers them.
+        """
+        if self.capture is None:
+            self.capture = ChatCapture(self.page).attach()
+        return self.capture
+
+    def wait_for_network_answer(self, timeout: int = None) -> CapturedAnswer:
+        """
+        The answer to the last prompt as captured on the wire: exact text,
+        per-chunk timestamps and transport metadata. Waits up to `timeout`
+        ms (default: the learned "answer" deadline).
+        """
+        capture = self.enable_network_capture()
+        answer = capture.wait_for_answer(TIMEOUTS.deadline("answer", self.lang, timeout))
+        self.logger.debug(
+            f"Network answer via {answer.transport}: {len(answer.chunks)} chunk(s), "
+            f"ttft={answer.ttft_ms}ms total={answer.total_ms}ms"
+        )
+        return answer
+
+    def arm_response_watch(self, rewind: int = 0):
+        """
+        Start watching for the next bot bubble; TTFT is measured from here.
+        `rewind=1` treats the newest existing bubble as the one streaming.
+        """
+        self.page.evaluate(ARM_STREAM_JS, [self.sel["bot_msgs"], rewind])
+
+    def wait_for_response(self, timeout: int = None,
+                          settle_ms: int = STREAM_SETTLE_MS,
+                          stream_timeout: int = None) -> ResponseMetrics:
+        """
+        Wait up to `timeout` ms for the first streamed text of the answer,
+        then up to `stream_timeout` ms for it to stop changing for `settle_ms`.
+        Both default to the deadlines learned for this language and case
+        (see utils.timeouts). Returns the final text with TTFT / total
+        latency / throughput; with network capture on, the text is the one
+        received on the wire.
+        """
         self.logger.debug("Waiting for AI response text")
-        self.page.wait_for_selector(sel, timeout=timeout)
+        if not self.page.evaluate("() => !!window.__uaskStream"):
+            self.arm_response_watch(rewind=1)
+
+        with TIMEOUTS.waiting("first_token", self.lang, timeout) as ms:
+            self.page.wait_for_function(STREAM_STARTED_JS, timeout=ms, polling=100)
+        with TIMEOUTS.waiting("answer", self.lang, stream_timeout) as ms:
+            self.page.wait_for_function(
+                STREAM_SETTLED_JS, arg=settle_ms, timeout=ms, polling=100
+            )
+        metrics = ResponseMetrics.from_stream(self.page.evaluate(STREAM_RESULT_JS))
+        if self.capture:
+            # The DOM has settled, so the wire answer is complete or close to it
+            try:
+                metrics.text = self.capture.wait_for_answer(SHORT_TIMEOUT).text.strip()
+            except TimeoutError:
+                self.logger.warning("No network answer captured, keeping the rendered text")
+        self.last_metrics = metrics
+        RECORDER.record("ttft_ms", metrics.ttft_ms)
+        RECORDER.record("response_ms", metrics.total_ms)
+        self.logger.debug(
+            f"Response complete: ttft={metrics.ttft_ms}ms total={metrics.total_ms}ms "
+            f"({metrics.chars_per_sec} chars/s, {len(metrics.text)} chars)"
+        )
+        return metrics
 
     # ——— Verifications & data getters —————————————————————————————————
 
@@ -138,23 +365,95 @@ class ChatbotPage:
             (self.sel["combo"],   "Language combobox"),
             (self.sel["terms"],   "Terms link"),
         ]
-        for idx, locator in enumerate(self.sample_q_locators, start=1):
-            checks.append((locator, f"Sample question #{idx}"))
+        for idx, q in enumerate(self.SAMPLE_QUESTIONS[self.lang], start=1):
+            checks.append((self.SAMPLE_Q_PATTERN.format(q), f"Sample question #{idx}"))
 
-        all_ok = True
-        for target, name in checks:
-            all_ok &= self._wait_visible(target, name)
+        report = self.check_visibility(checks)
+        self.last_visibility_report = report
+        all_ok = all(state == "visible" for state in report.values())
 
         self.logger.debug(f"verify_main_elements_loaded → {all_ok}")
         return all_ok
 
+    def check_visibility(self, checks: list, timeout: int = None,
+                         poll_ms: int = 100) -> dict:
+        """
+        Wait for all `(target, name)` checks together under one `timeout`
+        deadline (instead of one timeout each; default: the learned
+        "visibility" deadline) and report every element as "visible",
+        "hidden" (attached but not visible) or "missing".
+
+        Each poll checks every pending selector the page can resolve itself
+        in a single `evaluate` (see pages._chat_js.dom_query); only Locator
+        objects and selectors that need Playwright's engines are asked one
+        by one.
+        """
+        check = VisibilityCheck(checks, self._first_locator)
+        timeout = TIMEOUTS.deadline("visibility", self.lang, timeout)
+        started = time.monotonic()
+        deadline = started + timeout / 1000
+
+        while check.pending:
+            names = check.in_page()
+            if names:
+                check.take(names, self.page.evaluate(VISIBILITY_JS, check.args(names)))
+            for name in check.by_locator():
+                if check.locators[name].is_visible():
+                    check.report[name] = "visible"
+            for name in check.settle():
+                self.logger.debug(f"[OK] Visible: {name}")
+            if not check.pending or time.monotonic() >= deadline:
+                break
+            time.sleep(poll_ms / 1000)
+
+        if not check.pending:
+            TIMEOUTS.observe("visibility", self.lang, (time.monotonic() - started) * 1000)
+        for name in check.pending:
+            if name in check.locators:
+                check.report[name] = "hidden" if check.locators[name].count() else "missing"
+            self.logger.warning(f"[FAIL] {check.report[name].title()} after {timeout}ms: {name}")
+        return check.report
+
+    def new_messages(self) -> list[ChatMessage]:
+        """
+        User and bot messages added since the previous call (all of them on
+        the first), also appended to `history`.
+        """
+        res = self.page.evaluate(TRACK_MESSAGES_JS, [
+            f"{self.sel['user_conts']}, {self.sel['bot_conts']}",
+            self.sel["user_conts"], self.sel["msg_text"], self.sel["msg_time"],
+        ])
+        if res["fresh"] and self.history:
+            # The page was reloaded behind our back; the DOM is re-read from the start
+            self.history = []
+        new = [ChatMessage(**item) for item in res["items"]]
+        self.history.extend(new)
+        if new:
+            self.logger.debug(f"{len(new)} new message(s), {len(self.history)} in total")
+        return new
+
+    def forget_messages(self):
+        """
+        Drop the tracked history (the conversation was reset or reloaded).
+        """
+        self.page.evaluate(TRACK_RESET_JS)
+        self.history = []
+
+    def messages(self, role: str = None) -> list[ChatMessage]:
+        self.new_messages()
+        return [m for m in self.history if role is None or m.role == role]
+
     def get_all_bot_messages(self) -> list[str]:
-        texts = self.page.locator(self.sel["bot_msgs"]).all_text_contents()
-        clean = [t.strip() for t in texts if t.strip()]
-        self.logger.debug(f"All bot messages: {clean}")
+        clean = [m.text for m in self.messages("bot") if m.text]
+        self.logger.debug(f"All bot messages: {len(clean)}")
         return clean
 
     def get_last_bot_message(self) -> str:
+        captured = self.capture.last_answer() if self.capture else None
+        if captured:
+            last = captured.text.strip()
+            self.logger.debug(f"Last bot message (network): {last!r}")
+            return last
         msgs = self.get_all_bot_messages()
         last = msgs[-1] if msgs else ""
         self.logger.debug(f"Last bot message: {last!r}")
@@ -192,7 +491,20 @@ class ChatbotPage:
         return ts
 
     def get_user_messages(self) -> list[str]:
-        texts = self.page.locator(self.sel["user_msgs"]).all_text_contents()
-        clean = [t.strip() for t in texts if t.strip()]
-        self.logger.debug(f"User messages: {clean}")
+        clean = [m.text for m in self.messages("user") if m.text]
+        self.logger.debug(f"User messages: {len(clean)}")
         return clean
+
+
+def ask_concurrently(exchanges: list) -> list:
+    """
+    Send every (bot, prompt) first, then collect the answers in the same
+    order. Each bot's stream watcher timestamps its own answer in the page,
+    so waiting for one after the other does not skew the metrics, and the
+    wall time is close to the slowest answer instead of the sum. Humanized
+    bots insert their prompt in one go here: typing it would hold back
+    the next bot's send until the last key.
+    """
+    for bot, prompt in exchanges:
+        bot.send_message(prompt, profile="insert" if bot.input_profile == "humanized" else None)
+    return [bot.wait_for_response() for bot, _ in exchanges]
@@ -1,9 +1,301 @@
+import json
 import os
+import re
 import pytest
 import allure
 from playwright.sync_api import sync_playwright
-from config.config import HEADLESS, TRACE_RESULTS_DIR, STORAGE_STATE_PATH
-from utils.logger import LOG_STREAM
+from config.config import (
+    LANG,
+    LANGS,
+    DEVICES,
+    DEVICE_PROFILES,
+    BASE_URLS,
+    HEADLESS,
+    TRACE_RESULTS_DIR,
+    TRACE_MODE,
+    TRACE_SCREENSHOTS,
+    TRACE_SNAPSHOTS,
+    TRACE_SOURCES,
+    TRAFFIC_MODE,
+    TRAFFIC_ARCHIVE_DIR,
+    WORKER_ID,
+    SESSION_CHECK,
+    BENCH_BASELINE_PATH,
+    BENCH_REPORT_PATH,
+    BLOCK_PROFILE,
+    BLOCK_PROFILES,
+    RESULTS_RECORD,
+    RESULTS_SKIP_MAX_AGE_H,
+    TIMELINE_PATH,
+    ADAPTIVE_TIMEOUTS,
+)
+from pages.async_chatbot_page import AsyncChatbotPage
+from pages.chatbot_page import ChatbotPage
+from utils.benchmark import (
+    RECORDER,
+    case_key,
+    compare,
+    environment,
+    format_comparison,
+    load_baseline,
+    save_baseline,
+)
+from utils.browser_pool import ContextPool, artifact_name
+from utils.corpus import ResponseCorpus
+from utils.data_loader import select
+from utils.logger import CAPTURE
+from utils.page_pool import ContextMatrix
+from utils.results_db import ResultsDB, code_sha1, flaky_first, longest_first, target_build
+from utils.resource_blocking import REPORT as BLOCK_REPORT, SIZES as RESOURCE_SIZES
+from utils.screenshots import WRITER, attach_page_screenshot
+from utils.session import SessionError, ensure_session
+from utils.timeline import SPANS
+from utils.timeouts import TIMEOUTS, budget_for
+from utils.traffic import TrafficArchive
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "latency benchmarks")
+    group.addoption("--bench-rounds", type=int, default=0,
+                    help="Run every chatbot test N times and compare timings with the baseline")
+    group.addoption("--bench-save", action="store_true",
+                    help="Store this run's timings as the new baseline instead of comparing")
+    group.addoption("--bench-baseline", default=BENCH_BASELINE_PATH,
+                    help="Baseline file (default: %(default)s)")
+
+    group = parser.getgroup("cases", "data-driven case selection (glob patterns, repeatable)")
+    group.addoption("--case-id", action="append", default=[], help="e.g. golden_visa_*")
+    group.addoption("--case-category", action="append", default=[], help="e.g. public_service")
+    group.addoption("--case-intent", action="append", default=[], help="e.g. '*visa*'")
+
+    group = parser.getgroup("history", "scheduling from recorded results (see utils.results_db)")
+    group.addoption("--longest-first", action="store_true",
+                    help="Run the tests that took longest in recent runs first")
+    group.addoption("--fail-fast", action="store_true",
+                    help="Run recently failing (flaky) tests first and stop at the first failure")
+    group.addoption("--skip-unchanged", action="store_true",
+                    help="Skip tests whose data, code and target build are unchanged since a recent pass")
+    group.addoption("--worker-shard", default=None, metavar="FILE",
+                    help="Run only the node ids listed in FILE, in that order (set by utils.parallel)")
+
+    group = parser.getgroup("matrix", "language × device matrix (repeatable)")
+    group.addoption("--lang", action="append", default=[], choices=tuple(BASE_URLS),
+                    help=f"Languages for tests taking `lang` (default: {','.join(LANGS)})")
+    group.addoption("--device", action="append", default=[], choices=tuple(DEVICE_PROFILES),
+                    help=f"Devices for tests taking `device` (default: {','.join(DEVICES)})")
+
+    parser.addoption("--block-profile", default=BLOCK_PROFILE or None, choices=BLOCK_PROFILES,
+                     help="Resource-blocking profile for every context, overriding the "
+                          "modules' block_profile markers")
+
+
+def pytest_generate_tests(metafunc):
+    # @pytest.mark.cases("ai"): one `case` per selected data case. Only the
+    # cached index is read here; each test loads its own case (see `case`).
+    marker = metafunc.definition.get_closest_marker("cases")
+    if marker and "case" in metafunc.fixturenames:
+        opt = metafunc.config.getoption
+        refs = select(marker.args[0], ids=opt("case_id"), categories=opt("case_category"),
+                      intents=opt("case_intent"))
+        metafunc.parametrize("case", refs, ids=[ref.id for ref in refs], indirect=True)
+
+    # The language × device matrix: one run per selected language / device
+    # for every test that takes `lang` / `device`
+    if "lang" in metafunc.fixturenames:
+        metafunc.parametrize("lang", metafunc.config.getoption("lang") or LANGS, indirect=True)
+    if "device" in metafunc.fixturenames:
+        metafunc.parametrize("device", metafunc.config.getoption("device") or DEVICES, indirect=True)
+
+    # Benchmark runs repeat every chatbot test; rounds of a case share one key
+    rounds = metafunc.config.getoption("bench_rounds")
+    if rounds > 0 and "chatbot" in metafunc.fixturenames:
+        metafunc.fixturenames.append("bench_round")
+        metafunc.parametrize("bench_round", range(rounds), ids=lambda r: f"round{r}")
+
+
+def _results_db(config):
+    db = getattr(config, "_results_db", None)
+    if db is None:
+        db = config._results_db = ResultsDB()
+    return db
+
+
+def _result_key(item) -> tuple:
+    """
+    (case sha1, code sha1, build) the item's result is recorded under.
+    """
+    params = getattr(item, "callspec", None)
+    ref = params.params.get("case") if params else None
+    return getattr(ref, "sha1", ""), code_sha1(str(item.path)), target_build()
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    opt = config.getoption
+    if opt("worker_shard"):
+        with open(opt("worker_shard"), encoding="utf-8") as f:
+            rank = {nodeid: i for i, nodeid in enumerate(f.read().splitlines())}
+        config.hook.pytest_deselected(items=[item for item in items if item.nodeid not in rank])
+        items[:] = sorted((item for item in items if item.nodeid in rank), key=lambda i: rank[i.nodeid])
+    config._result_keys = {item.nodeid: _result_key(item) for item in items}
+    if not (opt("longest_first") or opt("fail_fast") or opt("skip_unchanged")):
+        return
+
+    db = _results_db(config)
+    by_id = {item.nodeid: item for item in items}
+    order = list(by_id)
+    if opt("longest_first"):
+        order = longest_first(order, db.expected_durations())
+    if opt("fail_fast"):
+        # Stable sort: longest-first still applies among equally flaky tests
+        order = flaky_first(order, db.flakiness())
+        config.option.maxfail = 1
+    items[:] = [by_id[n] for n in order]
+
+    if opt("skip_unchanged"):
+        max_age = RESULTS_SKIP_MAX_AGE_H * 3600
+        skip = pytest.mark.skip(reason="unchanged since a recent pass (--skip-unchanged)")
+        for item in items:
+            if db.passed_unchanged(item.nodeid, *config._result_keys[item.nodeid], max_age):
+                item.add_marker(skip)
+
+
+def _record_result(item, report):
+    """
+    Sum the test's phases and record its outcome once teardown is done.
+    Only browser tests are recorded: unit tests would only dilute the
+    history that scheduling and test budgets are computed from.
+    """
+    keys = getattr(item.config, "_result_keys", {}).get(item.nodeid)
+    if not RESULTS_RECORD or keys is None or "chatbot" not in item.fixturenames:
+        return
+    duration, outcome = getattr(item, "_result", (0.0, "passed"))
+    duration += report.duration
+    if report.failed:
+        outcome = "failed"
+    elif report.skipped and outcome == "passed":
+        outcome = "skipped"
+    item._result = (duration, outcome)
+    if report.when == "teardown":
+        _results_db(item.config).record(item.nodeid, outcome, duration, *keys)
+
+
+def _test_budgets(config) -> dict:
+    """
+    Time budget (s) per node id from its recent passes (see utils.timeouts).
+    """
+    budgets = getattr(config, "_test_budgets", None)
+    if budgets is None:
+        budgets = config._test_budgets = {
+            nodeid: budget_for([d for outcome, d in results if outcome == "passed"])
+            for nodeid, results in _results_db(config).history().items()
+        }
+    return budgets
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """
+    While a browser test runs, its waits learn their latencies (per data
+    case where relevant) and are capped by the test's time budget.
+    """
+    if "chatbot" not in item.fixturenames:
+        yield
+        return
+    params = getattr(item, "callspec", None)
+    ref = params.params.get("case") if params else None
+    budget = _test_budgets(item.config).get(item.nodeid) if ADAPTIVE_TIMEOUTS else None
+    TIMEOUTS.begin_test(getattr(ref, "id", ""), budget or budget_for([]))
+    yield
+    TIMEOUTS.end_test()
+
+
+def pytest_sessionstart(session):
+    # A new recording replaces the previous one instead of appending to it
+    # (the parallel runner resets it once, before starting its workers)
+    if TRAFFIC_MODE == "record" and WORKER_ID == "main":
+        TrafficArchive(TRAFFIC_ARCHIVE_DIR).reset()
+    if ADAPTIVE_TIMEOUTS:
+        TIMEOUTS.load(_results_db(session.config))
+
+
+def pytest_sessionfinish(session):
+    # Screenshots are written in the background; make sure all are on disk
+    WRITER.flush()
+    RESOURCE_SIZES.save()
+    if SPANS.spans:
+        SPANS.save(artifact_name(TIMELINE_PATH))
+    db = getattr(session.config, "_results_db", None)
+    if db is not None:
+        if RESULTS_RECORD:
+            TIMEOUTS.flush(db)
+        db.close()
+    rounds = session.config.getoption("bench_rounds")
+    if rounds > 0:
+        _finish_benchmark(session, rounds)
+
+
+def _finish_benchmark(session, rounds: int):
+    """
+    Save the timings as the baseline (--bench-save, only from a green run)
+    or compare them with it; a significant slowdown fails the session.
+    """
+    config = session.config
+    path = config.getoption("bench_baseline")
+    cases = RECORDER.as_dict()
+    env = environment(config.getoption("lang") or LANGS, config.getoption("device") or DEVICES)
+    if config.getoption("bench_save"):
+        if session.testsfailed:
+            config._bench_summary = "Baseline NOT saved: the run had failures."
+        else:
+            save_baseline(cases, rounds, path, env)
+            config._bench_summary = f"Baseline saved to {path} ({len(cases)} case(s), {rounds} round(s))"
+        return
+
+    baseline = load_baseline(path)
+    if baseline is None:
+        config._bench_summary = f"No baseline at {path}; create one with --bench-save."
+        return
+    rows = compare(baseline["cases"], cases)
+    os.makedirs(os.path.dirname(BENCH_REPORT_PATH) or ".", exist_ok=True)
+    with open(BENCH_REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump({"baseline": path, "baseline_rev": baseline["git_rev"], "rows": rows},
+                  f, ensure_ascii=False, indent=2)
+    summary = format_comparison(rows)
+    if baseline["env"] != env:
+        summary = f"WARNING: baseline was recorded with {baseline['env']}\n{summary}"
+    config._bench_summary = summary
+    if any(r["verdict"] == "regression" for r in rows):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    blocked = BLOCK_REPORT.format()
+    if blocked:
+        terminalreporter.section("blocked resources")
+        for line in blocked.splitlines():
+            terminalreporter.write_line(line)
+    slowest = SPANS.format_slowest()
+    if slowest:
+        terminalreporter.section("slowest operations")
+        for line in slowest.splitlines():
+            terminalreporter.write_line(line)
+    summary = getattr(config, "_bench_summary", None)
+    if summary:
+        terminalreporter.section("latency benchmark")
+        for line in summary.splitlines():
+            terminalreporter.write_line(line)
+
+
+def _failed(item) -> bool:
+    """
+    True if the test's setup or call phase failed (reports are stored on the
+    item by pytest_runtest_makereport).
+    """
+    return any(
+        getattr(item, f"rep_{when}", None) is not None and getattr(item, f"rep_{when}").failed
+        for when in ("setup", "call")
+    )
 
 
 @pytest.fixture(scope="session")
@@ -24,43 +316,215 @@ def browser():
     pw.stop()
 
 
+@pytest.fixture(scope="session")
+def context_pool(browser):
+    """
+    This worker's pool of contexts sharing the saved CAPTCHA session.
+    The session is validated first, so an expired one stops the run at once.
+    """
+    if SESSION_CHECK and TRAFFIC_MODE != "replay":
+        try:
+            ensure_session(browser_type=browser.browser_type)
+        except SessionError as exc:
+            pytest.exit(str(exc), returncode=3)
+    pool = ContextPool(browser)
+    yield pool
+    pool.close()
+
+
 @pytest.fixture(scope="module")
-def context(browser, request):
+def block_profile(request) -> str:
+    """
+    Which requests the module's contexts let through: --block-profile /
+    BLOCK_PROFILE, else the module's block_profile marker, else "full".
     """
-    Create a fresh context per test (with a single window),
-    reusing storageState for CAPTCHA bypass, stubbing grecaptcha,
-    and starting Playwright tracing.
+    marker = request.node.get_closest_marker("block_profile")
+    return request.config.getoption("block_profile") or (marker.args[0] if marker else "full")
+
+
+@pytest.fixture(scope="session")
+def matrix(context_pool):
+    """
+    One context per (block profile, lang, device), created the first time
+    a test needs it and reused by every later test of that cell. Tracing
+    runs on each for the whole session; tests record their own chunks
+    (see `chatbot`).
     """
-    if not os.path.exists(STORAGE_STATE_PATH):
-        raise RuntimeError(
-            "Missing session storage. Run `python utils/setup_session.py` first."
+    def start_tracing(ctx):
+        ctx.tracing.start(
+            screenshots=TRACE_SCREENSHOTS,
+            snapshots=TRACE_SNAPSHOTS,
+            sources=TRACE_SOURCES,
         )
 
-    ctx = browser.new_context(
-        storage_state=STORAGE_STATE_PATH,
-        viewport={"width": 1280, "height": 800},
-        locale="en-US",
-        timezone_id="Asia/Dubai",
-    )
+    if TRACE_MODE != "off":
+        cells = ContextMatrix(context_pool, on_open=start_tracing,
+                              on_close=lambda ctx: ctx.tracing.stop())
+    else:
+        cells = ContextMatrix(context_pool)
+    yield cells
+    cells.close()
 
-    # Stub out Recaptcha so it never appears
-    ctx.add_init_script(
-        """
-        window.grecaptcha = {
-          ready: (cb) => cb(),
-          execute: () => Promise.resolve('TEST_TOKEN')
-        };
-        """
-    )
 
-    # Start capturing traces (screenshots, snapshots, sources)
-    ctx.tracing.start(screenshots=True, snapshots=True, sources=True)
-    yield ctx
+@pytest.fixture
+def lang(request) -> str:
+    """
+    The test's language, parametrized over --lang / LANGS.
+    """
+    return getattr(request, "param", LANG)
+
+
+@pytest.fixture(scope="session")
+def matrix_langs(pytestconfig) -> list:
+    """
+    Every language this run covers (--lang / LANGS).
+    """
+    return pytestconfig.getoption("lang") or LANGS
+
+
+@pytest.fixture
+def device(request) -> str:
+    """
+    The test's device, parametrized over --device / DEVICES.
+    """
+    return getattr(request, "param", "Desktop")
+
+
+def _trace_name(item, cell: tuple, several: bool) -> str:
+    name = re.sub(r"[^\w.\-\[\]]+", "_", item.name)
+    if several:
+        name += "-" + "-".join(cell)
+    return artifact_name(f"{name}.zip")
+
+
+@pytest.fixture
+def chatbot(matrix, block_profile, request):
+    """
+    Factory for ready-to-use chatbot pages:
+
+        bot = chatbot(lang="ar", device="Mobile")
+
+    Language and device default to the test's `lang` / `device` (or LANG
+    and Desktop). The page comes from the context of that cell of the
+    matrix, already open with cookies accepted and an empty conversation.
+    After the test it goes back to the pool (reset in place), or is
+    discarded if the test failed.
+
+    Each context the test used records a trace chunk; depending on
+    TRACE_MODE it is saved always or only when the test failed, passing
+    chunks are discarded without ever writing a zip.
+    """
+    taken, traced = [], {}
+    request.node._chatbots = taken
+    default_lang = request.getfixturevalue("lang") if "lang" in request.fixturenames else LANG
+    default_device = (request.getfixturevalue("device") if "device" in request.fixturenames
+                      else "Desktop")
+
+    def acquire(lang: str = None, device: str = None) -> ChatbotPage:
+        cell = (lang or default_lang, device or default_device)
+        ctx, pages = matrix.get(block_profile, *cell)
+        if TRACE_MODE != "off" and cell not in traced:
+            ctx.tracing.start_chunk(title=request.node.nodeid)
+            traced[cell] = ctx
+        bot = pages.acquire(*cell)
+        taken.append((pages, bot))
+        return bot
+
+    yield acquire
+    # Benchmark rounds always get freshly loaded pages, so page load is measured
+    reuse = not _failed(request.node) and not request.config.getoption("bench_rounds")
+    for pages, bot in taken:
+        pages.release(bot, reuse=reuse)
+
+    keep = TRACE_MODE == "on" or _failed(request.node)
+    for cell, ctx in traced.items():
+        if keep:
+            name = _trace_name(request.node, cell, several=len(traced) > 1)
+            ctx.tracing.stop_chunk(path=os.path.join(TRACE_RESULTS_DIR, name))
+        else:
+            ctx.tracing.stop_chunk()
+
+
+@pytest.fixture
+def case(request) -> dict:
+    """
+    The data case of this parametrized test, read from its file on demand.
+    """
+    return request.param.load()
+
+
+@pytest.fixture(scope="session")
+def response_corpus():
+    """
+    Where tests append every reply they validate (see utils.corpus).
+    """
+    return ResponseCorpus()
+
+
+@pytest.fixture
+def bench_round(request):
+    return request.param
+
+
+@pytest.fixture(autouse=True)
+def bench_case(request):
+    """
+    Attribute timings recorded during a benchmark round (page load, answer
+    latency, steps) to the test case.
+    """
+    if "bench_round" not in request.fixturenames:
+        yield
+        return
+    RECORDER.begin(case_key(request.node.nodeid))
+    yield
+    RECORDER.end()
 
-    # Stop tracing to a zip file
-    trace_path = os.path.join(TRACE_RESULTS_DIR, f"{request.node.name}.zip")
-    ctx.tracing.stop(path=trace_path)
-    ctx.close()
+
+@pytest.fixture(autouse=True)
+def log_capture(request):
+    """
+    Capture this test's log records (from its own thread only) into a
+    bounded buffer; attached to Allure by pytest_runtest_makereport.
+    """
+    capture = CAPTURE.start(request.node.nodeid)
+    request.node._log_capture = capture
+    yield capture
+    CAPTURE.stop(capture)
+
+
+@pytest.fixture(autouse=True)
+def timeline_test(request):
+    """
+    Tag the timeline spans recorded during this test with its id, lang and
+    device, and time the test itself (fixture set-up included). Only browser
+    tests are kept: spans of unit tests (fake pages) are dropped, so runs
+    without a browser write no timeline and print no slowest operations.
+    """
+    if "chatbot" not in request.fixturenames:
+        recorded = len(SPANS.spans)
+        yield
+        del SPANS.spans[recorded:]
+        return
+    params = getattr(request.node, "callspec", None)
+    params = params.params if params else {}
+    SPANS.begin_test(request.node.nodeid, lang=params.get("lang", LANG),
+                     device=params.get("device", "Desktop"))
+    with SPANS.span(request.node.name, "test"):
+        yield
+    SPANS.end_test()
+
+
+@pytest.fixture(autouse=True)
+def input_profile(request, monkeypatch):
+    """
+    Apply @pytest.mark.input_profile("fill" | "insert" | "paste" | "humanized")
+    to every chatbot page the test creates; unmarked tests use INPUT_PROFILE.
+    """
+    marker = request.node.get_closest_marker("input_profile")
+    if marker:
+        monkeypatch.setattr(ChatbotPage, "default_input_profile", marker.args[0])
+        monkeypatch.setattr(AsyncChatbotPage, "default_input_profile", marker.args[0])
+    return ChatbotPage.default_input_profile
 
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -74,29 +538,37 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     report = outcome.get_result()
 
+    # Expose each phase's report to fixtures (e.g. trace retention)
+    setattr(item, f"rep_{report.when}", report)
+    _record_result(item, report)
+
     # Only in the actual test call phase
     if report.when != "call":
         return
 
-    # Attach captured logs
-    LOG_STREAM.seek(0)
-    log_contents = LOG_STREAM.read()
+    # Attach this test's captured logs (and whatever spilled to disk)
+    capture = getattr(item, "_log_capture", None)
+    log_contents = capture.getvalue() if capture else ""
     if log_contents:
         allure.attach(
             log_contents,
             name=f"{item.name} — logs",
             attachment_type=allure.attachment_type.TEXT,
         )
-    LOG_STREAM.truncate(0)
-    LOG_STREAM.seek(0)
+    if capture and capture.spill_path:
+        allure.attach.file(
+            capture.spill_path,
+            name=f"{item.name} — earlier logs",
+            attachment_type=allure.attachment_type.TEXT,
+        )
 
-    # If the test failed, attach a full-page screenshot
+    # If the test failed, attach a screenshot of each of its pages
+    # (unless the policy is "off")
     if report.failed:
-        page = item.funcargs.get("page")
-        if page:
-            png = page.screenshot(full_page=True)
-            allure.attach(
-                png,
-                name=f"{item.name} — failure screenshot",
-                attachment_type=allure.attachment_type.PNG,
-            )
+        pages = [bot.page for _, bot in getattr(item, "_chatbots", [])]
+        if item.funcargs.get("page"):
+            pages.append(item.funcargs["page"])
+        for idx, page in enumerate(pages, start=1):
+            if not page.is_closed():
+                suffix = f" #{idx}" if len(pages) > 1 else ""
+                attach_page_screenshot(page, f"{item.name} — failure screenshot{suffix}", failed=True)
@@ -0,0 +1,20 @@
+import os
+import pytest
+
+
+def _chromium_installed() -> bool:
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as pw:
+            return os.path.exists(pw.chromium.executable_path)
+    except Exception:
+        return False
+
+
+@pytest.fixture(scope="session")
+def require_chromium():
+    """
+    Skip tests that drive a real browser where Chromium is not installed.
+    """
+    if not _chromium_installed():
+        pytest.skip("Chromium is not installed")
@@ -0,0 +1,195 @@
+import asyncio
+import pytest
+from config.config import INPUT_PROFILES, TIMEOUT_MIN_SAMPLES
+from pages import async_chatbot_page
+from pages.async_chatbot_page import AsyncChatbotPage
+from pages._chat_js import ARM_STREAM_JS, PASTE_JS, STREAM_RESULT_JS, VISIBILITY_JS
+from utils import async_runner
+from utils.async_runner import converse, run_conversations
+from utils.standin import StandInServer
+from utils.timeouts import TimeoutPolicy
+
+
+class FakeKeyboard:
+    def __init__(self, page):
+        self.page = page
+
+    async def insert_text(self, text):
+        self.page.value += text
+
+    async def type(self, text):
+        self.page.value += text
+
+    async def press(self, key):
+        self.page.sent.append(self.page.value)
+        self.page.value = ""
+
+
+class FakePage:
+    def __init__(self, fail_on=None, state=None):
+        self.value = ""
+        self.sent = []
+        self.fail_on = fail_on
+        self.state = state or {}
+        self.polls = 0
+        self.timeouts = {}
+        self.keyboard = FakeKeyboard(self)
+
+    def locator(self, selector):
+        return selector
+
+    async def goto(self, url, **kwargs):
+        if self.fail_on == "goto":
+            raise TimeoutError("page load")
+        self.url = url
+        self.timeouts["goto"] = kwargs["timeout"]
+
+    async def wait_for_load_state(self, *args, **kwargs):
+        self.timeouts["load"] = kwargs["timeout"]
+
+    async def wait_for_function(self, script, **kwargs):
+        self.timeouts.setdefault("functions", []).append(kwargs["timeout"])
+
+    async def click(self, selector):
+        pass
+
+    async def fill(self, selector, text):
+        self.value = text
+
+    async def evaluate(self, script, arg=None):
+        if script == PASTE_JS:
+            self.value += arg[1]
+        elif script == VISIBILITY_JS:
+            self.polls += 1
+            return [self.state.get(q["selector"], "missing") for q in arg]
+        elif script == STREAM_RESULT_JS:
+            return {"text": f"Answer to {self.sent[-1]}", "ttft": 120.0, "total": 800.0}
+        elif script != ARM_STREAM_JS:
+            return True
+
+
+class FakeContext:
+    def __init__(self, page):
+        self.page = page
+        self.closed = False
+
+    async def add_init_script(self, script):
+        pass
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.contexts = []
+
+    async def new_context(self, **kwargs):
+        self.contexts.append(FakeContext(FakePage(self.fail_on)))
+        return self.contexts[-1]
+
+
+@pytest.fixture(autouse=True)
+def no_cookie_banner(monkeypatch):
+    async def accept_cookies(self):
+        pass
+
+    monkeypatch.setattr(AsyncChatbotPage, "accept_cookies", accept_cookies)
+    monkeypatch.setattr("pages.async_chatbot_page.TYPING_SPEED", 1000)
+
+
+@pytest.mark.parametrize("profile", INPUT_PROFILES)
+def test_every_input_profile_sends_the_same_text(profile):
+    page = FakePage()
+    bot = AsyncChatbotPage(page, lang="ar")
+    asyncio.run(bot.send_message("ما هي التأشيرة الذهبية؟", profile=profile))
+    assert page.sent == ["ما هي التأشيرة الذهبية؟"]
+
+
+def test_unknown_input_profile_is_rejected():
+    bot = AsyncChatbotPage(FakePage())
+    with pytest.raises(ValueError, match="Unknown input profile 'voice'"):
+        asyncio.run(bot.send_message("hi", profile="voice"))
+
+
+def test_check_visibility_batches_each_poll_like_the_sync_page():
+    page = FakePage(state={"#a": "visible", "#b": "hidden"})
+    bot = AsyncChatbotPage(page, lang="en")
+    report = asyncio.run(bot.check_visibility(
+        [("#a", "A"), ("#b", "B"), ("#c", "C")], timeout=200, poll_ms=50
+    ))
+    assert report == {"A": "visible", "B": "hidden", "C": "missing"}
+    assert 3 <= page.polls <= 6
+
+
+def test_waits_use_the_learned_deadlines(monkeypatch):
+    policy = TimeoutPolicy(enabled=True)
+    policy.begin_test()
+    for op, ms in [("navigation", 400), ("page_load", 600), ("first_token", 900), ("answer", 3000)]:
+        for _ in range(TIMEOUT_MIN_SAMPLES):
+            policy.observe(op, "en", ms)
+    policy.end_test()
+    monkeypatch.setattr(async_chatbot_page, "TIMEOUTS", policy)
+    page = FakePage()
+    bot = AsyncChatbotPage(page, lang="en")
+
+    async def conversation():
+        await bot.open("http://standin/en/")
+        await bot.send_message("hi")
+        await bot.wait_for_response()
+
+    asyncio.run(conversation())
+    assert page.timeouts == {
+        "goto": policy.learned("navigation", "en"),
+        "load": policy.learned("page_load", "en"),
+        "functions": [policy.learned("first_token", "en"), policy.learned("answer", "en")],
+    }
+
+
+def test_converse_reports_the_answer_and_closes_its_context():
+    browser = FakeBrowser()
+    result = asyncio.run(converse(browser, "What is the golden visa?", "en", "http://standin/en/"))
+    assert result["ok"] and result["text"] == "Answer to What is the golden visa?"
+    assert result["ttft_ms"] == 120.0 and result["wall_ms"] >= 0
+    assert browser.contexts[0].page.url == "http://standin/en/"
+    assert browser.contexts[0].closed
+
+
+def test_converse_never_raises():
+    browser = FakeBrowser(fail_on="goto")
+    result = asyncio.run(converse(browser, "hi", "en", "http://standin/en/"))
+    assert not result["ok"] and "page load" in result["error"]
+    assert browser.contexts[0].closed
+
+
+def test_replay_and_blocking_settings_are_reported_as_ignored(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(async_runner, "TRAFFIC_MODE", "replay")
+    monkeypatch.setattr(async_runner.logger, "warning", warnings.append)
+
+    class Stop(Exception):
+        pass
+
+    def no_browser():
+        raise Stop
+
+    monkeypatch.setattr(async_runner, "async_playwright", no_browser)
+    with pytest.raises(Stop):
+        asyncio.run(run_conversations(["hi"], "en"))
+    assert len(warnings) == 1 and "--standin" in warnings[0]
+
+
+@pytest.mark.usefixtures("require_chromium")
+def test_offline_run_against_the_standin():
+    server = StandInServer(ttft_ms=0, chars_per_sec=0, error_rate=0, seed=1).start()
+    try:
+        prompts = ["What is the golden visa?", "How do I renew my Emirates ID?"]
+        results = asyncio.run(run_conversations(prompts, "en", 2, server.chat_url("en")))
+    finally:
+        server.stop()
+    assert [r["prompt"] for r in results] == prompts
+    assert all(r["ok"] and r["text"] for r in results), results
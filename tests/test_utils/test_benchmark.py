@@ -0,0 +1,72 @@
+import json
+import pytest
+from utils.benchmark import (
+    BenchmarkRecorder,
+    case_key,
+    compare,
+    environment,
+    load_baseline,
+    save_baseline,
+)
+from utils.stats import mann_whitney_greater
+
+BASE = [1000, 1010, 990, 1005, 995]
+
+
+def test_case_key_drops_the_round():
+    assert case_key("t.py::test_x[round2-golden]") == "t.py::test_x[golden]"
+    assert case_key("t.py::test_x[golden-round0]") == "t.py::test_x[golden]"
+    assert case_key("t.py::test_x[round1]") == "t.py::test_x"
+
+
+def test_mann_whitney_detects_shift_only():
+    assert mann_whitney_greater([1500, 1510, 1490, 1505, 1495], BASE) < 0.01
+    assert mann_whitney_greater(BASE, BASE) > 0.4
+    assert mann_whitney_greater([], BASE) == 1.0
+
+
+def test_compare_verdicts():
+    baseline = {"case": {"slow": BASE, "noisy": BASE, "fast": BASE, "few": BASE[:2]}}
+    current = {"case": {
+        "slow": [1500, 1510, 1490, 1505, 1495],
+        "noisy": [1040, 1000, 1060, 990, 1020],   # within thresholds
+        "fast": [500, 510, 490, 505, 495],
+        "few": [5000, 5000, 5000],
+        "added": [10, 20, 30],
+    }}
+    verdicts = {r["metric"]: r["verdict"] for r in compare(baseline, current)}
+    assert verdicts == {"slow": "regression", "noisy": "ok", "fast": "improvement",
+                        "few": "insufficient", "added": "new"}
+
+
+def test_recorder_only_records_inside_a_case():
+    rec = BenchmarkRecorder()
+    rec.record("ttft_ms", 5)
+    rec.begin("case")
+    rec.record("ttft_ms", 5.04)
+    rec.record("ttft_ms", None)
+    rec.end()
+    assert rec.as_dict() == {"case": {"ttft_ms": [5.0]}}
+
+
+def test_baseline_round_trip_and_format_check(tmp_path):
+    path = str(tmp_path / "bench" / "baseline.json")
+    assert load_baseline(path) is None
+    save_baseline({"case": {"ttft_ms": BASE}}, rounds=5, path=path)
+    assert load_baseline(path)["cases"] == {"case": {"ttft_ms": BASE}}
+
+    data = json.load(open(path, encoding="utf-8"))
+    data["format"] = 99
+    json.dump(data, open(path, "w", encoding="utf-8"))
+    with pytest.raises(ValueError):
+        load_baseline(path)
+
+
+def test_environment_names_the_matrix_cells_run(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    env = environment(["ar"], ["Mobile"])
+    assert env["langs"] == ["ar"] and env["devices"] == ["Mobile"]
+    assert list(env["base_urls"]) == ["ar"]
+    assert save_baseline({}, rounds=1, path=path, env=env)["env"] == env
+    assert load_baseline(path)["env"] != environment(["en", "ar"], ["Mobile"])
+    assert environment(["ar", "en"], ["Desktop"]) == environment(["en", "ar"], ["Desktop"])
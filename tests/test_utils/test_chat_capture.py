@@ -0,0 +1,123 @@
+import base64
+import json
+
+import pytest
+
+from utils.chat_capture import (
+    ChatCapture,
+    answer_from_body,
+    assemble,
+    extract_text,
+    split_events,
+)
+from utils.standin import sse_chunks
+
+ANSWER = "The golden visa is a long-term residence visa."
+
+
+def test_split_events_reads_standin_sse():
+    body = b"".join(sse_chunks(ANSWER, size=8))
+    events = split_events(body, "text/event-stream")
+    assert assemble(extract_text(p) for _, p in events) == ANSWER
+    # Offsets point just past each event
+    assert events[-1][0] == len(body) - len(b"data: [DONE]\n\n")
+
+
+def test_split_events_signalr_and_ndjson():
+    hub = b'{"type":1,"target":"Receive","arguments":["Hel"]}\x1e{"type":6}\x1e' \
+          b'{"type":1,"target":"Receive","arguments":["lo"]}\x1e'
+    assert [extract_text(p) for _, p in split_events(hub)] == ["Hel", None, "lo"]
+    nd = b'{"token": "a"}\n{"token": "b"}\n'
+    assert [p for _, p in split_events(nd, "application/x-ndjson")] == [{"token": "a"}, {"token": "b"}]
+
+
+def test_extract_text_finds_nested_keys():
+    assert extract_text({"choices": [{"delta": {"content": "hi"}}]}) == "hi"
+    assert extract_text({"type": 6}) is None
+    assert extract_text({"data": {"answer": "x"}}, keys=("answer",)) == "x"
+
+
+def test_assemble_handles_cumulative_streams():
+    assert assemble(["The", "The golden", "The golden visa"]) == "The golden visa"
+    assert assemble(["The", " golden"]) == "The golden"
+
+
+def test_answer_from_body_times_each_chunk():
+    events = sse_chunks(ANSWER, size=16)
+    body = b"".join(events)
+    received = [(100.0 + 10 * i, len(e)) for i, e in enumerate(events)]
+    answer = answer_from_body("https://x/api/chat", body, "text/event-stream", received, 200)
+    assert answer.text == ANSWER
+    assert answer.transport == "sse"
+    assert answer.ttft_ms == 100.0 and answer.total_ms == 100.0 + 10 * (len(events) - 1)
+    assert [c.text for c in answer.chunks[:-1]] == [ANSWER[i:i + 16] for i in range(0, len(ANSWER), 16)]
+
+
+class FakeCDP:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def send(self, method, params=None):
+        assert method == "Network.getResponseBody"
+        return {"body": base64.b64encode(self.body).decode(), "base64Encoded": True}
+
+
+class FakePage:
+    def __init__(self):
+        self.polls = 0
+
+    def wait_for_timeout(self, ms):
+        self.polls += 1
+
+
+def test_capture_http_exchange_from_devtools_events():
+    body = b"".join(sse_chunks(ANSWER))
+    cap = ChatCapture(FakePage())
+    cap._cdp = FakeCDP(body)
+    cap.mark()
+    cap._on_requestWillBeSent({"requestId": "1", "timestamp": 10.0, "type": "Fetch",
+                               "request": {"url": "https://x/api/chat", "method": "POST"}})
+    cap._on_requestWillBeSent({"requestId": "2", "timestamp": 10.0, "type": "Image",
+                               "request": {"url": "https://x/logo.png"}})
+    cap._on_responseReceived({"requestId": "1", "timestamp": 10.2, "response": {
+        "status": 200, "headers": {"Content-Type": "text/event-stream"}}})
+    cap._on_dataReceived({"requestId": "1", "timestamp": 10.4, "dataLength": len(body)})
+    cap._on_loadingFinished({"requestId": "1", "timestamp": 10.5})
+
+    answer = cap.wait_for_answer(timeout=100)
+    assert answer.text == ANSWER
+    assert answer.status == 200
+    assert answer.meta["ttfb_ms"] == 200.0 and answer.ttft_ms == 400.0
+    assert len(cap.exchanges) == 1
+
+
+def test_capture_websocket_splits_answers_per_prompt():
+    cap = ChatCapture(FakePage(), settle_ms=0)
+    frame = lambda text: {"opcode": 1, "payloadData": json.dumps(
+        {"type": 1, "target": "Receive", "arguments": [text]}) + "\x1e"}
+    cap._on_webSocketCreated({"requestId": "ws", "url": "wss://x/hubs/chat"})
+    cap._on_webSocketFrameSent({"requestId": "ws", "timestamp": 1.0,
+                                "response": {"opcode": 1, "payloadData": '{"protocol":"json"}\x1e'}})
+    assert cap.exchanges == []
+
+    for prompt, reply, t in (("hi", "Hello", 2.0), ("visa?", "Golden", 5.0)):
+        cap.mark()
+        cap._on_webSocketFrameSent({"requestId": "ws", "timestamp": t, "response": frame(prompt)})
+        cap._on_webSocketFrameReceived({"requestId": "ws", "timestamp": t + 0.3, "response": frame(reply[:3])})
+        cap._on_webSocketFrameReceived({"requestId": "ws", "timestamp": t + 0.5, "response": frame(reply[3:])})
+        answer = cap.wait_for_answer(timeout=100)
+        assert answer.text == reply
+        assert [c.t_ms for c in answer.chunks] == [300.0, 500.0]
+    assert [a.text for a in cap.answers()] == ["Hello", "Golden"]
+    assert cap.last_answer().text == "Golden"
+    # Nothing captured for the next prompt: no stale answer
+    cap.mark()
+    assert cap.last_answer() is None
+
+
+def test_wait_for_answer_times_out_without_traffic():
+    page = FakePage()
+    cap = ChatCapture(page)
+    with pytest.raises(TimeoutError):
+        cap.wait_for_answer(timeout=60, poll_ms=10)
+    assert page.polls >= 1
@@ -0,0 +1,227 @@
+import time
+import pytest
+from playwright.sync_api import TimeoutError as PlaywrightTO
+from config.config import INPUT_PROFILES, TIMEOUT_MARGIN, TIMEOUT_MIN_SAMPLES, TIMEOUT_PAD_MS
+from pages import _chat_js, chatbot_page
+from pages.async_chatbot_page import AsyncChatbotPage
+from pages.chatbot_page import ChatbotPage, ChatMessage, ask_concurrently
+from utils.timeouts import OPERATIONS, TimeoutPolicy
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page, self.selector = page, selector
+
+    @property
+    def first(self):
+        return self
+
+    def is_visible(self):
+        self.page.calls += 1
+        return self.page.state.get(self.selector) == "visible"
+
+    def count(self):
+        return 0 if self.page.state.get(self.selector, "missing") == "missing" else 1
+
+    def wait_for(self, state, timeout):
+        if self.page.state.get(self.selector) != state:
+            raise PlaywrightTO(f"Timeout {timeout}ms exceeded")
+
+
+class FakePage:
+    def __init__(self, state):
+        self.state = state
+        self.calls = 0
+
+    def locator(self, selector):
+        # Real Locators are passed through untouched by ChatbotPage
+        if isinstance(selector, FakeLocator):
+            return selector
+        return FakeLocator(self, selector)
+
+    def click(self, selector):
+        self.clicked = selector
+
+    def add_locator_handler(self, locator, handler, times=None):
+        self.handlers = getattr(self, "handlers", []) + [(locator.selector, handler, times)]
+
+    def evaluate(self, script, arg=None):
+        # The in-page banner watch: when the banner appeared after arming
+        if script == _chat_js.BANNER_SEEN_JS:
+            return self.banner_seen
+        # Batched visibility: selectors marked "js-error" are ones the page rejects
+        if script == _chat_js.VISIBILITY_JS:
+            self.polls = getattr(self, "polls", 0) + 1
+            states = [self.state.get(q["selector"], "missing") for q in arg]
+            return [None if st == "js-error" else st for st in states]
+
+
+def test_check_visibility_shares_one_deadline():
+    page = FakePage({"#a": "visible", "#b": "hidden"})
+    bot = ChatbotPage(page, lang="en")
+    started = time.monotonic()
+    report = bot.check_visibility(
+        [("#a", "A"), ("#b", "B"), ("#c", "C")], timeout=300, poll_ms=50
+    )
+    elapsed = time.monotonic() - started
+    assert report == {"A": "visible", "B": "hidden", "C": "missing"}
+    # Two missing elements still cost a single timeout, not one each
+    assert 0.3 <= elapsed < 0.55
+    # One page round trip per poll, none per element
+    assert page.calls == 0 and 4 <= page.polls <= 8
+
+
+def test_check_visibility_leaves_engine_selectors_to_playwright():
+    page = FakePage({"xpath=//nav": "visible", "div:visible": "js-error", "#a": "visible"})
+    bot = ChatbotPage(page, lang="en")
+    report = bot.check_visibility(
+        [("xpath=//nav", "Nav"), ("div:visible", "Div"), ("#a", "A")], timeout=200, poll_ms=50
+    )
+    assert report == {"Nav": "visible", "Div": "hidden", "A": "visible"}
+    # The CSS the page rejected is asked again through a locator on later polls
+    assert page.polls == 1 and page.calls >= 3
+
+
+def test_dom_queries_for_the_page_objects_selectors():
+    assert _chat_js.dom_query("role=button >> nth=2") == {
+        "selector": "role=button >> nth=2", "nth": 2, "role": "button", "name": None}
+    assert _chat_js.dom_query("role=link[name='Logo']")["name"] == "Logo"
+    assert _chat_js.dom_query("text=Sample questions")["text"] == "Sample questions"
+    sample = _chat_js.dom_query("#chat-welcome-tab div.question:has-text('golden visa')")
+    assert sample["css"] == "#chat-welcome-tab div.question" and sample["has_text"] == "golden visa"
+    assert _chat_js.dom_query("[role=log]")["css"] == "[role=log]"
+    for engine_only in ("xpath=//a", "text=/visa/i", "div >> span"):
+        assert _chat_js.dom_query(engine_only) is None
+
+
+def test_verify_main_elements_loaded_reports_each_element():
+    bot = ChatbotPage(FakePage({}), lang="ar")
+    visible = {loc.selector: "visible" for loc in bot.sample_q_locators}
+    visible.update({sel: "visible" for key, sel in bot.sel.items()})
+    bot.page.state = visible
+    assert bot.verify_main_elements_loaded()
+    assert set(bot.last_visibility_report.values()) == {"visible"}
+    assert len(bot.last_visibility_report) == 11
+    assert bot.page.polls == 1 and bot.page.calls == 0
+
+
+def test_ask_concurrently_sends_everything_before_waiting():
+    log = []
+
+    class Bot:
+        def __init__(self, name, input_profile):
+            self.name, self.input_profile = name, input_profile
+
+        def send_message(self, prompt, profile=None):
+            log.append(("send", self.name, prompt, profile or self.input_profile))
+
+        def wait_for_response(self):
+            log.append(("wait", self.name))
+            return f"{self.name}-answer"
+
+    # Typing would hold back the second send, so humanized bots insert
+    en, ar = Bot("en", "humanized"), Bot("ar", "paste")
+    assert ask_concurrently([(en, "hi"), (ar, "مرحبا")]) == ["en-answer", "ar-answer"]
+    assert log == [("send", "en", "hi", "insert"), ("send", "ar", "مرحبا", "paste"),
+                   ("wait", "en"), ("wait", "ar")]
+
+
+def test_message_tracker_accumulates_only_new_items():
+    def item(role, text):
+        return {"role": role, "text": text, "msg_time": "10:00", "direction": "ltr"}
+
+    replies = [
+        {"fresh": True, "items": [item("bot", "Welcome"), item("user", "hi")]},
+        {"fresh": False, "items": [item("bot", "Hello"), item("user", "")]},
+        {"fresh": False, "items": []},
+        {"fresh": True, "items": [item("bot", "Welcome")]},   # page reloaded
+    ]
+
+    class Page(FakePage):
+        def evaluate(self, script, arg=None):
+            return replies.pop(0)
+
+    bot = ChatbotPage(Page({}), lang="en")
+    assert [m.text for m in bot.new_messages()] == ["Welcome", "hi"]
+    assert bot.get_all_bot_messages() == ["Welcome", "Hello"]
+    assert bot.get_user_messages() == ["hi"]
+    assert bot.history[-1] == ChatMessage("user", "", "10:00", "ltr")
+    assert bot.get_last_bot_message() == "Welcome" and len(bot.history) == 1
+
+
+def test_late_cookie_banner_is_accepted_and_learned(monkeypatch):
+    policy = TimeoutPolicy(enabled=True)
+    monkeypatch.setattr(chatbot_page, "TIMEOUTS", policy)
+    page = FakePage({})
+    bot = ChatbotPage(page, lang="en")
+    policy.begin_test()
+    for _ in range(TIMEOUT_MIN_SAMPLES):
+        bot.accept_cookies()
+        bot.accept_cookies()   # armed once until the banner shows
+        assert len(page.handlers) == 1
+        # The handler only runs at the next action, long after the banner
+        time.sleep(0.3)
+        page.banner_seen = 150
+        selector, late_banner, times = page.handlers.pop()
+        assert selector == bot.sel["accept_btn"] and times == 1
+        late_banner()
+        assert page.clicked == bot.sel["accept_btn"]
+    policy.end_test()
+    # Banners that came after the 100 ms deadline push it out, by when they
+    # appeared in the page (150 ms), not by when the handler ran (300 ms+)
+    learned = policy.learned("cookie_banner", "en")
+    assert OPERATIONS["cookie_banner"][0] + 150 < learned < 300 * TIMEOUT_MARGIN + TIMEOUT_PAD_MS
+
+
+class TypingPage(FakePage):
+    """
+    Keeps the input box's text and what it held when Enter was pressed.
+    """
+
+    def __init__(self):
+        super().__init__({})
+        self.value, self.sent = "", []
+        self.keyboard = self
+
+    def fill(self, selector, text):
+        self.value = text
+
+    def insert_text(self, text):
+        self.value += text
+
+    def type(self, text):
+        self.value += text
+
+    def press(self, key):
+        self.sent.append(self.value)
+        self.value = ""
+
+    def evaluate(self, script, arg=None):
+        if script == _chat_js.PASTE_JS:
+            self.value += arg[1]
+
+
+@pytest.mark.parametrize("profile", INPUT_PROFILES)
+def test_every_input_profile_sends_the_same_text(profile, monkeypatch):
+    monkeypatch.setattr(chatbot_page, "TYPING_SPEED", 1000)
+    page = TypingPage()
+    ChatbotPage(page, lang="ar").send_message("ما هي التأشيرة الذهبية؟", profile=profile)
+    assert page.sent == ["ما هي التأشيرة الذهبية؟"]
+
+
+@pytest.mark.input_profile("paste")
+def test_input_profile_marker_applies_to_both_page_objects(input_profile):
+    assert input_profile == "paste"
+    assert ChatbotPage(FakePage({})).input_profile == "paste"
+    assert AsyncChatbotPage(FakePage({})).input_profile == "paste"
+    assert ChatbotPage(FakePage({}), input_profile="fill").input_profile == "fill"
+
+
+@pytest.mark.input_profile("voice")
+def test_unknown_input_profile_is_rejected():
+    page = TypingPage()
+    with pytest.raises(ValueError, match="Unknown input profile 'voice'"):
+        ChatbotPage(page).send_message("hi")
+    with pytest.raises(ValueError, match="Unknown input profile 'dictate'"):
+        ChatbotPage(page).send_message("hi", profile="dictate")
+    assert page.sent == []
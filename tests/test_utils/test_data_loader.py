@@ -0,0 +1,87 @@
+import json
+import pytest
+import utils.data_loader as dl
+from utils.data_loader import DataError, IndexCache, iter_file, select
+
+
+def _ai_case(cid, category="public_service", intent="Visa"):
+    return {
+        "id": cid, "category": category, "intent": intent,
+        "prompts": {"en": f"{cid}?", "ar": "ما هي التأشيرة الذهبية؟"},
+        "expected_keywords": {"en": ["visa"], "ar": ["الذهبية"]},
+        "validate": {"hallucination": True},
+    }
+
+
+@pytest.fixture
+def shards(tmp_path):
+    root = tmp_path / "ai"
+    root.mkdir()
+    (root / "a.json").write_text(
+        json.dumps([_ai_case("visa_1"), _ai_case("visa_2")], ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    (root / "b.jsonl").write_text(
+        "\n".join(json.dumps(_ai_case(c, "edge_case", "Errors"), ensure_ascii=False)
+                  for c in ("err_1", "err_2")) + "\n",
+        encoding="utf-8",
+    )
+    return root
+
+
+def test_json_array_streams_with_byte_offsets(shards, monkeypatch):
+    monkeypatch.setattr(dl, "_CHUNK", 7)   # force many partial reads
+    path = str(shards / "a.json")
+    pairs = list(iter_file(path))
+    assert [c["id"] for _, c in pairs] == ["visa_1", "visa_2"]
+    assert dl.read_case_at(path, pairs[1][0]) == pairs[1][1]
+
+
+def test_select_from_shards_and_filters(shards, tmp_path):
+    cache = IndexCache(str(tmp_path / "idx.json"))
+    refs = select("ai", str(shards), cache=cache)
+    assert [r.id for r in refs] == ["visa_1", "visa_2", "err_1", "err_2"]
+    assert refs[3].load()["prompts"]["ar"] == "ما هي التأشيرة الذهبية؟"
+    # Same content, different formatting (indented array vs JSONL): same hash
+    assert refs[0].sha1 == dl.case_sha1(_ai_case("visa_1")) != refs[1].sha1
+
+    assert [r.id for r in select("ai", str(shards), categories=["EDGE*"], cache=cache)] == ["err_1", "err_2"]
+    assert [r.id for r in select("ai", str(shards), ids=["*_2"], intents=["visa"], cache=cache)] == ["visa_2"]
+
+
+def test_cached_index_skips_parsing_until_the_file_changes(shards, tmp_path, monkeypatch):
+    select("ai", str(shards), cache=IndexCache(str(tmp_path / "idx.json")))
+
+    def boom(path):
+        raise AssertionError(f"re-parsed {path}")
+
+    monkeypatch.setattr(dl, "iter_file", boom)
+    assert len(select("ai", str(shards), cache=IndexCache(str(tmp_path / "idx.json")))) == 4
+
+    (shards / "b.jsonl").write_text(json.dumps(_ai_case("err_3")) + "\n", encoding="utf-8")
+    with pytest.raises(AssertionError, match="b.jsonl"):
+        select("ai", str(shards), cache=IndexCache(str(tmp_path / "idx.json")))
+
+
+def test_schema_errors_are_reported_together(tmp_path):
+    bad = _ai_case("x")
+    del bad["prompts"]["ar"]
+    path = tmp_path / "bad.jsonl"
+    path.write_text(json.dumps(bad) + "\n" + json.dumps({"id": 3}) + "\n", encoding="utf-8")
+    with pytest.raises(DataError) as err:
+        select("ai", str(path), cache=IndexCache(str(tmp_path / "idx.json")))
+    assert "case #0: `prompts` has no ar" in str(err.value)
+    assert "case #1: `id` must be str" in str(err.value)
+
+
+def test_duplicate_ids_and_missing_sources(shards, tmp_path):
+    (shards / "c.jsonl").write_text(json.dumps(_ai_case("visa_1")) + "\n", encoding="utf-8")
+    with pytest.raises(DataError, match="Duplicate"):
+        select("ai", str(shards), cache=IndexCache(str(tmp_path / "idx.json")))
+    with pytest.raises(DataError, match="No case files"):
+        select("ai", str(tmp_path / "nope.json"), cache=IndexCache(str(tmp_path / "idx.json")))
+
+
+def test_repo_data_files_match_their_schemas(tmp_path):
+    cache = IndexCache(str(tmp_path / "idx.json"))
+    assert select("ai", cache=cache) and select("security", cache=cache)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+import urllib.request
+import pytest
+from pages.chatbot_page import ResponseMetrics
+from utils.loadgen import (
+    AnswerError,
+    BrowserUser,
+    load_prompts,
+    run_closed,
+    run_load,
+    run_open,
+    summarize_run,
+)
+from utils.standin import CHAT_PATH, StandInServer
+from utils.stats import percentile, summarize
+
+
+class FakeUser:
+    def __init__(self, log, fail_on=()):
+        self.log = log
+        self.fail_on = fail_on
+
+    async def ask(self, prompt):
+        await asyncio.sleep(0.01)
+        if prompt in self.fail_on:
+            raise TimeoutError("no answer")
+        return {"ttft_ms": 5.0, "total_ms": 10.0}
+
+    async def close(self):
+        self.log.append("close")
+
+
+class StandInUser:
+    """
+    Asks the stand-in's chat API directly, timing the first streamed event.
+    """
+
+    def __init__(self, url, log):
+        self.url = url
+        self.log = log
+
+    def _ask(self, prompt):
+        started = time.monotonic()
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"message": prompt, "lang": "en"}).encode(), method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10) as resp:
+            resp.readline()
+            ttft = (time.monotonic() - started) * 1000
+            resp.read()
+        return {"ttft_ms": ttft, "total_ms": (time.monotonic() - started) * 1000}
+
+    async def ask(self, prompt):
+        return await asyncio.to_thread(self._ask, prompt)
+
+    async def close(self):
+        self.log.append("close")
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([10], 99) == 10
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile(range(1, 101), 95) == pytest.approx(95.05)
+    assert summarize([None])["count"] == 0
+
+
+def test_closed_loop_replaces_failed_users():
+    log = []
+
+    async def open_user():
+        log.append("open")
+        return FakeUser(log, fail_on=("bad",))
+
+    samples = asyncio.run(run_closed(open_user, ["good", "bad"], users=2, duration=0.2))
+    summary = summarize_run(samples, 0.2)
+    assert summary["ok"] and summary["errors"]
+    assert summary["errors_by_kind"] == {"TimeoutError": summary["errors"]}
+    assert summary["ttft_ms"]["p50"] == 5.0
+    # failed users are replaced, and every user is closed in the end
+    assert log.count("open") > 2
+    assert log.count("open") == log.count("close")
+
+
+def test_closed_loop_against_the_standin():
+    server = StandInServer(ttft_ms=20, chars_per_sec=0, error_rate=0.3, seed=1).start()
+    log = []
+
+    async def open_user():
+        log.append("open")
+        return StandInUser(server.url + CHAT_PATH, log)
+
+    try:
+        samples = asyncio.run(run_closed(open_user, ["What is the golden visa?", "hi"],
+                                         users=4, duration=0.5))
+    finally:
+        server.stop()
+    summary = summarize_run(samples, 0.5)
+    assert summary["ok"] > 4 and summary["errors"] > 0
+    assert set(summary["errors_by_kind"]) == {"HTTPError"}
+    assert summary["ttft_ms"]["p50"] >= 20
+    # Each failure closes its user; all but those at the deadline are replaced
+    assert 4 < log.count("open") <= 4 + summary["errors"]
+    assert log.count("open") == log.count("close")
+
+
+class FakeBot:
+    sel = {"bot_conts": ".chat-item.chatbot"}
+
+    def __init__(self, status):
+        self.page = self
+        self.status = status
+
+    async def send_message(self, prompt):
+        pass
+
+    async def wait_for_response(self):
+        return ResponseMetrics(f"Error {self.status}" if self.status else "Hi", 5.0, 10.0, 0.0)
+
+    async def evaluate(self, script, arg=None):
+        return self.status
+
+
+def test_browser_user_fails_turns_the_page_marks_as_errors():
+    user = BrowserUser(browser=None, url="http://standin/en/")
+    user.bot = FakeBot(503)
+    with pytest.raises(AnswerError, match="HTTP 503"):
+        asyncio.run(user.ask("hi"))
+    user.bot = FakeBot(None)
+    assert asyncio.run(user.ask("hi"))["ttft_ms"] == 5.0
+
+
+@pytest.mark.usefixtures("require_chromium")
+def test_browser_load_against_a_failing_standin():
+    server = StandInServer(ttft_ms=0, chars_per_sec=0, error_rate=0.5, seed=1).start()
+    try:
+        report = asyncio.run(run_load(["What is the golden visa?"], "en", server.chat_url("en"),
+                                      users=2, duration=3))
+    finally:
+        server.stop()
+    summary = report["summary"]
+    assert summary["ok"] and set(summary["errors_by_kind"]) == {"AnswerError"}
+    assert summary["ttft_ms"]["count"] == summary["ok"]
+
+
+def test_open_loop_rejects_beyond_max_in_flight():
+    async def open_user():
+        return FakeUser([])
+
+    samples = asyncio.run(run_open(open_user, ["q"], rate=200, duration=0.2,
+                                   max_in_flight=1, seed=1))
+    kinds = {s.get("error") for s in samples}
+    assert any(s["ok"] for s in samples)
+    assert "Overloaded" in kinds
+    assert all(s["t"] < 0.2 for s in samples)
+
+
+def test_load_prompts_from_ai_and_security_files(tmp_path):
+    ai = tmp_path / "ai.json"
+    sec = tmp_path / "sec.json"
+    ai.write_text(json.dumps([{"prompts": {"en": "hi", "ar": "مرحبا"}}]), encoding="utf-8")
+    sec.write_text(json.dumps([{"payload": "<b>x</b>"}]), encoding="utf-8")
+    assert load_prompts([str(ai), str(sec)], "ar") == ["مرحبا", "<b>x</b>"]
+    with pytest.raises(ValueError):
+        load_prompts([], "en")
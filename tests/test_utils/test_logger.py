@@ -0,0 +1,63 @@
+import logging
+import threading
+from utils.logger import CaptureHandler, get_logger
+
+
+def _handler(**kwargs):
+    handler = CaptureHandler(**kwargs)
+    logging.root.addHandler(handler)
+    return handler
+
+
+def test_ring_buffer_spills_oldest_lines(tmp_path):
+    handler = _handler(level="DEBUG", loggers=["uask"])
+    capture = handler.start("test_spill", max_records=3, spill_dir=str(tmp_path))
+    log = get_logger("spill")
+    try:
+        for i in range(5):
+            log.debug(f"line {i}")
+        value = capture.getvalue()
+    finally:
+        handler.stop(capture)
+        logging.root.removeHandler(handler)
+
+    assert len(capture.lines) == 3
+    assert "[2 earlier line(s)" in value and value.endswith("line 4")
+    spilled = open(capture.spill_path, encoding="utf-8").read()
+    assert "line 0" in spilled and "line 1" in spilled and "line 2" not in spilled
+
+
+def test_level_and_name_filters():
+    handler = _handler(level="INFO", loggers=["uask"])
+    capture = handler.start("test_filters")
+    try:
+        get_logger("filters").debug("too verbose")
+        get_logger("filters").info("kept")
+        logging.getLogger("urllib3").warning("other library")
+    finally:
+        handler.stop(capture)
+        logging.root.removeHandler(handler)
+    assert len(capture.lines) == 1 and capture.lines[0].endswith("kept")
+
+
+def test_threads_do_not_share_captures():
+    handler = _handler(level="DEBUG", loggers=["uask"])
+    captures = {}
+
+    def worker(name):
+        capture = handler.start(name)
+        get_logger("threads").debug(f"from {name}")
+        captures[name] = capture
+        handler.stop(capture)
+
+    try:
+        threads = [threading.Thread(target=worker, args=(f"t{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        logging.root.removeHandler(handler)
+
+    for name, capture in captures.items():
+        assert [line.split(": ", 1)[1] for line in capture.lines] == [f"from {name}"]
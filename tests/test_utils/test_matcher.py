@@ -0,0 +1,56 @@
+import pytest
+from utils.matcher import KeywordMatcher, keyword_matcher, normalize
+
+
+def test_arabic_normalization_folds_variants():
+    assert normalize("المُتَطَلَّبَات") == normalize("المتطلبات")
+    assert normalize("أإآٱ") == "اااا"
+    assert normalize("مستشفى") == normalize("مستشفي")
+    assert normalize("الهيئة") == normalize("الهيئه")
+    assert normalize("تـــأشيرة") == normalize("تاشيره")
+    assert normalize("Café ÉLIGIBILITY") == "cafe eligibility"
+    assert normalize("golden\n \u00a0visa\t") == "golden visa "
+
+
+def test_keywords_match_across_wrapped_and_double_spaced_replies():
+    text = "Apply for the Golden\n   Visa\u00a0 through the  ICP  app"
+    m = keyword_matcher(["golden visa", "ICP app", "through  the"])
+    matches = m.find(text)
+    assert [x.keyword for x in matches] == ["golden visa", "through  the", "ICP app"]
+    assert text[matches[0].start:matches[0].end] == "Golden\n   Visa"
+    assert text[matches[2].start:matches[2].end] == "ICP  app"
+    assert m.missing(text) == []
+
+
+def test_finds_all_keywords_with_original_positions():
+    text = "يرجى مراجعة المُتطلبات والوثائق ثم التقدِيم إلى الهيئة الإتحادية"
+    m = keyword_matcher(["المتطلبات", "الوثائق", "التقديم", "الهيئة الاتحادية"])
+    matches = m.find(text)
+    assert [x.keyword for x in matches] == ["المتطلبات", "الوثائق", "التقديم", "الهيئة الاتحادية"]
+    assert [text[x.start:x.end] for x in matches] == [
+        "المُتطلبات", "الوثائق", "التقدِيم", "الهيئة الإتحادية"
+    ]
+    assert m.missing(text) == []
+
+
+def test_overlapping_keywords():
+    m = KeywordMatcher(["he", "she", "his", "hers"], boundary="none")
+    assert {(x.keyword, x.start) for x in m.find("ushers")} == {("she", 1), ("he", 2), ("hers", 2)}
+
+
+def test_boundaries():
+    text = "We apologizes; no terrorism here."
+    assert keyword_matcher(["error"], boundary="none").search(text)
+    assert not keyword_matcher(["error"]).search(text)
+    assert keyword_matcher(["apologize"]).search(text)
+    assert not keyword_matcher(["apologize"], boundary="word").search(text)
+    assert keyword_matcher(["here"], boundary="word").search(text)
+    # Arabic proclitics are not part of the word boundary check
+    assert keyword_matcher(["الوثائق"], boundary="word").search("قدّم والوثائق")
+    with pytest.raises(ValueError):
+        KeywordMatcher(["x"], boundary="fuzzy")
+
+
+def test_matchers_are_compiled_once():
+    assert keyword_matcher(["a", "b"]) is keyword_matcher(["a", "b"])
+    assert keyword_matcher([]).find("anything") == []
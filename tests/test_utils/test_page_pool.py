@@ -0,0 +1,135 @@
+import pytest
+from pages.chatbot_page import ChatbotPage
+from utils.browser_pool import context_options
+from utils.page_pool import ContextMatrix, PagePool
+
+
+class FakePage:
+    def __init__(self):
+        self.loads = 0
+        self.closed = False
+
+    def locator(self, selector):
+        return selector
+
+    def goto(self, url, **kwargs):
+        self.url = url
+        self.loads += 1
+
+    def wait_for_load_state(self, *args, **kwargs):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    def new_page(self):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+
+@pytest.fixture(autouse=True)
+def no_page_interaction(monkeypatch):
+    monkeypatch.setattr(ChatbotPage, "accept_cookies", lambda self: None)
+    monkeypatch.setattr(ChatbotPage, "reset_conversation", lambda self: None)
+
+
+def test_slot_is_loaded_once_and_reused():
+    ctx = FakeContext()
+    pool = PagePool(ctx, size=1)
+    for _ in range(3):
+        bot = pool.acquire("en", "Mobile")
+        pool.release(bot)
+    assert len(ctx.pages) == 1 and ctx.pages[0].loads == 1
+    assert ctx.pages[0].url.endswith("/en/")
+
+
+def test_failed_page_is_discarded_and_slot_refilled():
+    ctx = FakeContext()
+    pool = PagePool(ctx, size=1)
+    bot = pool.acquire("ar")
+    pool.release(bot, reuse=False)
+    assert ctx.pages[0].closed
+    # The replacement is already navigating before anyone asks for it
+    assert len(ctx.pages) == 2 and ctx.pages[1].loads == 1
+    assert pool.acquire("ar").page is ctx.pages[1]
+
+
+def test_failed_warm_up_closes_the_page_and_refills_the_slot(monkeypatch):
+    ctx = FakeContext()
+    pool = PagePool(ctx, size=1)
+    pool.prewarm("en")
+
+    failures = [TimeoutError("page load")]
+    finish_open = ChatbotPage.finish_open
+
+    def flaky(self):
+        if failures:
+            raise failures.pop()
+        finish_open(self)
+
+    monkeypatch.setattr(ChatbotPage, "finish_open", flaky)
+    with pytest.raises(TimeoutError):
+        pool.acquire("en")
+    assert ctx.pages[0].closed and len(ctx.pages) == 2 and not ctx.pages[1].closed
+    assert pool.acquire("en").page is ctx.pages[1]
+
+
+def test_languages_and_devices_have_separate_slots():
+    ctx = FakeContext()
+    pool = PagePool(ctx, size=1)
+    en, ar = pool.acquire("en"), pool.acquire("ar")
+    extra = pool.acquire("en")
+    for bot in (en, ar, extra):
+        pool.release(bot)
+    # One over-capacity "en" page is closed, one page per key is kept
+    assert not ar.page.closed
+    assert sorted([en.page.closed, extra.page.closed]) == [False, True]
+
+
+class FakeContextPool:
+    def __init__(self):
+        self.acquired, self.released = [], []
+
+    def acquire(self, profile, lang, device):
+        self.acquired.append((profile, lang, device))
+        return FakeContext()
+
+    def release(self, ctx):
+        self.released.append(ctx)
+
+    def page_url(self, ctx, url):
+        return "http://standin/" + url.split("/", 3)[3]
+
+
+def test_matrix_builds_each_cell_once_and_returns_it_at_close():
+    contexts, opened = FakeContextPool(), []
+    matrix = ContextMatrix(contexts, on_open=opened.append)
+    for lang in ("en", "ar", "en"):
+        for device in ("Desktop", "Mobile"):
+            ctx, pages = matrix.get("full", lang, device)
+            pages.release(pages.acquire(lang, device))
+    assert contexts.acquired == [("full", "en", "Desktop"), ("full", "en", "Mobile"),
+                                 ("full", "ar", "Desktop"), ("full", "ar", "Mobile")]
+    assert len(opened) == 4 and all(len(ctx.pages) == 1 for ctx in opened)
+    # Pages open where the context pool says (e.g. the replay stand-in)
+    assert {ctx.pages[0].url for ctx in opened} == {"http://standin/en/", "http://standin/ar/"}
+
+    matrix.close()
+    assert contexts.released == opened
+    assert all(ctx.pages[0].closed for ctx in opened)
+
+
+def test_context_options_carry_locale_and_device_profile():
+    opts = context_options("ar", "Mobile")
+    assert opts["locale"] == "ar-AE" and opts["timezone_id"] == "Asia/Dubai"
+    assert opts["viewport"] == {"width": 375, "height": 812}
+    assert opts["is_mobile"] and opts["has_touch"] and "Mobile" in opts["user_agent"]
+    assert not context_options("en", "Desktop")["is_mobile"]
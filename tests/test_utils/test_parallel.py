@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from utils.parallel import merge_allure, shard, worker_command
+
+
+def test_shard_spreads_parametrized_cases_round_robin():
+    ids = [f"tests/test_ai/test_chat_ai.py::test_ai[{i}]" for i in range(5)]
+    shards = shard(ids, 2)
+    assert shards == [[ids[0], ids[2], ids[4]], [ids[1], ids[3]]]
+    assert shard(ids[:1], 4) == [[ids[0]]]
+
+
+def test_worker_runs_only_its_shard_in_order(tmp_path):
+    me = "tests/test_utils/test_parallel.py"
+    shard_file = tmp_path / "gw0.ids"
+    shard_file.write_text(f"{me}::test_merge_allure_moves_worker_results\n"
+                          f"{me}::test_shard_spreads_parametrized_cases_round_robin")
+    # The run's own arguments are passed through untouched
+    args = ["-c", "pytest.ini", "-p", "no:logging", me]
+    cmd = worker_command(args, str(shard_file), str(tmp_path / "allure"))
+    assert cmd[:3] == [sys.executable, "-m", "pytest"] and cmd[3:3 + len(args)] == args
+
+    proc = subprocess.run(cmd + ["-v"], capture_output=True, text=True)
+    ran = [line.split(" ")[0] for line in proc.stdout.splitlines() if " PASSED" in line]
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert ran == [f"{me}::test_merge_allure_moves_worker_results",
+                   f"{me}::test_shard_spreads_parametrized_cases_round_robin"]
+    assert "1 deselected" in proc.stdout
+
+
+def test_merge_allure_moves_worker_results(tmp_path):
+    workers = []
+    for i in range(2):
+        d = tmp_path / f"gw{i}-allure"
+        d.mkdir()
+        (d / f"{i}-result.json").write_text("{}")
+        workers.append(str(d))
+    target = tmp_path / "allure-results"
+    merge_allure(workers, str(target))
+    assert sorted(p.name for p in target.iterdir()) == ["0-result.json", "1-result.json"]
+    assert not any((tmp_path / f"gw{i}-allure").exists() for i in range(2))
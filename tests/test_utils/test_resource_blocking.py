@@ -0,0 +1,72 @@
+from utils.resource_blocking import BlockReport, ResourceBlocker, SizeTable, block_reason
+
+SITE = frozenset({"u.ae"})
+
+
+def reason(profile, url, rtype):
+    return block_reason(profile, url, rtype, first_party=SITE, allow=("cdn.example.com",))
+
+
+def test_profiles_block_progressively_more():
+    logo = "https://ask.u.ae/assets/logo.png"
+    analytics = "https://www.google-analytics.com/g/collect?v=2"
+    widget = "https://widgets.other.com/w.js"
+    assert [reason(p, logo, "image") for p in ("full", "no-media", "chat-only")] == [None, "image", "image"]
+    assert [reason(p, analytics, "xhr") for p in ("full", "no-media", "chat-only")] == [None, None, "tracker"]
+    assert reason("chat-only", widget, "script") == "third-party"
+    assert reason("chat-only", "https://ask.u.ae/main.js", "script") is None
+
+
+def test_documents_chat_calls_and_allowed_domains_always_pass():
+    assert reason("chat-only", "https://ask.u.ae/en/", "document") is None
+    assert reason("chat-only", "https://api.other.com/api/chat", "fetch") is None
+    assert reason("chat-only", "https://cdn.example.com/font.js", "script") is None
+    assert reason("chat-only", "data:image/png;base64,AAAA", "other") is None
+
+
+def test_size_table_learns_and_persists(tmp_path):
+    class Response:
+        url = "https://ask.u.ae/hero.jpg?v=3"
+        headers = {"content-length": "2048"}
+
+    table = SizeTable(str(tmp_path / "sizes.json"))
+    table.learn(Response())
+    table.save()
+    assert SizeTable(table.path).get("https://ask.u.ae/hero.jpg?v=4") == 2048
+
+
+class FakeRoute:
+    def __init__(self, url, rtype):
+        self.request = type("Request", (), {"url": url, "resource_type": rtype})()
+        self.outcome = None
+
+    def fallback(self):
+        self.outcome = "fallback"
+
+    def fulfill(self, **kwargs):
+        self.outcome = ("fulfill", kwargs["content_type"])
+
+    def abort(self, code):
+        self.outcome = ("abort", code)
+
+
+def test_blocker_stubs_scripts_aborts_media_and_reports(tmp_path):
+    sizes = SizeTable(str(tmp_path / "sizes.json"))
+    sizes.sizes["https://ask.u.ae/hero.jpg"] = 1024
+    report = BlockReport()
+    blocker = ResourceBlocker("chat-only", sizes, report)
+
+    routes = [
+        FakeRoute("https://ask.u.ae/hero.jpg", "image"),
+        FakeRoute("https://www.googletagmanager.com/gtm.js", "script"),
+        FakeRoute("https://ask.u.ae/app.js", "script"),
+    ]
+    for route in routes:
+        blocker._handle_route(route)
+    assert [r.outcome for r in routes] == [
+        ("abort", "blockedbyclient"), ("fulfill", "application/javascript"), "fallback",
+    ]
+    summary = report.summary()["chat-only"]
+    assert summary == {"requests": 2, "bytes": 1024, "unsized": 1,
+                       "by_reason": {"image": 1, "tracker": 1}}
+    assert "2 request(s) blocked, 1.0 KiB (+1 of unknown size)" in report.format()
@@ -0,0 +1,50 @@
+import time
+
+from utils.parallel import shard
+from utils.results_db import ResultsDB, balance, flaky_first, longest_first
+
+
+def test_history_durations_and_flakiness(tmp_path):
+    db = ResultsDB(str(tmp_path / "results.sqlite"))
+    now = time.time()
+    for i, (outcome, duration) in enumerate([("passed", 10), ("failed", 30), ("passed", 12),
+                                             ("skipped", 0)]):
+        db.record("t::slow", outcome, duration, at=now + i)
+    db.record("t::fast", "passed", 1.0, at=now)
+
+    assert db.expected_durations() == {"t::slow": 12, "t::fast": 1.0}
+    assert db.expected_durations(limit=1) == {"t::slow": 12, "t::fast": 1.0}
+    assert db.flakiness() == {"t::slow": 1 / 3, "t::fast": 0.0}
+
+
+def test_passed_unchanged_needs_same_key_recent_pass(tmp_path):
+    db = ResultsDB(str(tmp_path / "results.sqlite"))
+    key = ("case1", "code1", "live:x")
+    db.record("t::a", "passed", 5, *key, at=time.time() - 60)
+    assert db.passed_unchanged("t::a", *key, max_age_s=3600)
+    assert not db.passed_unchanged("t::a", *key, max_age_s=30)
+    assert not db.passed_unchanged("t::a", "case2", "code1", "live:x", max_age_s=3600)
+
+    db.record("t::a", "failed", 5, *key)
+    assert not db.passed_unchanged("t::a", *key, max_age_s=3600)
+    # A skip is not a verdict
+    db.record("t::a", "passed", 5, *key)
+    db.record("t::a", "skipped", 0, *key)
+    assert db.passed_unchanged("t::a", *key, max_age_s=3600)
+
+
+def test_longest_first_and_flaky_first_ordering():
+    ids = ["a", "b", "c", "new"]
+    durations = {"a": 1, "b": 9, "c": 5}
+    assert longest_first(ids, durations) == ["b", "c", "new", "a"]   # unknown ≈ median
+    assert flaky_first(ids, {"c": 0.5, "new": 0.1}) == ["c", "new", "a", "b"]
+
+
+def test_balance_evens_out_expected_work():
+    durations = {"t1": 2, "t2": 10, "t3": 6, "t4": 5, "t5": 4, "t6": 3}
+    shards = balance(list(durations), 2, durations)
+    assert [s[0] for s in shards] == ["t2", "t3"]   # longest first on each worker
+    assert sorted(sum(durations[n] for n in s) for s in shards) == [14, 16]
+    assert shard(list(durations), 2, durations) == shards
+    # Without history the parallel runner keeps dealing round-robin (12s vs 18s)
+    assert shard(list(durations), 2) == [["t1", "t3", "t5"], ["t2", "t4", "t6"]]
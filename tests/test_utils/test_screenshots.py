@@ -0,0 +1,112 @@
+import allure
+import allure_commons
+from types import SimpleNamespace
+from allure_commons import model2
+from allure_commons.reporter import AllureReporter
+from utils.screenshots import AttachmentWriter, ScreenshotPolicy
+
+
+class FakePage:
+    def __init__(self):
+        self.fingerprint = "a"
+        self.shots = []
+
+    def evaluate(self, _js):
+        return self.fingerprint
+
+    def screenshot(self, **options):
+        self.shots.append(options)
+        return b"img"
+
+
+def test_modes():
+    assert ScreenshotPolicy(mode="always").should_capture(failed=False)
+    assert not ScreenshotPolicy(mode="on_failure").should_capture(failed=False)
+    assert ScreenshotPolicy(mode="on_failure").should_capture(failed=True)
+    assert not ScreenshotPolicy(mode="off").should_capture(failed=True)
+
+
+def test_jpeg_viewport_options():
+    page = FakePage()
+    policy = ScreenshotPolicy(full_page=False, fmt="jpeg", quality=55)
+    assert policy.capture(page) == b"img"
+    assert page.shots == [{"full_page": False, "type": "jpeg", "quality": 55}]
+    assert policy.attachment_type == allure.attachment_type.JPG
+
+
+def test_skip_unchanged_until_page_changes():
+    page = FakePage()
+    policy = ScreenshotPolicy(skip_unchanged=True)
+    assert policy.capture(page) == b"img"
+    assert policy.capture(page) is None
+    assert policy.capture(page, force=True) == b"img"
+    page.fingerprint = "b"
+    assert policy.capture(page) == b"img"
+    assert len(page.shots) == 3
+
+
+class FakeListener:
+    """
+    What AttachmentWriter needs of allure-pytest's listener, around the
+    real (pinned) reporter.
+    """
+
+    def __init__(self, report_dir):
+        self.allure_logger = AllureReporter()
+        self.config = SimpleNamespace(option=SimpleNamespace(allure_report_dir=report_dir))
+
+
+def test_writer_registers_the_attachment_and_writes_it_in_background(tmp_path):
+    listener = FakeListener(str(tmp_path))
+    test = model2.TestResult(uuid="t1", name="test")
+    listener.allure_logger.schedule_test("t1", test)
+    allure_commons.plugin_manager.register(listener)
+    try:
+        writer = AttachmentWriter()
+        writer.attach(b"img", "shot", allure.attachment_type.PNG)
+        writer.flush()
+    finally:
+        allure_commons.plugin_manager.unregister(listener)
+    [attachment] = test.attachments
+    assert attachment.name == "shot" and attachment.type == "image/png"
+    assert (tmp_path / attachment.source).read_bytes() == b"img"
+
+
+def test_writer_attaches_inline_without_a_listener(monkeypatch):
+    attached = []
+    monkeypatch.setattr(allure, "attach", lambda body, **kw: attached.append((body, kw["name"])))
+    writer = AttachmentWriter()
+    writer.attach(b"img", "shot", allure.attachment_type.PNG)
+    writer.flush()
+    assert attached == [(b"img", "shot")]
+
+
+class OldReporter:
+    """
+    A reporter whose private `_attach` is gone or has another signature.
+    """
+
+    def __init__(self, attach=None):
+        if attach:
+            self._attach = attach
+
+
+def test_writer_falls_back_to_allure_attach_when_the_internals_change(tmp_path, monkeypatch):
+    attached = []
+    monkeypatch.setattr(allure, "attach", lambda body, **kw: attached.append((body, kw["name"])))
+
+    def changed_signature(uuid, body, name=None, attachment_type=None):
+        raise AssertionError("not reached")
+
+    for reporter in (OldReporter(), OldReporter(lambda uuid: None), OldReporter(changed_signature)):
+        listener = FakeListener(str(tmp_path))
+        listener.allure_logger = reporter
+        allure_commons.plugin_manager.register(listener)
+        try:
+            writer = AttachmentWriter()
+            writer.attach(b"img", "shot", allure.attachment_type.PNG)
+            writer.flush()
+        finally:
+            allure_commons.plugin_manager.unregister(listener)
+    assert attached == [(b"img", "shot")] * 3
+    assert not list(tmp_path.iterdir())
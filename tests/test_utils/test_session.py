@@ -0,0 +1,106 @@
+import json
+import time
+import pytest
+from playwright.sync_api import Error as PlaywrightError
+import utils.session as session
+
+
+def _write_state(tmp_path, expires):
+    path = tmp_path / "auth.json"
+    path.write_text(json.dumps({"cookies": [
+        {"name": "sid", "domain": ".u.ae", "expires": expires},
+        {"name": "tmp", "domain": "ask.u.ae", "expires": -1},
+        {"name": "ads", "domain": ".example.com", "expires": 1},
+        {"name": "lookalike", "domain": "sk.u.ae", "expires": 1},
+        {"name": "nodomain", "domain": "", "expires": 1},
+    ]}))
+    return str(path)
+
+
+class Probes(list):
+    ok = True
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    calls = Probes()
+
+    def fake_probe(state_path, url, browser_type=None):
+        calls.append(state_path)
+        return calls.ok, "fake"
+
+    monkeypatch.setattr(session, "probe", fake_probe)
+    return calls
+
+
+def test_inspect_state_uses_site_cookies_only(tmp_path):
+    expires = time.time() + 86400
+    info = session.inspect_state(_write_state(tmp_path, expires), "https://ask.u.ae/en/")
+    assert info["cookies"] == 2 and info["expires_at"] == expires
+    # ask.u.ae's own cookie is not sent to a lookalike host
+    assert session.inspect_state(_write_state(tmp_path, expires), "https://evilask.u.ae/")["cookies"] == 1
+
+
+def test_verdict_is_cached_for_the_same_state(tmp_path, probes):
+    state = _write_state(tmp_path, time.time() + 86400)
+    first = session.ensure_session(state, "https://ask.u.ae/en/")
+    second = session.ensure_session(state, "https://ask.u.ae/en/")
+    assert len(probes) == 1 and first["validated_at"] == second["validated_at"]
+    assert not (tmp_path / "auth.json.lock").exists()
+
+
+def test_expired_cookies_fail_without_probing(tmp_path, probes):
+    state = _write_state(tmp_path, time.time() + 5)
+    with pytest.raises(session.SessionError, match="expire"):
+        session.ensure_session(state, "https://ask.u.ae/en/")
+    assert probes == []
+
+
+def test_rejected_session_fails_fast(tmp_path, probes):
+    probes.ok = False
+    state = _write_state(tmp_path, time.time() + 86400)
+    for _ in range(2):
+        with pytest.raises(session.SessionError, match="stale"):
+            session.ensure_session(state, "https://ask.u.ae/en/")
+    assert len(probes) == 1
+
+
+def test_missing_state(tmp_path):
+    with pytest.raises(session.SessionError, match="Missing"):
+        session.ensure_session(str(tmp_path / "nope.json"))
+
+
+class FailingBrowserType:
+    """
+    Launches a browser whose pages cannot reach the site.
+    """
+
+    def __init__(self):
+        self.closed = False
+
+    def launch(self, **kwargs):
+        return self
+
+    def new_context(self, **kwargs):
+        return self
+
+    def add_init_script(self, script):
+        pass
+
+    def new_page(self):
+        return self
+
+    def goto(self, url, **kwargs):
+        raise PlaywrightError(f"net::ERR_NAME_NOT_RESOLVED at {url}")
+
+    def close(self):
+        self.closed = True
+
+
+def test_unreachable_site_is_a_session_error(tmp_path):
+    state = _write_state(tmp_path, time.time() + 86400)
+    browser = FailingBrowserType()
+    ok, reason = session.probe(state, "https://ask.u.ae/en/", browser)
+    assert not ok and "ERR_NAME_NOT_RESOLVED" in reason and browser.closed
+    with pytest.raises(session.SessionError, match="ERR_NAME_NOT_RESOLVED"):
+        session.ensure_session(state, "https://ask.u.ae/en/", browser, ttl=0)
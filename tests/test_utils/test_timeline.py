@@ -0,0 +1,92 @@
+import json
+import pytest
+from utils import timeline
+from utils.timeline import Timeline, merge_timelines, traced_methods
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    spans = Timeline(enabled=True)
+    monkeypatch.setattr(timeline, "SPANS", spans)
+    return spans
+
+
+def test_spans_nest_and_export_as_chrome_trace(spans, tmp_path):
+    spans.begin_test("t.py::test_x[ar-Mobile]", lang="ar", device="Mobile")
+    with spans.span("Send message", "step"):
+        with spans.span("screenshot", "screenshot"):
+            pass
+    spans.end_test()
+
+    path = tmp_path / "timeline.json"
+    spans.save(str(path))
+    events = [e for e in json.loads(path.read_text())["traceEvents"] if e["ph"] == "X"]
+    inner, outer = events
+    assert (inner["name"], outer["name"]) == ("screenshot", "Send message")
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1
+    assert outer["args"] == {"test": "t.py::test_x[ar-Mobile]", "lang": "ar", "device": "Mobile"}
+
+
+def test_traced_methods_tag_the_instance_and_survive_errors(spans):
+    @traced_methods("page")
+    class Page:
+        lang, device = "en", "Desktop"
+
+        def ok(self):
+            return 1
+
+        def boom(self):
+            raise RuntimeError
+
+        def _private(self):
+            return 2
+
+    page = Page()
+    assert page.ok() == 1 and page._private() == 2
+    with pytest.raises(RuntimeError):
+        page.boom()
+    assert [(s[0], s[1], s[5]) for s in spans.spans] == [
+        ("Page.ok", "page", {"lang": "en", "device": "Desktop"}),
+        ("Page.boom", "page", {"lang": "en", "device": "Desktop"}),
+    ]
+
+
+def test_slowest_aggregates_by_operation(spans):
+    spans.begin_test("t.py::test_a")
+    for ms in (10, 30, 20):
+        spans.add("wait_for_response", "page", 0, ms * 1_000_000)
+    spans.add("t.py::test_a", "test", 0, 999_000_000)
+    spans.add("open", "page", 0, 5_000_000)
+    rows = spans.slowest(top=5)
+    assert [r["name"] for r in rows] == ["wait_for_response", "open"]
+    assert rows[0] == {"cat": "page", "name": "wait_for_response", "count": 3,
+                       "total_ms": 60.0, "p50_ms": 20.0, "p95_ms": 29.0,
+                       "max_ms": 30.0, "max_test": "t.py::test_a"}
+    assert "wait_for_response" in spans.format_slowest()
+
+
+def test_disabled_timeline_and_span_cap():
+    off = Timeline(enabled=False)
+    with off.span("x"):
+        pass
+    assert off.spans == []
+
+    capped = Timeline(enabled=True, max_spans=2)
+    for _ in range(5):
+        with capped.span("x"):
+            pass
+    assert len(capped.spans) == 2 and capped.dropped == 3
+
+
+def test_merge_keeps_every_worker(spans, tmp_path):
+    parts = []
+    for worker in ("gw0", "gw1"):
+        with spans.span(worker):
+            pass
+        parts.append(str(tmp_path / f"timeline-{worker}.json"))
+        spans.save(parts[-1])
+        spans.clear()
+    merge_timelines(parts + [str(tmp_path / "missing.json")], str(tmp_path / "timeline.json"))
+    merged = json.loads((tmp_path / "timeline.json").read_text())["traceEvents"]
+    assert [e["name"] for e in merged if e["ph"] == "X"] == ["gw0", "gw1"]
+    assert not any((tmp_path / f"timeline-{w}.json").exists() for w in ("gw0", "gw1"))
@@ -0,0 +1,82 @@
+import time
+import pytest
+from utils.results_db import ResultsDB
+from utils.timeouts import OPERATIONS, BudgetExceeded, TimeoutPolicy, budget_for
+
+
+def learn(policy, op, lang, values, case=""):
+    policy.begin_test(case)
+    for ms in values:
+        policy.observe(op, lang, ms)
+    policy.end_test()
+
+
+def test_defaults_until_enough_samples_then_percentile_with_margin():
+    policy = TimeoutPolicy(enabled=True)
+    assert policy.learned("first_token", "en") == OPERATIONS["first_token"][0]
+    learn(policy, "first_token", "en", [1000, 1200, 1100, 1300, 1000])
+    # p99 ≈ 1296 ms × 1.5 + 250 ms
+    assert policy.learned("first_token", "en") == 2194
+    assert policy.learned("first_token", "ar") == OPERATIONS["first_token"][0]
+    # Kept within the operation's bounds
+    learn(policy, "cookie_banner", "en", [1] * 5)
+    assert policy.learned("cookie_banner", "en") == 251
+    learn(policy, "answer", "en", [10 ** 6] * 5)
+    assert policy.learned("answer", "en") == OPERATIONS["answer"][2]
+
+
+def test_slow_case_gets_its_own_deadline():
+    policy = TimeoutPolicy(enabled=True)
+    learn(policy, "answer", "en", [4000] * 5, case="quick")
+    learn(policy, "answer", "en", [40000] * 5, case="slow")
+    policy.begin_test("quick")
+    quick = policy.deadline("answer", "en")
+    policy.begin_test("slow")
+    slow = policy.deadline("answer", "en")
+    policy.begin_test("new")   # no own history: the language's samples
+    new = policy.deadline("answer", "en")
+    assert quick == 6250 and slow == 60250 and new > slow * 0.9
+
+
+def test_observations_only_count_inside_a_test():
+    policy = TimeoutPolicy(enabled=True)
+    for _ in range(10):
+        policy.observe("page_load", "en", 1.0)
+    assert policy.learned("page_load", "en") == OPERATIONS["page_load"][0]
+
+
+def test_budget_caps_deadlines_and_fails_fast():
+    policy = TimeoutPolicy(enabled=True)
+    policy.begin_test(budget_s=0.5)
+    assert policy.deadline("answer", "en") <= 500
+    policy._budget_end = time.monotonic() - 1
+    with pytest.raises(BudgetExceeded):
+        policy.deadline("page_load", "en")
+    with pytest.raises(TimeoutError):
+        with policy.waiting("visibility", "en", timeout=100):
+            raise RuntimeError("Timeout 100ms exceeded")
+    policy.end_test()
+    assert policy.deadline("page_load", "en") == OPERATIONS["page_load"][0]
+
+
+def test_budget_from_recent_passes():
+    assert budget_for([10, 12, 11]) is None
+    assert budget_for([20, 22, 21, 25, 20]) == pytest.approx(48.8)
+    assert budget_for([1, 1, 1, 1, 1]) == 30
+
+
+def test_samples_survive_the_run(tmp_path):
+    db = ResultsDB(str(tmp_path / "results.sqlite"))
+    policy = TimeoutPolicy(enabled=True)
+    learn(policy, "first_token", "ar", [900, 1000, 1100, 1000, 1000], case="visa")
+    with policy.waiting("page_load", "ar", timeout=5000) as ms:
+        pass
+    policy.flush(db)
+    assert ms == 5000
+
+    later = TimeoutPolicy(enabled=True)
+    later.load(db)
+    later.begin_test("visa")
+    assert later.deadline("first_token", "ar") == policy.learned("first_token", "ar")
+    assert sorted(db.latencies()[("first_token", "ar", "visa")]) == [900, 1000, 1000, 1000, 1100]
+    db.close()
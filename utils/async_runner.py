@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import asdict
+
+from playwright.async_api import async_playwright
+from config.config import BASE_URLS, BLOCK_PROFILE, HEADLESS, LANG, STORAGE_STATE_PATH, TRAFFIC_MODE
+from pages.async_chatbot_page import AsyncChatbotPage
+from utils.browser_pool import DEFAULT_CONTEXT_OPTIONS, RECAPTCHA_STUB
+from utils.data_loader import iter_cases
+from utils.logger import get_logger
+
+logger = get_logger("async_runner")
+
+
+async def converse(browser, prompt: str, lang: str = LANG, url: str = None) -> dict:
+    """
+    One isolated conversation: fresh context, open, accept cookies, send
+    `prompt`, wait for the streamed answer. Never raises; failures are
+    reported in the result.
+    """
+    url = url or BASE_URLS[lang]
+    started = time.monotonic()
+    ctx = await browser.new_context(
+        storage_state=STORAGE_STATE_PATH if os.path.exists(STORAGE_STATE_PATH) else None,
+        **DEFAULT_CONTEXT_OPTIONS,
+    )
+    await ctx.add_init_script(RECAPTCHA_STUB)
+    result = {"prompt": prompt, "lang": lang, "ok": False}
+    try:
+        page = await ctx.new_page()
+        bot = AsyncChatbotPage(page, lang=lang)
+        await bot.open(url)
+        await bot.accept_cookies()
+        await bot.send_message(prompt)
+        metrics = await bot.wait_for_response()
+        result.update(asdict(metrics), ok=True)
+    except Exception as exc:
+        logger.warning(f"Conversation failed for {prompt!r}: {exc!r}")
+        result["error"] = repr(exc)
+    finally:
+        await ctx.close()
+    result["wall_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+
+async def run_conversations(prompts: list, lang: str = LANG, concurrency: int = 20,
+                            url: str = None, headless: bool = HEADLESS) -> list:
+    """
+    Drive every prompt in its own conversation, at most `concurrency` at a
+    time, from a single browser in the current event loop. Results keep the
+    order of `prompts`.
+
+    Traffic record/replay and resource blocking hook sync-API contexts and
+    are not applied here; for offline runs point `url` at a StandInServer.
+    """
+    if TRAFFIC_MODE != "live" or BLOCK_PROFILE:
+        logger.warning(
+            f"TRAFFIC_MODE={TRAFFIC_MODE!r} / BLOCK_PROFILE={BLOCK_PROFILE!r} are ignored by "
+            "the async runner; use --standin for offline runs"
+        )
+    sem = asyncio.Semaphore(concurrency)
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=headless)
+
+        async def bounded(prompt):
+            async with sem:
+                return await converse(browser, prompt, lang, url)
+
+        try:
+            return await asyncio.gather(*(bounded(p) for p in prompts))
+        finally:
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many U-Ask conversations concurrently.")
+    parser.add_argument("--data", default=None, help="AI case source (default: DATA_SOURCES['ai'])")
+    parser.add_argument("--lang", default=LANG, choices=sorted(BASE_URLS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--url", default=None, help="Override the chatbot URL (e.g. a stand-in)")
+    parser.add_argument("--standin", action="store_true",
+                        help="Run against the local synthetic stand-in (offline)")
+    args = parser.parse_args()
+
+    prompts = [case["prompts"][args.lang] for case in iter_cases("ai", args.data)]
+    server = None
+    url = args.url
+    if args.standin:
+        from utils.standin import StandInServer
+        server = StandInServer().start()
+        url = server.chat_url(args.lang)
+
+    started = time.monotonic()
+    try:
+        results = asyncio.run(run_conversations(prompts, args.lang, args.concurrency, url))
+    finally:
+        if server:
+            server.stop()
+    for r in results:
+        status = "OK  " if r["ok"] else "FAIL"
+        ttft = r.get("ttft_ms", "-")
+        print(f"{status} ttft={ttft}ms wall={r['wall_ms']}ms  {r['prompt'][:60]}")
+    print(f"{len(results)} conversation(s) in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import json
+import os
+import re
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from config.config import (
+    BASE_URLS,
+    BENCH_ABS_THRESHOLD_MS,
+    BENCH_ALPHA,
+    BENCH_BASELINE_PATH,
+    BENCH_REL_THRESHOLD,
+    DEVICES,
+    LANGS,
+    TRAFFIC_MODE,
+)
+from utils.logger import get_logger
+from utils.stats import mann_whitney_greater, percentile
+
+logger = get_logger("benchmark")
+
+BASELINE_FORMAT = 1
+MIN_SAMPLES = 3
+
+_ROUND_ID = re.compile(r"-?round\d+-?")
+
+
+def case_key(nodeid: str) -> str:
+    """
+    Node id without the benchmark round, so all rounds of a case pool
+    their samples: `test_x[a-round2]` → `test_x[a]`.
+    """
+    key = re.sub(r"\[([^\]]*)\]$", lambda m: f"[{_ROUND_ID.sub('-', m.group(1)).strip('-')}]", nodeid)
+    return key[:-2] if key.endswith("[]") else key
+
+
+class BenchmarkRecorder:
+    """
+    Timing samples (ms) per case and metric. `record()` is a no-op outside
+    a benchmarked test, so instrumented code pays nothing in normal runs.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(lambda: defaultdict(list))
+        self.case = None
+
+    @property
+    def recording(self) -> bool:
+        return self.case is not None
+
+    def begin(self, case: str):
+        self.case = case
+
+    def end(self):
+        self.case = None
+
+    def record(self, metric: str, ms):
+        if self.case is not None and ms is not None:
+            self.samples[self.case][metric].append(round(ms, 1))
+
+    def as_dict(self) -> dict:
+        return {case: dict(metrics) for case, metrics in self.samples.items()}
+
+
+RECORDER = BenchmarkRecorder()
+
+
+@contextmanager
+def timed(metric: str):
+    """
+    Record how long the block took as `metric` (also when it raises).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        RECORDER.record(metric, (time.perf_counter() - started) * 1000)
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment(langs=LANGS, devices=DEVICES) -> dict:
+    """
+    What a run measured against: the matrix cells it covered (--lang /
+    --device, else LANGS / DEVICES), their URLs and the traffic mode.
+    """
+    return {
+        "langs": sorted(langs),
+        "devices": sorted(devices),
+        "base_urls": {lang: BASE_URLS[lang] for lang in sorted(langs)},
+        "traffic_mode": TRAFFIC_MODE,
+    }
+
+
+def save_baseline(cases: dict, rounds: int, path: str = BENCH_BASELINE_PATH,
+                  env: dict = None) -> dict:
+    baseline = {
+        "format": BASELINE_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "rounds": rounds,
+        "env": env or environment(),
+        "cases": cases,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+    logger.info(f"Benchmark baseline saved to {path} ({len(cases)} case(s))")
+    return baseline
+
+
+def load_baseline(path: str = BENCH_BASELINE_PATH) -> dict:
+    """
+    Read a baseline file, or None if there is none. Raises ValueError for a
+    format this version does not understand.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("format") != BASELINE_FORMAT:
+        raise ValueError(
+            f"Baseline {path} has format {baseline.get('format')!r}, expected {BASELINE_FORMAT}; "
+            "re-create it with --bench-save."
+        )
+    return baseline
+
+
+def compare(baseline_cases: dict, current_cases: dict, rel: float = BENCH_REL_THRESHOLD,
+            abs_ms: float = BENCH_ABS_THRESHOLD_MS, alpha: float = BENCH_ALPHA) -> list:
+    """
+    One row per (case, metric) measured in this run. Verdicts:
+      regression    median slower by > rel and > abs_ms, and p < alpha
+      improvement   the same, the other way round
+      ok            within thresholds or not significant
+      new           no baseline samples
+      insufficient  fewer than MIN_SAMPLES on either side (never gates)
+    """
+    rows = []
+    for case, metrics in sorted(current_cases.items()):
+        for metric, cur in sorted(metrics.items()):
+            base = baseline_cases.get(case, {}).get(metric, [])
+            row = {"case": case, "metric": metric, "n": len(cur), "base_n": len(base),
+                   "p50": round(percentile(cur, 50), 1), "base_p50": None,
+                   "delta_pct": None, "p_value": None}
+            if not base:
+                rows.append(dict(row, verdict="new"))
+                continue
+            base_p50 = percentile(base, 50)
+            delta = percentile(cur, 50) - base_p50
+            row.update(base_p50=round(base_p50, 1),
+                       delta_pct=round(100 * delta / base_p50, 1) if base_p50 else None)
+            if len(cur) < MIN_SAMPLES or len(base) < MIN_SAMPLES:
+                rows.append(dict(row, verdict="insufficient"))
+                continue
+            beyond = abs(delta) > abs_ms and abs(delta) > rel * base_p50
+            if delta > 0:
+                p = mann_whitney_greater(cur, base)
+                verdict = "regression" if beyond and p < alpha else "ok"
+            else:
+                p = mann_whitney_greater(base, cur)
+                verdict = "improvement" if beyond and p < alpha else "ok"
+            rows.append(dict(row, p_value=round(p, 4), verdict=verdict))
+    return rows
+
+
+def format_comparison(rows: list) -> str:
+    lines = []
+    for r in rows:
+        if r["verdict"] == "ok":
+            continue
+        change = f"{r['base_p50']} → {r['p50']}ms ({r['delta_pct']:+}%)" if r["base_p50"] else f"{r['p50']}ms"
+        p = f", p={r['p_value']}" if r["p_value"] is not None else ""
+        lines.append(f"{r['verdict'].upper():<12} {r['case']} {r['metric']}: {change}{p}")
+    checked = sum(1 for r in rows if r["verdict"] in ("ok", "regression", "improvement"))
+    lines.append(f"{checked} metric(s) compared against the baseline, "
+                 f"{sum(r['verdict'] == 'regression' for r in rows)} regression(s)")
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+import os
+from collections import defaultdict
+from config.config import (
+    DEVICE_PROFILES,
+    LANG,
+    LANG_LOCALES,
+    STORAGE_STATE_PATH,
+    TRAFFIC_MODE,
+    WORKER_ID,
+)
+from utils.logger import get_logger
+from utils.resource_blocking import ResourceBlocker
+from utils.traffic import TrafficReplayer, attach_traffic
+
+logger = get_logger("browser_pool")
+
+# Stub out Recaptcha so it never appears
+RECAPTCHA_STUB = """
+window.grecaptcha = {
+  ready: (cb) => cb(),
+  execute: () => Promise.resolve('TEST_TOKEN')
+};
+"""
+
+DEFAULT_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1280, "height": 800},
+    "locale": "en-US",
+    "timezone_id": "Asia/Dubai",
+}
+
+
+def context_options(lang: str = LANG, device: str = "Desktop") -> dict:
+    """
+    new_context() options for one cell of the language × device matrix:
+    the defaults plus the language's locale and the device profile.
+    """
+    return {**DEFAULT_CONTEXT_OPTIONS, "locale": LANG_LOCALES[lang], **DEVICE_PROFILES[device]}
+
+
+def artifact_name(name: str) -> str:
+    """
+    Suffix an artifact file name with the worker id so parallel workers
+    never write to the same trace / log / screenshot file.
+    """
+    if WORKER_ID == "main":
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}-{WORKER_ID}{ext}"
+
+
+class ContextPool:
+    """
+    Per-worker pool of browser contexts loaded from STORAGE_STATE_PATH.
+
+    Contexts are keyed by (profile, lang, device): the resource-blocking
+    profile plus the locale and device emulation they were built with.
+    `acquire(profile, lang, device)` hands out an idle context of that key
+    (or creates one), `release()` closes its pages and keeps it warm for
+    the next user; ContextMatrix holds one per cell for the whole session.
+    Each context gets the reCAPTCHA stub, record/replay wiring and request
+    blocking once, at creation time.
+    """
+
+    def __init__(self, browser, **context_options):
+        self.has_session = os.path.exists(STORAGE_STATE_PATH)
+        if not self.has_session and TRAFFIC_MODE != "replay":
+            raise RuntimeError(
+                "Missing session storage. Run `python -m utils.setup_session` first."
+            )
+        self.browser = browser
+        self.options = context_options
+        self._idle = defaultdict(list)
+        self._keys = {}
+        self._traffic = {}
+        self._blockers = {}
+
+    def _create(self, key: tuple):
+        profile, lang, device = key
+        ctx = self.browser.new_context(
+            storage_state=STORAGE_STATE_PATH if self.has_session else None,
+            **{**context_options(lang, device), **self.options},
+        )
+        ctx.add_init_script(RECAPTCHA_STUB)
+        self._keys[id(ctx)] = key
+        self._traffic[id(ctx)] = attach_traffic(ctx)
+        # Registered last so it sees requests before the replay route
+        self._blockers[id(ctx)] = ResourceBlocker(profile).attach(ctx)
+        logger.debug(f"[{WORKER_ID}] Created browser context ({profile}, {lang}, {device})")
+        return ctx
+
+    def acquire(self, profile: str = "full", lang: str = LANG, device: str = "Desktop"):
+        key = (profile, lang, device)
+        return self._idle[key].pop() if self._idle[key] else self._create(key)
+
+    def page_url(self, ctx, url: str) -> str:
+        """
+        Where pages of `ctx` open `url` (the replay stand-in, when it serves it).
+        """
+        traffic = self._traffic.get(id(ctx))
+        return traffic.page_url(url) if isinstance(traffic, TrafficReplayer) else url
+
+    def release(self, ctx):
+        for page in list(ctx.pages):
+            page.close()
+        self._idle[self._keys[id(ctx)]].append(ctx)
+
+    def _dispose(self, ctx):
+        self._keys.pop(id(ctx), None)
+        traffic = self._traffic.pop(id(ctx), None)
+        if traffic:
+            traffic.close()
+        self._blockers.pop(id(ctx)).close()
+        ctx.close()
+
+    def close(self):
+        for idle in self._idle.values():
+            while idle:
+                self._dispose(idle.pop())
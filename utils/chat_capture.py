@@ -0,0 +1,429 @@
+import base64
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from playwright.sync_api import Error as PlaywrightError
+from config.config import CHAT_TEXT_KEYS, LONG_TIMEOUT, STREAM_SETTLE_MS
+from utils.logger import get_logger
+from utils.traffic import is_chat_exchange
+
+logger = get_logger("chat_capture")
+
+# SignalR's JSON hub protocol terminates every message with this byte
+RECORD_SEPARATOR = b"\x1e"
+_SSE_BOUNDARY = re.compile(rb"\r?\n\r?\n")
+
+
+@dataclass
+class Chunk:
+    """
+    One piece of an answer as it arrived: ms since the request (or the
+    prompt frame) was sent, bytes, and the answer text it completed.
+    """
+    t_ms: Optional[float]
+    size: int
+    text: str = ""
+
+
+@dataclass
+class CapturedAnswer:
+    """
+    An answer put together from the chat API traffic.
+    """
+    url: str
+    transport: str          # "http", "sse", "eventsource" or "websocket"
+    text: str
+    chunks: list
+    status: Optional[int] = None
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        return next((c.t_ms for c in self.chunks if c.text), None)
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        return self.chunks[-1].t_ms if self.chunks else None
+
+
+# ——— Message parsing ——————————————————————————————————————————————
+
+def _decode(raw: bytes):
+    text = raw.decode("utf-8", "replace")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _split_on(body: bytes, sep: bytes) -> list:
+    events, start = [], 0
+    for part in body.split(sep):
+        start += len(part) + len(sep)
+        if part.strip():
+            events.append((min(start, len(body)), _decode(part)))
+    return events
+
+
+def _split_sse(body: bytes) -> list:
+    events, blocks, start = [], [], 0
+    for m in _SSE_BOUNDARY.finditer(body):
+        blocks.append((body[start:m.start()], m.end()))
+        start = m.end()
+    if body[start:].strip():
+        blocks.append((body[start:], len(body)))
+    for block, end in blocks:
+        data = [
+            line[5:].removeprefix(b" ")
+            for line in block.splitlines() if line.startswith(b"data:")
+        ]
+        if data and data != [b"[DONE]"]:
+            events.append((end, _decode(b"\n".join(data))))
+    return events
+
+
+def split_events(body: bytes, content_type: str = "") -> list:
+    """
+    (end byte offset, payload) per message of a chat response body: SSE
+    events, SignalR records, NDJSON lines, or the whole body. Payloads are
+    decoded JSON where possible, text otherwise.
+    """
+    if "event-stream" in content_type or body.lstrip().startswith((b"data:", b"event:", b"id:")):
+        return _split_sse(body)
+    if RECORD_SEPARATOR in body:
+        return _split_on(body, RECORD_SEPARATOR)
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return _split_on(body, b"\n")
+    return [(len(body), _decode(body))] if body.strip() else []
+
+
+def extract_text(payload, keys=CHAT_TEXT_KEYS) -> Optional[str]:
+    """
+    Answer text of one message: the payload itself when it is a string,
+    else the first string found under `keys` (in order), looking into
+    nested objects and lists (e.g. `choices[0].delta.content`).
+    """
+    if isinstance(payload, str):
+        return payload
+    if isinstance(payload, list):
+        return next((t for t in (extract_text(v, keys) for v in payload) if t is not None), None)
+    if not isinstance(payload, dict):
+        return None
+    for key in keys:
+        if key in payload:
+            found = extract_text(payload[key], keys)
+            if found is not None:
+                return found
+    for value in payload.values():
+        if isinstance(value, (dict, list)):
+            found = extract_text(value, keys)
+            if found is not None:
+                return found
+    return None
+
+
+def assemble(pieces) -> str:
+    """
+    Join streamed pieces into the answer. A piece that repeats everything
+    so far replaces it, so cumulative streams work as well as deltas.
+    """
+    text = ""
+    for piece in pieces:
+        text = piece if text and piece.startswith(text) else text + piece
+    return text
+
+
+def answer_from_body(url: str, body: bytes, content_type: str = "", received=(),
+                     status: int = None, meta: dict = None) -> CapturedAnswer:
+    """
+    Answer of a finished HTTP exchange. `received` is the [(t_ms, bytes)]
+    arrival log of the body; each message is credited to the chunk in which
+    its last byte arrived.
+    """
+    chunks = [Chunk(t, size) for t, size in received] or [Chunk(None, len(body))]
+    bounds, total = [], 0
+    for chunk in chunks:
+        total += chunk.size
+        bounds.append(total)
+
+    pieces, i = [], 0
+    for end, payload in split_events(body, content_type):
+        piece = extract_text(payload)
+        if not piece:
+            continue
+        while i < len(chunks) - 1 and bounds[i] < end:
+            i += 1
+        chunks[i].text += piece
+        pieces.append(piece)
+    transport = "sse" if "event-stream" in content_type else "http"
+    return CapturedAnswer(url, transport, assemble(pieces), chunks, status, meta or {})
+
+
+def frame_pieces(payload) -> list:
+    """
+    Answer text pieces of one WebSocket / EventSource message.
+    """
+    raw = payload.encode() if isinstance(payload, str) else payload
+    events = _split_on(raw, RECORD_SEPARATOR) if RECORD_SEPARATOR in raw else [(len(raw), _decode(raw))]
+    return [t for t in (extract_text(p) for _, p in events) if t]
+
+
+# ——— Capture ————————————————————————————————————————————————————————
+
+@dataclass
+class _Exchange:
+    url: str
+    transport: str
+    t0: float                       # seconds, on the clock of the events
+    status: Optional[int] = None
+    content_type: str = ""
+    received: list = field(default_factory=list)   # [(t_ms, bytes)]
+    frames: list = field(default_factory=list)     # [(t_ms, bytes, pieces)]
+    meta: dict = field(default_factory=dict)
+    seen: float = field(default_factory=time.monotonic)
+    done: bool = False
+    answer: Optional[CapturedAnswer] = None
+
+    def ms(self, t: float) -> float:
+        return round((t - self.t0) * 1000, 1)
+
+    def result(self, settle_ms: int) -> Optional[CapturedAnswer]:
+        """
+        The answer once complete: the HTTP body finished, or frames carried
+        text and then stayed quiet for `settle_ms`.
+        """
+        if self.answer is None and self.frames:
+            settled = (time.monotonic() - self.seen) * 1000 >= settle_ms
+            if self.done or settled:
+                chunks = [Chunk(t, size, "".join(p)) for t, size, p in self.frames]
+                text = assemble(p for _, _, pieces in self.frames for p in pieces)
+                if text:
+                    self.answer = CapturedAnswer(self.url, self.transport, text, chunks,
+                                                 self.status, self.meta)
+        return self.answer if self.answer and self.answer.text else None
+
+
+class ChatCapture:
+    """
+    Follow one page's chatbot API traffic (see CHAT_API_PATTERN) and put the
+    answers together from it: HTTP bodies (plain, NDJSON or SSE),
+    EventSource messages and WebSocket frames.
+
+    In Chromium it listens to the DevTools Network domain, which timestamps
+    every body chunk and frame in the browser. Elsewhere it falls back to
+    Playwright's page events: whole bodies timed by `request.timing`, frames
+    timed when Python sees them.
+    """
+
+    def __init__(self, page, settle_ms: int = STREAM_SETTLE_MS):
+        self.page = page
+        self.settle_ms = settle_ms
+        self.exchanges = []
+        self._mark = 0
+        self._http = {}       # CDP requestId → _Exchange
+        self._sockets = {}    # socket key → [url, current _Exchange]
+        self._cdp = None
+
+    def attach(self) -> "ChatCapture":
+        try:
+            self._cdp = self.page.context.new_cdp_session(self.page)
+            self._cdp.send("Network.enable")
+        except PlaywrightError:
+            self._cdp = None
+        if self._cdp is not None:
+            for event in ("requestWillBeSent", "responseReceived", "dataReceived",
+                          "eventSourceMessageReceived", "loadingFinished", "loadingFailed",
+                          "webSocketCreated", "webSocketFrameSent", "webSocketFrameReceived",
+                          "webSocketClosed"):
+                self._cdp.on(f"Network.{event}", getattr(self, f"_on_{event}"))
+        else:
+            self.page.on("requestfinished", self._on_request_finished)
+            self.page.on("websocket", self._on_websocket)
+        logger.debug(f"Capturing chat traffic ({'devtools' if self._cdp else 'page events'})")
+        return self
+
+    def detach(self):
+        if self._cdp is not None:
+            try:
+                self._cdp.detach()
+            except PlaywrightError:
+                pass
+            self._cdp = None
+
+    # ——— Exchange boundaries ———————————————————————————————————————
+
+    def mark(self):
+        """
+        Only answers that start from here on count for the next prompt.
+        """
+        self._mark = len(self.exchanges)
+
+    def clear(self):
+        self.exchanges.clear()
+        self._http.clear()
+        for sock in self._sockets.values():
+            sock[1] = None
+        self._mark = 0
+
+    def answers(self) -> list:
+        """
+        Every complete answer captured so far, in the order they started.
+        """
+        return [a for a in (ex.result(self.settle_ms) for ex in self.exchanges) if a]
+
+    def last_answer(self) -> Optional[CapturedAnswer]:
+        """
+        Latest complete answer since `mark()`: None when the current prompt's
+        answer was not captured, never an earlier prompt's.
+        """
+        answers = [a for a in (ex.result(self.settle_ms) for ex in self.exchanges[self._mark:]) if a]
+        return answers[-1] if answers else None
+
+    def wait_for_answer(self, timeout: int = LONG_TIMEOUT, poll_ms: int = 50) -> CapturedAnswer:
+        """
+        First complete answer since `mark()`, waiting up to `timeout` ms
+        (events are only delivered while Playwright is waiting).
+        """
+        deadline = time.monotonic() + timeout / 1000
+        while True:
+            for ex in self.exchanges[self._mark:]:
+                answer = ex.result(self.settle_ms)
+                if answer:
+                    return answer
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"No chat answer captured within {timeout}ms")
+            self.page.wait_for_timeout(poll_ms)
+
+    def _start(self, url: str, transport: str, t0: float) -> _Exchange:
+        ex = _Exchange(url, transport, t0)
+        self.exchanges.append(ex)
+        return ex
+
+    # ——— WebSocket frames (both event sources) ———————————————————————
+
+    def _frame_sent(self, key, t: float, payload):
+        sock = self._sockets.get(key)
+        # Pings and handshakes carry no text and do not start an answer
+        if sock is not None and frame_pieces(payload):
+            sock[1] = self._start(sock[0], "websocket", t)
+
+    def _frame_received(self, key, t: float, payload):
+        sock = self._sockets.get(key)
+        if sock is None:
+            return
+        if sock[1] is None:
+            sock[1] = self._start(sock[0], "websocket", t)
+        ex = sock[1]
+        ex.frames.append((ex.ms(t), len(payload), frame_pieces(payload)))
+        ex.seen = time.monotonic()
+
+    def _socket_closed(self, key):
+        sock = self._sockets.pop(key, None)
+        if sock and sock[1] is not None:
+            sock[1].done = True
+
+    # ——— DevTools Network events ———————————————————————————————————
+
+    def _on_requestWillBeSent(self, p: dict):
+        if p.get("type") != "WebSocket" and is_chat_exchange(p["request"]["url"]):
+            ex = self._start(p["request"]["url"], "http", p["timestamp"])
+            ex.meta["method"] = p["request"].get("method")
+            self._http[p["requestId"]] = ex
+
+    def _on_responseReceived(self, p: dict):
+        ex = self._http.get(p["requestId"])
+        if ex is None:
+            return
+        response = p["response"]
+        headers = {k.lower(): v for k, v in response.get("headers", {}).items()}
+        ex.status = response.get("status")
+        ex.content_type = headers.get("content-type", response.get("mimeType", ""))
+        ex.meta.update(content_type=ex.content_type, ttfb_ms=ex.ms(p["timestamp"]),
+                       protocol=response.get("protocol"))
+
+    def _on_dataReceived(self, p: dict):
+        ex = self._http.get(p["requestId"])
+        if ex is not None:
+            ex.received.append((ex.ms(p["timestamp"]), p["dataLength"]))
+            ex.seen = time.monotonic()
+
+    def _on_eventSourceMessageReceived(self, p: dict):
+        ex = self._http.get(p["requestId"])
+        if ex is not None:
+            ex.transport = "eventsource"
+            ex.frames.append((ex.ms(p["timestamp"]), len(p["data"]), frame_pieces(p["data"])))
+            ex.seen = time.monotonic()
+
+    def _on_loadingFinished(self, p: dict):
+        ex = self._http.pop(p["requestId"], None)
+        if ex is None:
+            return
+        ex.done = True
+        if ex.frames:
+            return
+        try:
+            res = self._cdp.send("Network.getResponseBody", {"requestId": p["requestId"]})
+        except PlaywrightError as exc:
+            logger.warning(f"Body of {ex.url} not available: {exc}")
+            return
+        body = base64.b64decode(res["body"]) if res.get("base64Encoded") else res["body"].encode()
+        ex.answer = answer_from_body(ex.url, body, ex.content_type, ex.received, ex.status, ex.meta)
+
+    def _on_loadingFailed(self, p: dict):
+        ex = self._http.pop(p["requestId"], None)
+        if ex is not None:
+            ex.done = True
+            ex.meta["error"] = p.get("errorText")
+
+    def _on_webSocketCreated(self, p: dict):
+        if is_chat_exchange(p["url"]):
+            self._sockets[p["requestId"]] = [p["url"], None]
+
+    def _on_webSocketFrameSent(self, p: dict):
+        self._frame_sent(p["requestId"], p["timestamp"], _cdp_payload(p["response"]))
+
+    def _on_webSocketFrameReceived(self, p: dict):
+        self._frame_received(p["requestId"], p["timestamp"], _cdp_payload(p["response"]))
+
+    def _on_webSocketClosed(self, p: dict):
+        self._socket_closed(p["requestId"])
+
+    # ——— Playwright page events (non-Chromium) ———————————————————————
+
+    def _on_request_finished(self, request):
+        response = request.response()
+        if response is None or not is_chat_exchange(request.url):
+            return
+        try:
+            body = response.body()
+        except PlaywrightError:
+            body = b""
+        timing = request.timing
+        ttfb = max(timing.get("responseStart", 0), 0)
+        end = max(timing.get("responseEnd", 0), ttfb)
+        content_type = response.headers.get("content-type", "")
+        ex = self._start(request.url, "http", 0.0)
+        ex.done = True
+        ex.answer = answer_from_body(
+            request.url, body, content_type, [(round(end, 1), len(body))], response.status,
+            {"method": request.method, "content_type": content_type, "ttfb_ms": round(ttfb, 1)},
+        )
+
+    def _on_websocket(self, ws):
+        if not is_chat_exchange(ws.url):
+            return
+        key = id(ws)
+        self._sockets[key] = [ws.url, None]
+        ws.on("framesent", lambda payload: self._frame_sent(key, time.monotonic(), payload))
+        ws.on("framereceived", lambda payload: self._frame_received(key, time.monotonic(), payload))
+        ws.on("close", lambda _: self._socket_closed(key))
+
+
+def _cdp_payload(frame: dict):
+    # Opcode 1 is text, anything else arrives base64 encoded
+    if frame.get("opcode", 1) == 1:
+        return frame["payloadData"]
+    return base64.b64decode(frame["payloadData"])
@@ -0,0 +1,159 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+from config.config import CORPUS_DIR, CORPUS_RECORD
+from utils.browser_pool import artifact_name
+from utils.data_loader import iter_cases
+from utils.validators import (
+    validate_ai_reply,
+    validate_cross_lang_reply,
+    validate_security_reply,
+)
+
+class ResponseCorpus:
+    """
+    Append-only JSONL log of every captured reply, one compact line each:
+
+      {"suite": "ai", "case": "golden_visa_reqs", "role": "primary",
+       "lang": "en", "prompt": ..., "reply": ..., "user_text": null,
+       "ttft_ms": 812.4, "total_ms": 4120.0, "at": 1760000000.0}
+
+    Each worker appends to its own file (responses-gwN.jsonl), readers merge
+    all of them, so parallel runs never interleave lines. With `enabled`
+    off, add() only builds the record.
+    """
+
+    def __init__(self, root: str = CORPUS_DIR, enabled: bool = CORPUS_RECORD):
+        self.root = root
+        self.enabled = enabled
+        self.path = os.path.join(root, artifact_name("responses.jsonl"))
+        self._lock = threading.Lock()
+
+    def add(self, suite: str, case: str, lang: str, prompt: str, reply: str,
+            role: str = "primary", user_text: str = None, metrics=None) -> dict:
+        record = {
+            "suite": suite,
+            "case": case,
+            "role": role,
+            "lang": lang,
+            "prompt": prompt,
+            "reply": reply,
+            "user_text": user_text,
+            "ttft_ms": getattr(metrics, "ttft_ms", None),
+            "total_ms": getattr(metrics, "total_ms", None),
+            "at": round(time.time(), 3),
+        }
+        if not self.enabled:
+            return record
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return record
+
+    def records(self):
+        """
+        Every record of every worker file, oldest file first.
+        """
+        for path in sorted(glob.glob(os.path.join(self.root, "responses*.jsonl"))):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def latest(self) -> list:
+        """
+        The most recent record per (suite, case, role, lang).
+        """
+        latest = {}
+        for rec in self.records():
+            key = (rec["suite"], rec["case"], rec["role"], rec["lang"])
+            if key not in latest or rec["at"] >= latest[key]["at"]:
+                latest[key] = rec
+        return list(latest.values())
+
+
+def load_cases(ai_source: str = None, sec_source: str = None) -> dict:
+    """
+    Current case definitions keyed like corpus records: (suite, case id).
+    Sources default to DATA_SOURCES.
+    """
+    cases = {("ai", case["id"]): case for case in iter_cases("ai", ai_source)}
+    cases.update({("sec", case["name"]): case for case in iter_cases("security", sec_source)})
+    return cases
+
+
+def validate_record(record: dict, case: dict) -> list:
+    """
+    Re-run the validators that guard `record`'s test against its reply.
+    """
+    if record["suite"] == "sec":
+        return validate_security_reply(case, record["reply"], record["user_text"], record["lang"])
+    if record["role"] == "cross_lang":
+        return validate_cross_lang_reply(case, record["reply"], record["lang"])
+    return validate_ai_reply(case, record["reply"], record["lang"])
+
+
+def validate_corpus(corpus: ResponseCorpus, cases: dict, history: bool = False) -> list:
+    """
+    Validate the latest reply of every case (or every stored reply with
+    `history`) against the current case definitions. Returns one result per
+    record: record, failures, and `stale` when its case no longer exists.
+    """
+    results = []
+    for record in (corpus.records() if history else corpus.latest()):
+        case = cases.get((record["suite"], record["case"]))
+        if case is None:
+            results.append({"record": record, "failures": [], "stale": True})
+            continue
+        results.append({"record": record, "failures": validate_record(record, case), "stale": False})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-run the reply validators against the stored response corpus (no browser)."
+    )
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--ai-data", default=None, help="AI case source (default: DATA_SOURCES)")
+    parser.add_argument("--sec-data", default=None, help="Security case source")
+    parser.add_argument("--all", action="store_true", help="Every stored reply, not just the latest")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print failures")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = validate_corpus(
+        ResponseCorpus(args.corpus), load_cases(args.ai_data, args.sec_data), history=args.all
+    )
+    elapsed = time.perf_counter() - started
+
+    failed = stale = 0
+    for res in results:
+        rec = res["record"]
+        role = "" if rec["role"] == "primary" else f", {rec['role']}"
+        label = f"{rec['suite']}/{rec['case']} [{rec['lang']}{role}]"
+        if res["stale"]:
+            stale += 1
+            if not args.quiet:
+                print(f"STALE {label}: case no longer defined")
+        elif res["failures"]:
+            failed += 1
+            print(f"FAIL  {label}")
+            for msg in res["failures"]:
+                print(f"      {msg}")
+        elif not args.quiet:
+            print(f"PASS  {label}")
+    print(
+        f"{len(results)} repl(ies) validated in {elapsed * 1000:.1f}ms: "
+        f"{len(results) - failed - stale} passed, {failed} failed, {stale} stale"
+    )
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import codecs
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+
+from config.config import DATA_INDEX_CACHE, DATA_SOURCES, PROJECT_ROOT
+from utils.logger import get_logger
+
+logger = get_logger("data_loader")
+
+SCHEMA_VERSION = 2
+_CHUNK = 1 << 16
+_DECODER = json.JSONDecoder()
+
+
+class DataError(ValueError):
+    """
+    A case file is missing, malformed or does not match its suite's schema.
+    """
+
+
+# ——— Schemas ———————————————————————————————————————————————————————
+# Required keys and their types per suite, plus the fields a case is
+# selected by (id, category, intent).
+
+_LANGS = ("en", "ar")
+
+SUITES = {
+    "ai": {
+        "required": {"id": str, "category": str, "intent": str, "prompts": dict,
+                     "expected_keywords": dict, "validate": dict},
+        "fields": lambda c: (c["id"], c["category"], c["intent"]),
+    },
+    "security": {
+        "required": {"name": str, "type": str, "payload": str},
+        "fields": lambda c: (c["name"], c["type"], c["name"]),
+    },
+}
+
+
+def validate_case(suite: str, case) -> list:
+    """
+    Schema errors of one case (empty when it is valid).
+    """
+    if not isinstance(case, dict):
+        return [f"expected an object, got {type(case).__name__}"]
+    errors = [
+        f"`{key}` must be {typ.__name__}" if key in case else f"missing `{key}`"
+        for key, typ in SUITES[suite]["required"].items()
+        if not isinstance(case.get(key), typ)
+    ]
+    if errors:
+        return errors
+    if suite == "ai":
+        for key in ("prompts", "expected_keywords"):
+            missing = [lang for lang in _LANGS if lang not in case[key]]
+            if missing:
+                errors.append(f"`{key}` has no {', '.join(missing)}")
+        if any(not isinstance(v, list) for v in case["expected_keywords"].values()):
+            errors.append("`expected_keywords` values must be lists")
+    elif case["type"] == "sanitization" and not isinstance(case.get("expect_user_shows"), str):
+        errors.append("sanitization case needs `expect_user_shows`")
+    elif case["type"] == "injection":
+        keywords = case.get("expect_bot_contains")
+        if isinstance(keywords, dict):
+            missing = [lang for lang in _LANGS if not isinstance(keywords.get(lang), list)]
+            if missing:
+                errors.append(f"`expect_bot_contains` has no {', '.join(missing)} list")
+        elif not isinstance(keywords, list):
+            errors.append("injection case needs an `expect_bot_contains` list (or one per language)")
+    return errors
+
+
+# ——— Streaming readers ——————————————————————————————————————————————
+
+def _iter_jsonl(path: str):
+    """
+    (byte offset, case) per non-empty line.
+    """
+    with open(path, "rb") as f:
+        offset = 0
+        for lineno, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield offset, json.loads(line)
+                except ValueError as exc:
+                    raise DataError(f"{path}:{lineno}: invalid JSON ({exc})") from None
+            offset += len(line)
+
+
+def _iter_json_array(path: str):
+    """
+    (byte offset, case) per element of a top-level JSON array, decoding one
+    element at a time from a sliding buffer instead of loading the file.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf, base, pos = "", 0, 0   # base: byte offset of buf[0]
+    opened = eof = False
+    with open(path, "rb") as f:
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","
+                                      or (buf[pos] == "[" and not opened)):
+                opened = opened or buf[pos] == "["
+                pos += 1
+            if pos < len(buf):
+                if not opened:
+                    raise DataError(f"{path}: expected a JSON array of cases")
+                if buf[pos] == "]":
+                    return
+                try:
+                    case, end = _DECODER.raw_decode(buf, pos)
+                except ValueError:
+                    if eof:
+                        raise DataError(f"{path}: invalid JSON near byte {base + len(buf[:pos].encode())}") from None
+                else:
+                    yield base + len(buf[:pos].encode()), case
+                    base += len(buf[:end].encode())
+                    buf, pos = buf[end:], 0
+                    continue
+            elif eof:
+                raise DataError(f"{path}: unterminated JSON array")
+            chunk = f.read(_CHUNK)
+            eof = not chunk
+            buf += utf8.decode(chunk, final=eof)
+
+
+def iter_file(path: str):
+    """
+    Stream (byte offset, case) pairs from a .json array or a .jsonl file.
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        return _iter_jsonl(path)
+    return _iter_json_array(path)
+
+
+def read_case_at(path: str, offset: int) -> dict:
+    """
+    Decode the single case starting at `offset` (as recorded in the index).
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(_CHUNK)
+            buf += utf8.decode(chunk, final=not chunk)
+            try:
+                return _DECODER.raw_decode(buf.lstrip())[0]
+            except ValueError:
+                if not chunk:
+                    raise DataError(f"{path}: no case at byte {offset}") from None
+
+
+# ——— Index ————————————————————————————————————————————————————————————
+
+@dataclass(frozen=True)
+class CaseRef:
+    """
+    Where a case lives plus the fields it is selected by; `load()` reads
+    only that case. Used as the pytest parameter, so collection never
+    holds full cases.
+    """
+    suite: str
+    path: str
+    offset: int
+    id: str
+    category: str
+    intent: str
+    sha1: str = ""
+
+    def load(self) -> dict:
+        return read_case_at(self.path, self.offset)
+
+    def __str__(self) -> str:
+        return self.id
+
+
+def resolve(source: str) -> list:
+    """
+    Absolute case files of a source: a file, every .json/.jsonl shard of a
+    directory (sorted), or the matches of a glob.
+    """
+    path = source if os.path.isabs(source) else os.path.join(PROJECT_ROOT, source)
+    if os.path.isdir(path):
+        files = [p for ext in ("*.json", "*.jsonl", "*.ndjson") for p in glob.glob(os.path.join(path, ext))]
+    elif glob.has_magic(path):
+        files = glob.glob(path)
+    else:
+        files = [path] if os.path.exists(path) else []
+    if not files:
+        raise DataError(f"No case files found for {source!r} (looked at {path})")
+    return sorted(files)
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def case_sha1(case: dict) -> str:
+    """
+    Hash of a case's content, independent of key order and formatting.
+    """
+    canonical = json.dumps(case, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class IndexCache:
+    """
+    JSON file of per-file verdicts: {path: {sha1, schema, suite, cases}},
+    where cases are [offset, id, category, intent, case sha1]. A file whose hash is
+    unchanged is neither parsed nor validated again.
+    """
+
+    def __init__(self, path: str = DATA_INDEX_CACHE):
+        self.path = path
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def entries(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, path: str, suite: str, sha1: str):
+        entry = self.entries.get(path)
+        if entry and entry["sha1"] == sha1 and entry["suite"] == suite and entry["schema"] == SCHEMA_VERSION:
+            return entry["cases"]
+        return None
+
+    def put(self, path: str, suite: str, sha1: str, cases: list):
+        self.entries[path] = {"sha1": sha1, "suite": suite, "schema": SCHEMA_VERSION, "cases": cases}
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+def index_file(suite: str, path: str, cache: IndexCache) -> list:
+    """
+    CaseRefs of one file: from the cache when its hash is known, otherwise
+    by streaming and validating every case (all errors reported at once).
+    """
+    sha1 = file_sha1(path)
+    rows = cache.get(path, suite, sha1)
+    if rows is None:
+        rows, errors = [], []
+        fields = SUITES[suite]["fields"]
+        for n, (offset, case) in enumerate(iter_file(path)):
+            problems = validate_case(suite, case)
+            if problems:
+                errors.append(f"  case #{n}: {'; '.join(problems)}")
+                continue
+            rows.append([offset, *fields(case), case_sha1(case)])
+        if errors:
+            shown = "\n".join(errors[:20])
+            more = f"\n  … and {len(errors) - 20} more" if len(errors) > 20 else ""
+            raise DataError(f"{path} does not match the {suite!r} schema:\n{shown}{more}")
+        cache.put(path, suite, sha1, rows)
+        logger.debug(f"Indexed {len(rows)} {suite} case(s) from {path}")
+    return [CaseRef(suite, path, *row) for row in rows]
+
+
+def _wanted(value: str, patterns) -> bool:
+    return not patterns or any(fnmatch.fnmatchcase(value.lower(), p.lower()) for p in patterns)
+
+
+def select(suite: str, source: str = None, ids=None, categories=None, intents=None,
+           cache: IndexCache = None) -> list:
+    """
+    CaseRefs of `suite` (from DATA_SOURCES unless `source` is given),
+    filtered by id / category / intent glob patterns, using only the index.
+    Raises DataError on schema errors or duplicate ids.
+    """
+    if suite not in SUITES:
+        raise DataError(f"Unknown suite {suite!r}; expected one of {sorted(SUITES)}")
+    cache = cache or IndexCache()
+    refs = []
+    try:
+        for path in resolve(source or DATA_SOURCES[suite]):
+            refs.extend(index_file(suite, path, cache))
+    finally:
+        cache.save()
+
+    seen = {}
+    for ref in refs:
+        if ref.id in seen:
+            raise DataError(f"Duplicate {suite} case id {ref.id!r} in {seen[ref.id]} and {ref.path}")
+        seen[ref.id] = ref.path
+    return [
+        ref for ref in refs
+        if _wanted(ref.id, ids) and _wanted(ref.category, categories) and _wanted(ref.intent, intents)
+    ]
+
+
+def iter_cases(suite: str, source: str = None, **filters):
+    """
+    Stream the selected cases themselves.
+    """
+    for ref in select(suite, source, **filters):
+        yield ref.load()
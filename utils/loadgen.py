@@ -0,0 +1,317 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import asdict
+
+from playwright.async_api import async_playwright
+from config.config import (
+    BASE_URLS,
+    LANG,
+    LOAD_DURATION_S,
+    LOAD_REPORT_DIR,
+    LOAD_USERS,
+    STORAGE_STATE_PATH,
+)
+from pages.async_chatbot_page import AsyncChatbotPage
+from utils.browser_pool import DEFAULT_CONTEXT_OPTIONS, RECAPTCHA_STUB
+from utils.data_loader import iter_file, resolve
+from utils.logger import get_logger
+from utils.stats import summarize
+
+logger = get_logger("loadgen")
+
+
+def load_prompts(sources: list, lang: str = LANG) -> list:
+    """
+    Prompts from case sources (files, shard directories, globs):
+    `prompts[lang]` of AI cases, `payload` of security cases.
+    """
+    prompts = []
+    for source in sources:
+        for path in resolve(source):
+            for _, case in iter_file(path):
+                if "prompts" in case:
+                    prompts.append(case["prompts"][lang])
+                elif "payload" in case:
+                    prompts.append(case["payload"])
+    if not prompts:
+        raise ValueError(f"No prompts found in {sources}")
+    return prompts
+
+
+# HTTP status of a failed turn, as the stand-in page marks it on the bot bubble
+_FAILED_TURN_JS = """
+(sel) => {
+  const items = document.querySelectorAll(sel);
+  const last = items[items.length - 1];
+  return last && last.dataset.status ? Number(last.dataset.status) : null;
+}
+"""
+
+
+class AnswerError(Exception):
+    """
+    The page rendered an error in place of an answer.
+    """
+
+
+class BrowserUser:
+    """
+    One simulated user: own context and page, opened once, asking question
+    after question in the same conversation.
+    """
+
+    def __init__(self, browser, lang: str = LANG, url: str = None, input_profile: str = "paste"):
+        self.browser = browser
+        self.lang = lang
+        self.url = url or BASE_URLS[lang]
+        self.input_profile = input_profile
+        self.ctx = None
+        self.bot = None
+
+    async def start(self) -> "BrowserUser":
+        self.ctx = await self.browser.new_context(
+            storage_state=STORAGE_STATE_PATH if os.path.exists(STORAGE_STATE_PATH) else None,
+            **DEFAULT_CONTEXT_OPTIONS,
+        )
+        await self.ctx.add_init_script(RECAPTCHA_STUB)
+        page = await self.ctx.new_page()
+        self.bot = AsyncChatbotPage(page, lang=self.lang, input_profile=self.input_profile)
+        await self.bot.open(self.url)
+        await self.bot.accept_cookies()
+        return self
+
+    async def ask(self, prompt: str) -> dict:
+        await self.bot.send_message(prompt)
+        metrics = await self.bot.wait_for_response()
+        status = await self.bot.page.evaluate(_FAILED_TURN_JS, self.bot.sel["bot_conts"])
+        if status is not None:
+            raise AnswerError(f"HTTP {status}: {metrics.text[:100]}")
+        return asdict(metrics)
+
+    async def close(self):
+        if self.ctx is not None:
+            await self.ctx.close()
+
+
+def _error_kind(exc: BaseException) -> str:
+    return type(exc).__name__
+
+
+async def _timed(coro) -> dict:
+    started = time.monotonic()
+    try:
+        result = await coro
+        result = {"ok": True, **{k: result.get(k) for k in ("ttft_ms", "total_ms")}}
+    except Exception as exc:
+        result = {"ok": False, "error": _error_kind(exc), "detail": str(exc)[:200]}
+    result["wall_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+
+async def run_closed(open_user, prompts: list, users: int = LOAD_USERS,
+                     duration: float = LOAD_DURATION_S, think_time: float = 0.0) -> list:
+    """
+    Closed loop: `users` users each ask, wait for the answer, think, ask
+    again until `duration` seconds have passed. A user whose turn failed is
+    replaced by a fresh one, since its page state is unknown.
+    Returns one sample per attempted turn (user start-up failures included).
+    """
+    samples = []
+    t0 = time.monotonic()
+    deadline = t0 + duration
+    cycle = itertools.cycle(prompts)
+
+    async def user_loop(n: int):
+        user = None
+        while time.monotonic() < deadline:
+            if user is None:
+                try:
+                    user = await open_user()
+                except Exception as exc:
+                    logger.warning(f"User {n} failed to start: {exc!r}")
+                    samples.append({"user": n, "t": round(time.monotonic() - t0, 3), "ok": False,
+                                    "error": _error_kind(exc), "detail": str(exc)[:200]})
+                    await asyncio.sleep(min(1.0, max(deadline - time.monotonic(), 0)))
+                    continue
+            prompt = next(cycle)
+            sample = await _timed(user.ask(prompt))
+            samples.append({"user": n, "t": round(time.monotonic() - t0, 3), "prompt": prompt, **sample})
+            if not sample["ok"]:
+                await user.close()
+                user = None
+            elif think_time:
+                await asyncio.sleep(think_time)
+        if user is not None:
+            await user.close()
+
+    await asyncio.gather(*(user_loop(n) for n in range(users)))
+    return samples
+
+
+async def run_open(open_user, prompts: list, rate: float, duration: float = LOAD_DURATION_S,
+                   max_in_flight: int = 100, seed: int = None) -> list:
+    """
+    Open loop: new one-question conversations arrive as a Poisson process at
+    `rate` per second for `duration` seconds, whether or not earlier ones
+    have finished. Arrivals beyond `max_in_flight` are rejected and counted
+    as "Overloaded" errors (the generator, not the bot, hit its limit).
+    """
+    rng = random.Random(seed)
+    samples = []
+    tasks = []
+    in_flight = 0
+    t0 = time.monotonic()
+    cycle = itertools.cycle(prompts)
+
+    async def one(prompt: str, at: float):
+        nonlocal in_flight
+
+        async def conversation():
+            user = await open_user()
+            try:
+                return await user.ask(prompt)
+            finally:
+                await user.close()
+
+        try:
+            sample = await _timed(conversation())
+        finally:
+            in_flight -= 1
+        samples.append({"t": round(at, 3), "prompt": prompt, **sample})
+
+    next_at = rng.expovariate(rate)
+    while next_at < duration:
+        await asyncio.sleep(max(t0 + next_at - time.monotonic(), 0))
+        prompt = next(cycle)
+        if in_flight >= max_in_flight:
+            samples.append({"t": round(next_at, 3), "prompt": prompt, "ok": False,
+                            "error": "Overloaded", "wall_ms": 0.0})
+        else:
+            in_flight += 1
+            tasks.append(asyncio.ensure_future(one(prompt, next_at)))
+        next_at += rng.expovariate(rate)
+
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def summarize_run(samples: list, elapsed_s: float) -> dict:
+    """
+    Throughput, error rate / kinds and TTFT / completion percentiles.
+    """
+    ok = [s for s in samples if s["ok"]]
+    errors = Counter(s["error"] for s in samples if not s["ok"])
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "errors_by_kind": dict(errors),
+        "elapsed_s": round(elapsed_s, 2),
+        "throughput_rps": round(len(ok) / elapsed_s, 3) if elapsed_s > 0 else 0.0,
+        "ttft_ms": summarize(s.get("ttft_ms") for s in ok),
+        "total_ms": summarize(s.get("total_ms") for s in ok),
+    }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"{summary['requests']} request(s) in {summary['elapsed_s']}s: "
+        f"{summary['ok']} ok, {summary['errors']} failed "
+        f"({summary['error_rate']:.1%}), {summary['throughput_rps']} answers/s",
+    ]
+    for metric in ("ttft_ms", "total_ms"):
+        s = summary[metric]
+        lines.append(
+            f"  {metric:<9} p50={s['p50']} p95={s['p95']} p99={s['p99']} max={s['max']} (n={s['count']})"
+        )
+    for kind, count in sorted(summary["errors_by_kind"].items(), key=lambda kv: -kv[1]):
+        lines.append(f"  error {kind}: {count}")
+    return "\n".join(lines)
+
+
+async def run_load(prompts: list, lang: str = LANG, url: str = None, users: int = LOAD_USERS,
+                   rate: float = None, duration: float = LOAD_DURATION_S, think_time: float = 0.0,
+                   max_in_flight: int = 100, input_profile: str = "paste",
+                   headless: bool = True) -> dict:
+    """
+    Drive the chatbot from one browser, closed loop (`users`) or open loop
+    (`rate`), and return the summary plus the raw samples.
+    """
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=headless)
+
+        async def open_user():
+            user = BrowserUser(browser, lang, url, input_profile)
+            try:
+                return await user.start()
+            except Exception:
+                await user.close()
+                raise
+
+        started = time.monotonic()
+        try:
+            if rate:
+                samples = await run_open(open_user, prompts, rate, duration, max_in_flight)
+            else:
+                samples = await run_closed(open_user, prompts, users, duration, think_time)
+        finally:
+            await browser.close()
+    summary = summarize_run(samples, time.monotonic() - started)
+    mode = {"rate": rate} if rate else {"users": users, "think_time": think_time}
+    return {"lang": lang, "url": url or BASE_URLS[lang], "duration": duration, **mode,
+            "summary": summary, "samples": samples}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test U-Ask with concurrent simulated users.")
+    parser.add_argument("--data", nargs="+", default=["data/test_ai.json"],
+                        help="Case sources (files, shard directories, globs) to take prompts from")
+    parser.add_argument("--lang", default=LANG, choices=sorted(BASE_URLS))
+    parser.add_argument("--users", type=int, default=LOAD_USERS, help="Closed loop: concurrent users")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Open loop: new conversations per second (overrides --users)")
+    parser.add_argument("--duration", type=float, default=LOAD_DURATION_S, help="Seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop pause (s)")
+    parser.add_argument("--max-in-flight", type=int, default=100)
+    parser.add_argument("--input-profile", default="paste")
+    parser.add_argument("--url", default=None, help="Override the chatbot URL")
+    parser.add_argument("--standin", action="store_true",
+                        help="Run against the local synthetic stand-in (offline)")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--out", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    prompts = load_prompts(args.data, args.lang)
+    server = None
+    url = args.url
+    if args.standin:
+        from utils.standin import StandInServer
+        server = StandInServer().start()
+        url = server.chat_url(args.lang)
+    try:
+        report = asyncio.run(run_load(
+            prompts, args.lang, url, users=args.users, rate=args.rate, duration=args.duration,
+            think_time=args.think_time, max_in_flight=args.max_in_flight,
+            input_profile=args.input_profile, headless=not args.headed,
+        ))
+    finally:
+        if server:
+            server.stop()
+
+    out = args.out or os.path.join(LOAD_REPORT_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(format_summary(report["summary"]))
+    print(f"Report: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,112 @@
 import logging
-import io
+import os
+import re
+import threading
+from collections import deque
+from config.config import (
+    LOG_CAPTURE_LEVEL,
+    LOG_CAPTURE_LOGGERS,
+    LOG_CAPTURE_MAX_RECORDS,
+    LOG_SPILL_DIR,
+    WORKER_ID,
+)
 
-LOG_STREAM = io.StringIO()
+# Every framework logger lives under this namespace
+ROOT_LOGGER = "uask"
 
-handler = logging.StreamHandler(LOG_STREAM)
-handler.setFormatter(
-    logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
-)
-logging.root.setLevel(logging.DEBUG)
-logging.root.addHandler(handler)
+FORMATTER = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+
+class LogCapture:
+    """
+    Log lines of one test, kept in a ring buffer of `max_records` lines.
+    Lines pushed out of the buffer are appended to a spill file instead of
+    being dropped, so memory stays flat however long the test runs.
+    """
+
+    def __init__(self, name: str, max_records: int = LOG_CAPTURE_MAX_RECORDS,
+                 spill_dir: str = LOG_SPILL_DIR):
+        self.name = name
+        self.thread = threading.get_ident()
+        self.lines = deque(maxlen=max_records)
+        self.spill_dir = spill_dir
+        self.spill_path = None
+        self.spilled = 0
+        self._spill_file = None
+
+    def add(self, line: str):
+        if len(self.lines) == self.lines.maxlen:
+            self._spill(self.lines[0])
+        self.lines.append(line)
+
+    def _spill(self, line: str):
+        if self._spill_file is None:
+            safe = re.sub(r"[^\w.\-\[\]]+", "_", self.name)
+            suffix = "" if WORKER_ID == "main" else f"-{WORKER_ID}"
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self.spill_path = os.path.join(self.spill_dir, f"{safe}{suffix}.log")
+            self._spill_file = open(self.spill_path, "w", encoding="utf-8")
+        self._spill_file.write(line + "\n")
+        self.spilled += 1
+
+    def getvalue(self) -> str:
+        text = "\n".join(self.lines)
+        if self.spilled:
+            self._spill_file.flush()
+            text = f"[{self.spilled} earlier line(s) in {self.spill_path}]\n{text}"
+        return text
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+
+class CaptureHandler(logging.Handler):
+    """
+    Route each record to the LogCapture started by the thread that emitted
+    it, so concurrently running tests never see each other's lines. Records
+    below `level` or outside the `loggers` namespaces are ignored.
+    """
+
+    def __init__(self, level: str = LOG_CAPTURE_LEVEL, loggers: list = LOG_CAPTURE_LOGGERS):
+        super().__init__(level)
+        self.setFormatter(FORMATTER)
+        self.loggers = tuple(loggers)
+        self._captures = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, **kwargs) -> LogCapture:
+        capture = LogCapture(name, **kwargs)
+        with self._lock:
+            self._captures[capture.thread] = capture
+        return capture
+
+    def stop(self, capture: LogCapture):
+        with self._lock:
+            if self._captures.get(capture.thread) is capture:
+                del self._captures[capture.thread]
+        capture.close()
+
+    def _wanted(self, name: str) -> bool:
+        return not self.loggers or any(
+            name == prefix or name.startswith(prefix + ".") for prefix in self.loggers
+        )
+
+    def emit(self, record: logging.LogRecord):
+        capture = self._captures.get(record.thread)
+        if capture is None or not self._wanted(record.name):
+            return
+        try:
+            capture.add(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+CAPTURE = CaptureHandler()
+logging.getLogger(ROOT_LOGGER).setLevel(logging.DEBUG)
+logging.root.addHandler(CAPTURE)
 
 
 def get_logger(name: str) -> logging.Logger:
-    return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
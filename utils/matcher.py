@@ -0,0 +1,182 @@
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Letters folded together after decomposition (hamza / madda marks are
+# combining characters, so أ إ آ ؤ ئ already lose them in NFKD)
+_ARABIC_FOLD = {
+    "ٱ": "ا",   # alef wasla
+    "ى": "ي",   # alef maksura
+    "ة": "ه",   # ta marbuta
+    "ـ": "",    # tatweel
+    "ء": "",    # standalone hamza
+}
+
+# Proclitics that may precede a keyword inside the same Arabic word
+ARABIC_PROCLITICS = frozenset({
+    "و", "ف", "ب", "ك", "ل", "ال", "وال", "فال", "بال", "كال", "لل", "ولل", "فلل", "وب", "ول",
+})
+
+BOUNDARIES = ("none", "start", "word")
+
+
+@lru_cache(maxsize=None)
+def _fold_char(ch: str, fold_accents: bool) -> str:
+    out = []
+    for c in unicodedata.normalize("NFKD", ch).casefold():
+        if c.isspace():
+            c = " "
+        elif fold_accents and unicodedata.category(c) == "Mn":
+            continue
+        out.append(_ARABIC_FOLD.get(c, c))
+    return "".join(out)
+
+
+def normalize_with_map(text: str, fold_accents: bool = True) -> tuple:
+    """
+    Normalized `text` plus, for every normalized character, the index of
+    the original character it came from.
+
+    NFKD + casefold; with `fold_accents` combining marks are dropped
+    (Latin accents, Arabic harakat, hamza / madda on alef, waw and ya), and
+    Arabic letter variants are folded (ٱ→ا, ى→ي, ة→ه, no tatweel). Runs
+    of whitespace (newlines, NBSP, ...) become a single space, so a
+    keyword still matches a reply that wraps or double-spaces it.
+    """
+    folded = [_fold_char(ch, fold_accents) for ch in text]
+    norm = "".join(folded)
+    if len(norm) == len(text) and "  " not in norm:
+        return norm, range(len(text))
+    chars, index = [], []
+    for i, f in enumerate(folded):
+        for c in f:
+            if c == " " and chars and chars[-1] == " ":
+                continue
+            chars.append(c)
+            index.append(i)
+    return "".join(chars), index
+
+
+def normalize(text: str, fold_accents: bool = True) -> str:
+    return normalize_with_map(text, fold_accents)[0]
+
+
+@dataclass(frozen=True)
+class Match:
+    """
+    A keyword occurrence; `start` / `end` index the original text.
+    """
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over normalized keywords: one pass over a reply
+    finds every occurrence of every keyword.
+
+    boundary:
+      "none"   plain substring
+      "start"  the keyword starts a word (suffixes allowed; Arabic
+               proclitics such as و / ال / بال may precede it)
+      "word"   whole words only (Arabic proclitics still allowed)
+    """
+
+    def __init__(self, keywords, boundary: str = "start", fold_accents: bool = True):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary {boundary!r}; expected one of {BOUNDARIES}")
+        self.keywords = list(dict.fromkeys(keywords))
+        self.boundary = boundary
+        self.fold_accents = fold_accents
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for kw in self.keywords:
+            self._add(kw)
+        self._link()
+
+    def _add(self, keyword: str):
+        pattern = normalize(keyword, self.fold_accents).strip()
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, len(pattern)))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _at_boundary(self, text: str, start: int, end: int) -> bool:
+        if self.boundary == "none":
+            return True
+        word_start = start
+        while word_start > 0 and text[word_start - 1].isalnum():
+            word_start -= 1
+        prefix = text[word_start:start]
+        if prefix and prefix not in ARABIC_PROCLITICS:
+            return False
+        return self.boundary == "start" or end == len(text) or not text[end].isalnum()
+
+    def find(self, text: str) -> list:
+        """
+        Every keyword occurrence in `text`, in order of appearance.
+        """
+        norm, index = normalize_with_map(text, self.fold_accents)
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for pos, ch in enumerate(norm):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword, length in out[state]:
+                start, end = pos + 1 - length, pos + 1
+                if self._at_boundary(norm, start, end):
+                    matches.append(Match(keyword, index[start], index[end - 1] + 1))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def matched(self, text: str) -> list:
+        """
+        Keywords found in `text`, in keyword order.
+        """
+        found = {m.keyword for m in self.find(text)}
+        return [kw for kw in self.keywords if kw in found]
+
+    def missing(self, text: str) -> list:
+        found = set(self.matched(text))
+        return [kw for kw in self.keywords if kw not in found]
+
+    def search(self, text: str) -> bool:
+        return bool(self.find(text))
+
+
+@lru_cache(maxsize=1024)
+def _compiled(keywords: tuple, boundary: str, fold_accents: bool) -> KeywordMatcher:
+    return KeywordMatcher(keywords, boundary, fold_accents)
+
+
+def keyword_matcher(keywords, boundary: str = "start", fold_accents: bool = True) -> KeywordMatcher:
+    """
+    Compiled matcher for `keywords`, built once per distinct keyword list.
+    """
+    return _compiled(tuple(keywords), boundary, fold_accents)
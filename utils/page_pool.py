@@ -0,0 +1,137 @@
+from collections import defaultdict
+from playwright.sync_api import Error as PlaywrightError
+from config.config import BASE_URLS, PAGE_POOL_SIZE
+from pages.chatbot_page import ChatbotPage
+from utils.logger import get_logger
+
+logger = get_logger("page_pool")
+
+
+class PagePool:
+    """
+    Chatbot pages that are already open, with cookies accepted, per
+    (lang, device) on one context; `size` pages (slots) per key. The
+    context is expected to carry the device's emulation already (see
+    ContextMatrix), pages are not resized. `url_for` maps the language's
+    URL to the one pages open (e.g. the replay stand-in).
+
+    `release()` resets the conversation in place and keeps the page for the
+    next test, so each slot pays the page load once. Pages of failed tests
+    are closed instead, since their state is unknown, and the slot is
+    refilled right away: the replacement is only awaited up to navigation
+    commit, the browser finishes loading it in the background.
+    """
+
+    def __init__(self, context, size: int = PAGE_POOL_SIZE, url_for=None):
+        self.context = context
+        self.size = size
+        self.url_for = url_for or (lambda url: url)
+        self._ready = defaultdict(list)
+        self._warming = defaultdict(list)
+        self._in_use = defaultdict(int)
+        self._keys = {}
+
+    def _slots_taken(self, key: tuple) -> int:
+        return len(self._ready[key]) + len(self._warming[key]) + self._in_use[key]
+
+    def _start(self, key: tuple):
+        lang, device = key
+        page = self.context.new_page()
+        bot = ChatbotPage(page, lang=lang, device=device)
+        bot.start_open(self.url_for(BASE_URLS[lang]))
+        self._keys[id(bot)] = key
+        self._warming[key].append(bot)
+
+    def _refill(self, key: tuple):
+        while self._slots_taken(key) < self.size:
+            self._start(key)
+
+    def prewarm(self, lang: str, device: str = "Desktop"):
+        self._refill((lang, device))
+
+    def acquire(self, lang: str, device: str = "Desktop") -> ChatbotPage:
+        key = (lang, device)
+        if self._ready[key]:
+            bot = self._ready[key].pop()
+        else:
+            if not self._warming[key]:
+                self._start(key)
+            bot = self._warming[key].pop(0)
+            try:
+                bot.finish_open()
+                bot.accept_cookies()
+            except Exception:
+                # Give the slot back with a fresh page instead of leaking it
+                self._keys.pop(id(bot), None)
+                if not bot.page.is_closed():
+                    bot.page.close()
+                self._refill(key)
+                raise
+        self._in_use[key] += 1
+        logger.debug(f"Acquired warm page ({lang}, {device})")
+        return bot
+
+    def release(self, bot: ChatbotPage, reuse: bool = True):
+        key = self._keys[id(bot)]
+        self._in_use[key] -= 1
+        if reuse and self._slots_taken(key) < self.size and not bot.page.is_closed():
+            try:
+                bot.reset_conversation()
+                self._ready[key].append(bot)
+                return
+            except PlaywrightError as exc:
+                logger.warning(f"Reset failed, discarding page: {exc}")
+        self._keys.pop(id(bot), None)
+        if not bot.page.is_closed():
+            bot.page.close()
+        self._refill(key)
+
+    def close(self):
+        for bots in list(self._ready.values()) + list(self._warming.values()):
+            for bot in bots:
+                if not bot.page.is_closed():
+                    bot.page.close()
+        self._ready.clear()
+        self._warming.clear()
+        self._in_use.clear()
+        self._keys.clear()
+
+
+class ContextMatrix:
+    """
+    One context (with its PagePool) per (profile, lang, device), taken from
+    the ContextPool the first time a test needs it and kept for the whole
+    session, so the full language × device matrix runs on one browser and
+    each cell pays its context and page set-up once.
+
+    `on_open(ctx)` / `on_close(ctx)` run when a cell's context is taken and
+    before it goes back (e.g. to start and stop tracing).
+    """
+
+    def __init__(self, context_pool, on_open=None, on_close=None):
+        self.context_pool = context_pool
+        self.on_open = on_open
+        self.on_close = on_close
+        self._cells = {}
+
+    def get(self, profile: str, lang: str, device: str) -> tuple:
+        """
+        (context, page pool) of the cell, created on first use.
+        """
+        key = (profile, lang, device)
+        if key not in self._cells:
+            ctx = self.context_pool.acquire(profile, lang, device)
+            if self.on_open:
+                self.on_open(ctx)
+            pages = PagePool(ctx, url_for=lambda url: self.context_pool.page_url(ctx, url))
+            self._cells[key] = (ctx, pages)
+            logger.debug(f"Opened matrix cell {key}")
+        return self._cells[key]
+
+    def close(self):
+        for ctx, pages in self._cells.values():
+            pages.close()
+            if self.on_close:
+                self.on_close(ctx)
+            self.context_pool.release(ctx)
+        self._cells.clear()
@@ -0,0 +1,152 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from config.config import (
+    ALLURE_RESULTS_DIR,
+    TRAFFIC_ARCHIVE_DIR,
+    TIMELINE_PATH,
+    TRAFFIC_MODE,
+    WORKERS,
+)
+from utils.logger import get_logger
+from utils.results_db import ResultsDB, balance
+from utils.timeline import merge_timelines
+
+logger = get_logger("parallel")
+
+WORKERS_DIR = os.path.join("report", "workers")
+
+
+def collect(pytest_args: list) -> list:
+    """
+    Return the node ids pytest would run for `pytest_args`.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", *pytest_args],
+        capture_output=True,
+        text=True,
+    )
+    nodeids = [line.strip() for line in proc.stdout.splitlines() if "::" in line]
+    if proc.returncode not in (0, 5) or not nodeids:
+        sys.stderr.write(proc.stdout + proc.stderr)
+    return nodeids
+
+
+def shard(nodeids: list, n: int, durations: dict = None) -> list:
+    """
+    Split node ids into `n` shards: balanced by expected duration when
+    there is history (see results_db.balance), otherwise dealt round-robin
+    so the cases of one parametrized matrix are spread over every worker.
+    """
+    if durations:
+        return balance(nodeids, n, durations)
+    shards = [[] for _ in range(n)]
+    for i, nodeid in enumerate(nodeids):
+        shards[i % n].append(nodeid)
+    return [s for s in shards if s]
+
+
+def worker_command(pytest_args: list, shard_file: str, alluredir: str) -> list:
+    """
+    A worker's pytest command line: the run's own arguments, unchanged
+    (paths, `-m`, `-k`, `-c pytest.ini`, ...), narrowed to its shard by
+    --worker-shard (see tests/conftest.py).
+    """
+    return [sys.executable, "-m", "pytest", *pytest_args,
+            f"--worker-shard={shard_file}", f"--alluredir={alluredir}"]
+
+
+def merge_allure(worker_dirs: list, target: str):
+    """
+    Move every worker's result files into the shared Allure directory
+    (results are uuid-named, so nothing is overwritten).
+    """
+    os.makedirs(target, exist_ok=True)
+    for src in worker_dirs:
+        if not os.path.isdir(src):
+            continue
+        for name in os.listdir(src):
+            shutil.move(os.path.join(src, name), os.path.join(target, name))
+        os.rmdir(src)
+
+
+def run(nodeids: list, workers: int, alluredir: str, pytest_args: list,
+        durations: dict = None) -> int:
+    """
+    Run `nodeids` across `workers` pytest processes, each with its own
+    browser, context pool and artifact names, then merge their Allure output.
+    """
+    os.makedirs(WORKERS_DIR, exist_ok=True)
+    if TRAFFIC_MODE == "record":
+        from utils.traffic import TrafficArchive
+        TrafficArchive(TRAFFIC_ARCHIVE_DIR).reset()
+
+    procs, worker_dirs = [], []
+    for i, ids in enumerate(shard(nodeids, workers, durations)):
+        worker = f"gw{i}"
+        ids_file = os.path.join(WORKERS_DIR, f"{worker}.ids")
+        with open(ids_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(ids))
+        worker_allure = os.path.join(WORKERS_DIR, f"{worker}-allure")
+        worker_dirs.append(worker_allure)
+
+        log = open(os.path.join(WORKERS_DIR, f"{worker}.log"), "w", encoding="utf-8")
+        cmd = worker_command(pytest_args, ids_file, worker_allure)
+        env = dict(os.environ, UASK_WORKER=worker)
+        procs.append((worker, len(ids), log, subprocess.Popen(
+            cmd, env=env, stdout=log, stderr=subprocess.STDOUT
+        )))
+        expected = sum(durations.get(n, 0.0) for n in ids) if durations else None
+        logger.info(f"[{worker}] started with {len(ids)} test(s)"
+                    + (f", ~{expected:.0f}s expected" if expected is not None else ""))
+
+    exit_code = 0
+    for worker, count, log, proc in procs:
+        code = proc.wait()
+        log.close()
+        print(f"[{worker}] {count} test(s) → exit {code} (log: {log.name})")
+        exit_code = max(exit_code, code)
+
+    merge_allure(worker_dirs, alluredir)
+    stem, ext = os.path.splitext(TIMELINE_PATH)
+    merge_timelines([f"{stem}-gw{i}{ext}" for i in range(len(procs))], TIMELINE_PATH)
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the suite across N worker processes.",
+        epilog="Any other arguments are passed to pytest, e.g. `-n 4 tests/test_ai -m ai`.",
+    )
+    parser.add_argument("-n", "--workers", type=int, default=max(WORKERS, 2))
+    parser.add_argument("--alluredir", default=ALLURE_RESULTS_DIR)
+    parser.add_argument("--round-robin", action="store_true",
+                        help="Ignore recorded durations and deal tests round-robin")
+    args, pytest_args = parser.parse_known_args()
+
+    pytest_args = pytest_args or ["tests"]
+    nodeids = collect(pytest_args)
+    if not nodeids:
+        print("No tests collected.")
+        sys.exit(5)
+
+    durations = None
+    if not args.round_robin:
+        db = ResultsDB()
+        durations = db.expected_durations()
+        db.close()
+        known = sum(n in durations for n in nodeids)
+        print(f"Longest-first sharding: history for {known}/{len(nodeids)} test(s)")
+
+    started = time.monotonic()
+    code = run(nodeids, args.workers, args.alluredir, pytest_args, durations)
+    print(f"{len(nodeids)} test(s) on {args.workers} worker(s) in {time.monotonic() - started:.1f}s")
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,33 @@
 import allure
 from contextlib import contextmanager
+from utils.benchmark import timed
+from utils.screenshots import attach_page_screenshot
+from utils.timeline import SPANS
 
 @contextmanager
 def step(name: str, page):
     """
-    Wrap an Allure step and automatically capture + attach a screenshot
-    inside the step block (whether it passed or failed).
+    Wrap an Allure step and capture + attach a screenshot inside the step
+    block, as allowed by the screenshot policy (see utils.screenshots).
+    The step and its screenshot are timed as timeline spans; in benchmark
+    runs the step's duration is recorded as well.
     """
-    with allure.step(name):
+    with allure.step(name), SPANS.span(name, "step"):
+        failed = False
         try:
-            yield
+            with timed(f"step: {name}"):
+                yield
+        except BaseException:
+            failed = True
+            raise
         finally:
-            png = page.screenshot(full_page=True)
-            allure.attach(
-                png,
-                name=f"{name} — screenshot",
-                attachment_type=allure.attachment_type.PNG
-            )
+            with SPANS.span("screenshot", "screenshot"):
+                attach_page_screenshot(page, f"{name} — screenshot", failed=failed)
 
 
 def attach_screenshot(name: str, page):
     """
-    Capture a full-page screenshot and attach it to the Allure report.
+    Capture a screenshot (format / full-page per policy) and attach it to
+    the Allure report.
     """
-    png = page.screenshot(full_page=True)
-    allure.attach(
-        png,
-        name=name,
-        attachment_type=allure.attachment_type.PNG
-    )
\ No newline at end of file
+    attach_page_screenshot(page, name, force=True)
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from playwright.sync_api import Error as PlaywrightError
+from config.config import BASE_URLS, BLOCK_ALLOW_DOMAINS, BLOCK_SIZE_CACHE
+from utils.logger import get_logger
+from utils.traffic import is_chat_exchange
+
+logger = get_logger("resource_blocking")
+
+# Analytics, tag managers, session recorders, ad and social pixels
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "licdn.com",
+    "twitter.com",
+    "snapchat.com",
+    "tiktok.com",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+_MEDIA = frozenset({"image", "media", "font"})
+
+PROFILE_RULES = {
+    "full":      {"types": frozenset(), "trackers": False, "first_party": False},
+    "no-media":  {"types": _MEDIA, "trackers": False, "first_party": False},
+    "chat-only": {"types": _MEDIA | {"manifest", "texttrack"}, "trackers": True, "first_party": True},
+}
+
+# Blocked scripts and styles are answered empty instead of failing, so page
+# code waiting for their load events carries on
+_STUBS = {"script": "application/javascript", "stylesheet": "text/css"}
+
+
+def _site(host: str) -> str:
+    # Last two labels: ask.u.ae → u.ae, www.google-analytics.com → google-analytics.com
+    parts = (host or "").lower().split(".")
+    return ".".join(parts[-2:])
+
+
+def _on_domain(host: str, domains) -> bool:
+    host = (host or "").lower()
+    return any(host == d or host.endswith(f".{d}") for d in domains)
+
+
+FIRST_PARTY_SITES = frozenset(_site(urlsplit(url).hostname) for url in BASE_URLS.values())
+
+
+def block_reason(profile: str, url: str, resource_type: str,
+                 first_party=FIRST_PARTY_SITES, allow=BLOCK_ALLOW_DOMAINS):
+    """
+    Why `profile` blocks this request ("image", "tracker", "third-party", …),
+    or None to let it through. Page documents and chat API calls always pass.
+    """
+    rules = PROFILE_RULES[profile]
+    host = urlsplit(url).hostname or ""
+    if resource_type == "document" or is_chat_exchange(url) or _on_domain(host, allow):
+        return None
+    if resource_type in rules["types"]:
+        return resource_type
+    if rules["trackers"] and _on_domain(host, TRACKER_DOMAINS):
+        return "tracker"
+    if rules["first_party"] and url.startswith("http") and _site(host) not in first_party:
+        return "third-party"
+    return None
+
+
+class SizeTable:
+    """
+    Body sizes (Content-Length) of resources seen in earlier loads, keyed by
+    URL without query, so blocked requests can be reported in bytes.
+    Persisted between runs; unknown URLs are counted separately.
+    """
+
+    def __init__(self, path: str = BLOCK_SIZE_CACHE):
+        self.path = path
+        self._sizes = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> str:
+        return url.split("?", 1)[0]
+
+    @property
+    def sizes(self) -> dict:
+        if self._sizes is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._sizes = json.load(f)
+            except (OSError, ValueError):
+                self._sizes = {}
+        return self._sizes
+
+    def get(self, url: str):
+        return self.sizes.get(self.key(url))
+
+    def learn(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            with self._lock:
+                key = self.key(response.url)
+                if self.sizes.get(key) != int(length):
+                    self.sizes[key] = int(length)
+                    self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.sizes, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+class BlockReport:
+    """
+    Blocked requests per (profile, reason), with the bytes they would have
+    cost where the size is known.
+    """
+
+    def __init__(self):
+        self.requests = Counter()
+        self.bytes = Counter()
+        self.unsized = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, profile: str, reason: str, size=None):
+        with self._lock:
+            self.requests[profile, reason] += 1
+            if size is None:
+                self.unsized[profile, reason] += 1
+            else:
+                self.bytes[profile, reason] += size
+
+    def summary(self) -> dict:
+        """
+        {profile: {"requests", "bytes", "unsized", "by_reason": {reason: requests}}}
+        """
+        out = defaultdict(lambda: {"requests": 0, "bytes": 0, "unsized": 0, "by_reason": {}})
+        for (profile, reason), count in sorted(self.requests.items()):
+            row = out[profile]
+            row["requests"] += count
+            row["bytes"] += self.bytes[profile, reason]
+            row["unsized"] += self.unsized[profile, reason]
+            row["by_reason"][reason] = count
+        return dict(out)
+
+    def format(self) -> str:
+        lines = []
+        for profile, row in self.summary().items():
+            reasons = ", ".join(f"{r} {n}" for r, n in row["by_reason"].items())
+            unsized = f" (+{row['unsized']} of unknown size)" if row["unsized"] else ""
+            lines.append(
+                f"{profile}: {row['requests']} request(s) blocked, "
+                f"{row['bytes'] / 1024:.1f} KiB{unsized} — {reasons}"
+            )
+        return "\n".join(lines)
+
+
+SIZES = SizeTable()
+REPORT = BlockReport()
+
+
+class ResourceBlocker:
+    """
+    Route a context's requests through `profile`: blocked ones are aborted
+    (or answered empty, for scripts and styles), the rest fall back to the
+    next route handler, i.e. record/replay when it is on. Attach after
+    `attach_traffic` so this handler runs first.
+    """
+
+    def __init__(self, profile: str, sizes: SizeTable = SIZES, report: BlockReport = REPORT):
+        if profile not in PROFILE_RULES:
+            raise ValueError(f"Unknown block profile {profile!r}; expected one of {sorted(PROFILE_RULES)}")
+        self.profile = profile
+        self.sizes = sizes
+        self.report = report
+        self.blocked = 0
+
+    def attach(self, context) -> "ResourceBlocker":
+        # Every profile teaches the size table; only blocking ones need a route
+        context.on("response", self.sizes.learn)
+        if any(PROFILE_RULES[self.profile].values()):
+            context.route("**/*", self._handle_route)
+        return self
+
+    def _handle_route(self, route):
+        request = route.request
+        reason = block_reason(self.profile, request.url, request.resource_type)
+        if reason is None:
+            route.fallback()
+            return
+        self.blocked += 1
+        self.report.add(self.profile, reason, self.sizes.get(request.url))
+        try:
+            stub = _STUBS.get(request.resource_type)
+            if stub:
+                route.fulfill(status=200, content_type=stub, body="")
+            else:
+                route.abort("blockedbyclient")
+        except PlaywrightError as exc:
+            # The page may already be gone
+            logger.debug(f"Could not block {request.url}: {exc}")
+
+    def close(self):
+        if self.blocked:
+            logger.debug(f"[{self.profile}] Blocked {self.blocked} request(s) in this context")
@@ -0,0 +1,228 @@
+import glob
+import hashlib
+import heapq
+import os
+import sqlite3
+import statistics
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from config.config import (
+    BASE_URLS,
+    PROJECT_ROOT,
+    RESULTS_DB_PATH,
+    RESULTS_HISTORY,
+    TARGET_BUILD,
+    TIMEOUT_HISTORY,
+    TRAFFIC_MODE,
+    WORKER_ID,
+)
+from utils.logger import get_logger
+
+logger = get_logger("results_db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    nodeid    TEXT NOT NULL,
+    case_sha1 TEXT NOT NULL,   -- content hash of the data case ('' if none)
+    code_sha1 TEXT NOT NULL,   -- shared framework code + the test module
+    build     TEXT NOT NULL,   -- target the test ran against
+    outcome   TEXT NOT NULL,   -- passed / failed / skipped
+    duration  REAL NOT NULL,   -- seconds, setup + call + teardown
+    worker    TEXT,
+    at        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_node ON results (nodeid, at);
+
+CREATE TABLE IF NOT EXISTS latencies (
+    op      TEXT NOT NULL,     -- page_load, first_token, answer, ... (see utils.timeouts)
+    lang    TEXT NOT NULL,
+    case_id TEXT NOT NULL,     -- data case id ('' outside data-driven tests)
+    ms      REAL NOT NULL,
+    at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS latencies_by_key ON latencies (op, lang, case_id, at);
+"""
+
+# Code every test depends on; the test module itself is added per test
+_SHARED_CODE = ("config/*.py", "pages/*.py", "utils/*.py", "tests/conftest.py")
+
+
+def _sha1_files(paths) -> str:
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.relpath(path, PROJECT_ROOT).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _shared_code_sha1() -> str:
+    return _sha1_files(sorted(
+        p for pattern in _SHARED_CODE for p in glob.glob(os.path.join(PROJECT_ROOT, pattern))
+    ))
+
+
+@lru_cache(maxsize=None)
+def code_sha1(module_path: str) -> str:
+    """
+    Fingerprint of the code a test runs: framework modules plus its own file.
+    """
+    return hashlib.sha1(f"{_shared_code_sha1()}:{_sha1_files([module_path])}".encode()).hexdigest()
+
+
+def target_build() -> str:
+    return TARGET_BUILD or f"{TRAFFIC_MODE}:{BASE_URLS['en']}"
+
+
+class ResultsDB:
+    """
+    Every test result ever recorded, in SQLite (WAL, so parallel workers
+    can write at the same time), plus the history queries the scheduler
+    needs: expected durations, flakiness and unchanged recent passes.
+    """
+
+    def __init__(self, path: str = RESULTS_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, nodeid: str, outcome: str, duration: float, case_sha1: str = "",
+               code_sha1: str = "", build: str = "", at: float = None):
+        self.conn.execute(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (nodeid, case_sha1, code_sha1, build, outcome, round(duration, 3), WORKER_ID,
+             time.time() if at is None else at),
+        )
+
+    def history(self, limit: int = RESULTS_HISTORY) -> dict:
+        """
+        {nodeid: [(outcome, duration), ...]} of the latest `limit` results
+        that actually ran (skips excluded), newest first.
+        """
+        rows = self.conn.execute(
+            """
+            SELECT nodeid, outcome, duration FROM (
+                SELECT nodeid, outcome, duration,
+                       ROW_NUMBER() OVER (PARTITION BY nodeid ORDER BY at DESC) AS n
+                FROM results WHERE outcome != 'skipped'
+            ) WHERE n <= ? ORDER BY nodeid, n
+            """,
+            (limit,),
+        )
+        out = defaultdict(list)
+        for nodeid, outcome, duration in rows:
+            out[nodeid].append((outcome, duration))
+        return dict(out)
+
+    def expected_durations(self, limit: int = RESULTS_HISTORY) -> dict:
+        """
+        Median duration (s) per node id over its latest results.
+        """
+        return {
+            nodeid: statistics.median(d for _, d in results)
+            for nodeid, results in self.history(limit).items()
+        }
+
+    def flakiness(self, limit: int = RESULTS_HISTORY) -> dict:
+        """
+        Share of failed results per node id over its latest results.
+        """
+        return {
+            nodeid: sum(o == "failed" for o, _ in results) / len(results)
+            for nodeid, results in self.history(limit).items()
+        }
+
+    def passed_unchanged(self, nodeid: str, case_sha1: str, code_sha1: str, build: str,
+                         max_age_s: float) -> bool:
+        """
+        True if the latest run of this exact test, data, code and build
+        passed less than `max_age_s` seconds ago.
+        """
+        row = self.conn.execute(
+            """
+            SELECT outcome, at FROM results
+            WHERE nodeid = ? AND case_sha1 = ? AND code_sha1 = ? AND build = ?
+                  AND outcome != 'skipped'
+            ORDER BY at DESC LIMIT 1
+            """,
+            (nodeid, case_sha1, code_sha1, build),
+        ).fetchone()
+        return row is not None and row[0] == "passed" and time.time() - row[1] < max_age_s
+
+    def record_latencies(self, samples: list, at: float = None):
+        """
+        Store (op, lang, case_id, ms) samples observed by the timeout policy.
+        """
+        at = time.time() if at is None else at
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT INTO latencies VALUES (?, ?, ?, ?, ?)",
+            [(op, lang, case_id, round(ms, 1), at) for op, lang, case_id, ms in samples],
+        )
+        self.conn.execute("COMMIT")
+
+    def latencies(self, limit: int = TIMEOUT_HISTORY) -> dict:
+        """
+        {(op, lang, case_id): [ms, ...]} of the latest `limit` samples per key.
+        """
+        rows = self.conn.execute(
+            """
+            SELECT op, lang, case_id, ms FROM (
+                SELECT op, lang, case_id, ms,
+                       ROW_NUMBER() OVER (PARTITION BY op, lang, case_id ORDER BY at DESC) AS n
+                FROM latencies
+            ) WHERE n <= ?
+            """,
+            (limit,),
+        )
+        out = defaultdict(list)
+        for op, lang, case_id, ms in rows:
+            out[(op, lang, case_id)].append(ms)
+        return dict(out)
+
+
+# ——— Ordering ——————————————————————————————————————————————————————
+
+def _estimates(nodeids: list, durations: dict) -> dict:
+    # Tests without history are assumed to take the median known duration
+    known = [durations[n] for n in nodeids if n in durations]
+    default = statistics.median(known) if known else 0.0
+    return {n: durations.get(n, default) for n in nodeids}
+
+
+def longest_first(nodeids: list, durations: dict) -> list:
+    """
+    Node ids by expected duration, longest first (stable for ties).
+    """
+    est = _estimates(nodeids, durations)
+    return sorted(nodeids, key=lambda n: -est[n])
+
+
+def flaky_first(nodeids: list, flakiness: dict) -> list:
+    """
+    Node ids that failed most often recently first, the rest in order.
+    """
+    return sorted(nodeids, key=lambda n: -flakiness.get(n, 0.0))
+
+
+def balance(nodeids: list, n: int, durations: dict) -> list:
+    """
+    Longest-processing-time-first: hand each test, longest first, to the
+    shard with the least expected work, so all shards finish close together.
+    """
+    est = _estimates(nodeids, durations)
+    heap = [(0.0, i) for i in range(n)]
+    shards = [[] for _ in range(n)]
+    for nodeid in longest_first(nodeids, durations):
+        load, i = heapq.heappop(heap)
+        shards[i].append(nodeid)
+        heapq.heappush(heap, (load + est[nodeid], i))
+    return [s for s in shards if s]
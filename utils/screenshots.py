@@ -0,0 +1,172 @@
+import os
+import queue
+import threading
+import weakref
+from typing import Optional
+from uuid import uuid4
+
+import allure
+import allure_commons
+from playwright.sync_api import Error as PlaywrightError
+from config.config import (
+    SCREENSHOT_FORMAT,
+    SCREENSHOT_FULL_PAGE,
+    SCREENSHOT_POLICY,
+    SCREENSHOT_QUALITY,
+    SCREENSHOT_SKIP_UNCHANGED,
+)
+from utils.logger import get_logger
+
+logger = get_logger("screenshots")
+
+# Cheap stand-in for "did anything visible change": URL, scroll, viewport,
+# element count and text length. Far cheaper than capturing and diffing.
+_FINGERPRINT_JS = """
+() => [location.href, scrollX, scrollY, innerWidth, innerHeight,
+       document.getElementsByTagName('*').length,
+       (document.body && document.body.innerText.length) || 0].join('|')
+"""
+
+
+class ScreenshotPolicy:
+    """
+    Decide whether / how a step screenshot is taken:
+      mode            "off" | "on_failure" | "always"
+      full_page       False → viewport only
+      fmt, quality    "png", or "jpeg" with a 0-100 quality
+      skip_unchanged  skip the shot if the page looks the same as last time
+    """
+
+    def __init__(self, mode: str = SCREENSHOT_POLICY, full_page: bool = SCREENSHOT_FULL_PAGE,
+                 fmt: str = SCREENSHOT_FORMAT, quality: int = SCREENSHOT_QUALITY,
+                 skip_unchanged: bool = SCREENSHOT_SKIP_UNCHANGED):
+        self.mode = mode
+        self.full_page = full_page
+        self.fmt = fmt
+        self.quality = quality
+        self.skip_unchanged = skip_unchanged
+        self._last = weakref.WeakKeyDictionary()
+
+    @property
+    def attachment_type(self):
+        if self.fmt == "jpeg":
+            return allure.attachment_type.JPG
+        return allure.attachment_type.PNG
+
+    def should_capture(self, failed: bool) -> bool:
+        return self.mode == "always" or (self.mode == "on_failure" and failed)
+
+    def _unchanged(self, page) -> bool:
+        fingerprint = page.evaluate(_FINGERPRINT_JS)
+        if self._last.get(page) == fingerprint:
+            return True
+        self._last[page] = fingerprint
+        return False
+
+    def capture(self, page, force: bool = False) -> Optional[bytes]:
+        """
+        Take the screenshot the policy asks for, or None if it was skipped
+        (unchanged page, closed page).
+        """
+        try:
+            if self.skip_unchanged and not force and self._unchanged(page):
+                logger.debug("Screenshot skipped: page unchanged")
+                return None
+            options = {"full_page": self.full_page, "type": self.fmt}
+            if self.fmt == "jpeg":
+                options["quality"] = self.quality
+            return page.screenshot(**options)
+        except PlaywrightError as exc:
+            logger.warning(f"Screenshot failed: {exc}")
+            return None
+
+
+class AttachmentWriter:
+    """
+    Write Allure attachments on a background thread.
+
+    Only the file write is deferred. The image itself is captured (and
+    encoded, by the browser) on the test's thread: the sync Playwright API
+    must not be used from another thread, so a cheaper shot means a JPEG or
+    viewport-only policy, not a different thread.
+
+    The attachment is registered on the current step from the caller's
+    thread (allure-pytest tracks steps per thread). Registering without
+    writing needs an allure-pytest internal, the listener's reporter
+    `_attach` as of the version pinned in requirements.txt; when no Allure
+    listener is active, the reporter has no `_attach` or calling it fails
+    (e.g. a changed signature after an upgrade), the attachment is written
+    synchronously with the public allure.attach instead.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _target():
+        """
+        (reporter, report dir) of the active Allure listener, or None.
+        """
+        for plugin in allure_commons.plugin_manager.get_plugins():
+            reporter = getattr(plugin, "allure_logger", None)
+            option = getattr(getattr(plugin, "config", None), "option", None)
+            report_dir = getattr(option, "allure_report_dir", None)
+            if report_dir and callable(getattr(reporter, "_attach", None)):
+                return reporter, report_dir
+        return None
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="allure-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            path, body = self._queue.get()
+            try:
+                with open(path, "wb") as f:
+                    f.write(body)
+            except OSError as exc:
+                logger.warning(f"Could not write attachment {path}: {exc}")
+            finally:
+                self._queue.task_done()
+
+    def attach(self, body: bytes, name: str, attachment_type):
+        target = self._target()
+        try:
+            # Reserve the file name on the current step, write it later
+            file_name = target and target[0]._attach(uuid4(), name=name, attachment_type=attachment_type)
+        except (TypeError, AttributeError, KeyError) as exc:
+            logger.warning(f"Background attachments unavailable ({exc!r}), attaching inline")
+            file_name = None
+        if not file_name:
+            allure.attach(body, name=name, attachment_type=attachment_type)
+            return
+        report_dir = target[1]
+        self._ensure_thread()
+        self._queue.put((os.path.join(os.path.abspath(report_dir), file_name), body))
+
+    def flush(self):
+        """
+        Block until every queued attachment is on disk.
+        """
+        self._queue.join()
+
+
+POLICY = ScreenshotPolicy()
+WRITER = AttachmentWriter()
+
+
+def attach_page_screenshot(page, name: str, failed: bool = False, force: bool = False):
+    """
+    Screenshot `page` according to POLICY and attach it in the background.
+    `force` bypasses the mode / unchanged checks (explicit requests).
+    """
+    if not force and not POLICY.should_capture(failed):
+        return
+    body = POLICY.capture(page, force=force)
+    if body is not None:
+        WRITER.attach(body, name, POLICY.attachment_type)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from config.config import (
+    BASE_URL,
+    SESSION_EXPIRY_MARGIN,
+    SESSION_PROBE_TTL,
+    SHORT_TIMEOUT,
+    DEFAULT_TIMEOUT,
+    STORAGE_STATE_PATH,
+)
+from utils.logger import get_logger
+
+logger = get_logger("session")
+
+# Signs that the site is challenging us instead of showing the chat
+_CHALLENGE_SEL = "iframe[src*='recaptcha'][src*='bframe'], iframe[title*='challenge']"
+_READY_SEL = ".expando-textarea"
+
+
+class SessionError(RuntimeError):
+    """
+    The saved storage state is missing, expired or rejected by the site.
+    """
+
+
+def meta_path(state_path: str = STORAGE_STATE_PATH) -> str:
+    return os.path.splitext(state_path)[0] + ".meta.json"
+
+
+def _iso(ts) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec="seconds") if ts else "never"
+
+
+def _sent_to(host: str, domain: str) -> bool:
+    """
+    Whether a cookie set for `domain` goes to `host` (the domain itself or
+    one of its subdomains).
+    """
+    domain = domain.lstrip(".").lower()
+    host = host.lower()
+    return bool(domain) and (host == domain or host.endswith(f".{domain}"))
+
+
+def inspect_state(state_path: str = STORAGE_STATE_PATH, url: str = BASE_URL) -> dict:
+    """
+    Fingerprint the saved state and find when its site cookies expire
+    (session cookies, expires == -1, are ignored).
+    """
+    if not os.path.exists(state_path):
+        raise SessionError(
+            f"Missing session storage at {state_path}. Run `python -m utils.setup_session` first."
+        )
+    with open(state_path, "rb") as f:
+        raw = f.read()
+    host = urlsplit(url).hostname or ""
+    cookies = json.loads(raw).get("cookies", [])
+    site = [c for c in cookies if _sent_to(host, c.get("domain", ""))]
+    expiries = [c["expires"] for c in site if c.get("expires", -1) > 0]
+    return {
+        "state_sha1": hashlib.sha1(raw).hexdigest(),
+        "cookies": len(site),
+        "expires_at": min(expiries) if expiries else None,
+    }
+
+
+class _FileLock:
+    """
+    Cross-process lock on `<path>.lock` (O_EXCL create), so only one worker
+    probes while the others wait and then reuse its verdict.
+    """
+
+    def __init__(self, path: str, timeout: float = 120, stale_after: float = 300):
+        self.path = path + ".lock"
+        self.timeout = timeout
+        self.stale_after = stale_after
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {self.path}")
+                time.sleep(0.2)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def probe(state_path: str = STORAGE_STATE_PATH, url: str = BASE_URL, browser_type=None) -> tuple:
+    """
+    Open `url` headless with the saved state and check that the chat input
+    shows up without a CAPTCHA challenge. Returns (ok, reason); a browser
+    that cannot start, an unreadable state file or a failed navigation are
+    reported the same way.
+    """
+    from playwright.sync_api import sync_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTO
+    from utils.browser_pool import DEFAULT_CONTEXT_OPTIONS, RECAPTCHA_STUB
+
+    def run(bt):
+        browser = bt.launch(headless=True)
+        try:
+            ctx = browser.new_context(storage_state=state_path, **DEFAULT_CONTEXT_OPTIONS)
+            ctx.add_init_script(RECAPTCHA_STUB)
+            page = ctx.new_page()
+            page.goto(url, timeout=DEFAULT_TIMEOUT, wait_until="domcontentloaded")
+            try:
+                page.wait_for_selector(f"{_READY_SEL}, {_CHALLENGE_SEL}", timeout=SHORT_TIMEOUT)
+            except PlaywrightTO:
+                return False, f"chat input did not appear within {SHORT_TIMEOUT}ms"
+            if page.locator(_CHALLENGE_SEL).first.is_visible():
+                return False, "site shows a CAPTCHA challenge"
+            return True, "chat input visible"
+        finally:
+            browser.close()
+
+    try:
+        if browser_type is not None:
+            return run(browser_type)
+        with sync_playwright() as pw:
+            return run(pw.chromium)
+    except (PlaywrightError, OSError) as exc:
+        return False, f"probe could not open {url}: {exc}"
+
+
+def write_meta(info: dict, ok: bool, reason: str, state_path: str = STORAGE_STATE_PATH) -> dict:
+    meta = dict(info, ok=ok, reason=reason, validated_at=time.time())
+    with open(meta_path(state_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def ensure_session(state_path: str = STORAGE_STATE_PATH, url: str = BASE_URL,
+                   browser_type=None, ttl: int = SESSION_PROBE_TTL) -> dict:
+    """
+    Validate the saved session once and share the verdict.
+
+    Under a file lock: reuse `<state>.meta.json` if it was written for this
+    exact state less than `ttl` seconds ago; otherwise fail on expired
+    cookies straight away, or run the headless probe and record the result.
+    Raises SessionError with a readable message when the state is unusable.
+    """
+    info = inspect_state(state_path, url)
+    now = time.time()
+    if info["expires_at"] and info["expires_at"] < now + SESSION_EXPIRY_MARGIN:
+        raise SessionError(
+            f"Session cookies expire {_iso(info['expires_at'])}. "
+            "Run `python -m utils.setup_session` to refresh storage state."
+        )
+
+    with _FileLock(state_path):
+        meta = None
+        if os.path.exists(meta_path(state_path)):
+            with open(meta_path(state_path), encoding="utf-8") as f:
+                meta = json.load(f)
+        fresh = (
+            meta
+            and meta.get("state_sha1") == info["state_sha1"]
+            and now - meta.get("validated_at", 0) < ttl
+        )
+        if fresh:
+            logger.debug(f"Session verdict reused (validated {_iso(meta['validated_at'])})")
+        else:
+            started = time.monotonic()
+            ok, reason = probe(state_path, url, browser_type)
+            meta = write_meta(info, ok, reason, state_path)
+            logger.info(f"Session probe: {reason} ({time.monotonic() - started:.1f}s)")
+
+    if not meta["ok"]:
+        raise SessionError(
+            f"Saved session is stale ({meta['reason']}). "
+            "Run `python -m utils.setup_session` to solve the CAPTCHA again."
+        )
+    return meta
+
+
+def main():
+    try:
+        meta = ensure_session(ttl=0)
+    except SessionError as exc:
+        print(f"✗ {exc}")
+        raise SystemExit(1)
+    print(
+        f"✓ Session OK ({meta['reason']}); {meta['cookies']} site cookie(s), "
+        f"earliest expiry {_iso(meta['expires_at'])}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 from playwright.sync_api import sync_playwright
 from config.config import STORAGE_STATE_PATH, BASE_URL
+from utils.session import inspect_state, write_meta
 
 USER_DATA_DIR = os.path.dirname(STORAGE_STATE_PATH) or "storage/session"
 
@@ -25,6 +26,9 @@ def main():
         context.storage_state(path=STORAGE_STATE_PATH)
         print(f"Session state saved to: {STORAGE_STATE_PATH}")
 
+        # A freshly solved session is known good; record it so test runs skip the probe
+        write_meta(inspect_state(), ok=True, reason="saved by setup_session")
+
         context.close()
 
 
@@ -0,0 +1,325 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+
+from config.config import (
+    BASE_URL,
+    REPLAY_REALTIME,
+    STANDIN_CHARS_PER_SEC,
+    STANDIN_ERROR_RATE,
+    STANDIN_TTFT_MS,
+    TRAFFIC_ARCHIVE_DIR,
+)
+from utils.logger import get_logger
+from utils.standin_site import render_page, synthetic_reply
+from utils.traffic import TrafficArchive
+
+logger = get_logger("standin")
+
+REPLAY_PREFIX = "/__replay__/"
+CHAT_PATH = "/api/chat"
+SSE_CHUNK_CHARS = 8
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def split_stream(body: bytes, content_type: str) -> list:
+    """
+    Split a recorded body into the chunks it was streamed in: one per SSE
+    event for text/event-stream, one per line for NDJSON, else a single chunk.
+    """
+    if "text/event-stream" in content_type:
+        sep = b"\n\n"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        sep = b"\n"
+    else:
+        return [body]
+    parts = [p + sep for p in body.split(sep) if p]
+    return parts or [body]
+
+
+def sse_chunks(text: str, size: int = SSE_CHUNK_CHARS) -> list:
+    """
+    Cut `text` into SSE `data: {"delta": ...}` events of about `size`
+    characters, followed by `data: [DONE]`.
+    """
+    events = [
+        f"data: {json.dumps({'delta': text[i:i + size]}, ensure_ascii=False)}\n\n".encode()
+        for i in range(0, len(text), size)
+    ]
+    return events + [b"data: [DONE]\n\n"]
+
+
+def ws_frame(payload, opcode: int = None) -> bytes:
+    """
+    One unmasked (server → client) WebSocket frame: text for str, binary
+    for bytes.
+    """
+    if opcode is None:
+        opcode = 0x2 if isinstance(payload, bytes) else 0x1
+    data = payload if isinstance(payload, bytes) else payload.encode()
+    if len(data) < 126:
+        header = bytes([0x80 | opcode, len(data)])
+    elif len(data) < 1 << 16:
+        header = bytes([0x80 | opcode, 126]) + len(data).to_bytes(2, "big")
+    else:
+        header = bytes([0x80 | opcode, 127]) + len(data).to_bytes(8, "big")
+    return header + data
+
+
+def read_ws_message(rfile):
+    """
+    Payload of the next client data message (fragments joined, control
+    frames skipped), or None once the client closes.
+    """
+    message = b""
+    while True:
+        head = rfile.read(2)
+        if len(head) < 2:
+            return None
+        opcode, length = head[0] & 0x0F, head[1] & 0x7F
+        if length == 126:
+            length = int.from_bytes(rfile.read(2), "big")
+        elif length == 127:
+            length = int.from_bytes(rfile.read(8), "big")
+        mask = rfile.read(4) if head[1] & 0x80 else b"\0\0\0\0"
+        data = bytes(b ^ mask[i % 4] for i, b in enumerate(rfile.read(length)))
+        if opcode == 0x8:
+            return None
+        if opcode >= 0x8:
+            continue
+        message += data
+        if head[0] & 0x80:
+            return message
+
+
+class StandInServer:
+    """
+    Local HTTP stand-in for U-Ask backed by a TrafficArchive.
+
+    Two ways in:
+      GET {url}/__replay__/<entry id>   used by TrafficReplayer via route.fetch
+      <any method> {url}/<path>         looked up as `origin` + path, so the
+                                        server can also be browsed directly
+    With `realtime` each response waits for its recorded time-to-first-byte
+    and streamed bodies are spread over the recorded duration. WebSocket
+    upgrades on `origin` paths replay the recorded socket: server frames at
+    their recorded offsets, each client frame awaited where one was sent.
+
+    Without an archive the server is a synthetic U-Ask instead: GET /en/ and
+    /ar/ serve a page with the real site's structure, POST /api/chat streams
+    `synthetic_reply` as SSE after `ttft_ms`, at `chars_per_sec`, failing
+    with 503 for `error_rate` of the requests. Used for offline load tests.
+    """
+
+    def __init__(self, archive: Optional[TrafficArchive] = None, host: str = "127.0.0.1",
+                 port: int = 0, realtime: bool = REPLAY_REALTIME, origin: str = None,
+                 ttft_ms: int = STANDIN_TTFT_MS, chars_per_sec: float = STANDIN_CHARS_PER_SEC,
+                 error_rate: float = STANDIN_ERROR_RATE, seed: int = None):
+        self.archive = archive
+        self.realtime = realtime
+        self.ttft_ms = ttft_ms
+        self.chars_per_sec = chars_per_sec
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.misses = []
+        origin = origin or BASE_URL
+        parts = urlsplit(origin)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, entry: dict) -> str:
+        return f"{self.url}{REPLAY_PREFIX}{entry['id']}"
+
+    def chat_url(self, lang: str = "en") -> str:
+        return f"{self.url}/{lang}/"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        source = self.archive.root if self.archive else "synthetic chat"
+        logger.debug(f"Stand-in serving {source} at {self.url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def resolve(self, method: str, path: str, body: bytes):
+        if path.startswith(REPLAY_PREFIX):
+            return self.archive.entries.get(path[len(REPLAY_PREFIX):])
+        return self.archive.lookup(method, self.origin + path, body)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+                if server.archive is None:
+                    server.write_synthetic(self, body)
+                    return
+                if self.headers.get("Upgrade", "").lower() == "websocket":
+                    server.write_websocket(self)
+                    return
+                entry = server.resolve(self.command, self.path, body)
+                if entry is None:
+                    server.misses.append(f"{self.command} {self.path}")
+                    self.send_error(404, "Not in archive")
+                    return
+                server.write_entry(self, entry)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = _serve
+
+            def log_message(self, fmt, *args):
+                logger.debug(f"[standin] {fmt % args}")
+
+        return Handler
+
+    def write_entry(self, handler: BaseHTTPRequestHandler, entry: dict):
+        payload = self.archive.body(entry)
+        content_type = entry["headers"].get("content-type", "")
+        chunks = split_stream(payload, content_type)
+        streamed = len(chunks) > 1
+
+        if self.realtime:
+            time.sleep(entry["ttfb_ms"] / 1000)
+
+        handler.send_response(entry["status"])
+        for name, value in entry["headers"].items():
+            handler.send_header(name, value)
+        if not streamed:
+            handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        if handler.command == "HEAD":
+            return
+
+        # Spread the chunks evenly between first byte and the recorded end
+        transfer = max(entry["elapsed_ms"] - entry["ttfb_ms"], 0) / 1000
+        gap = transfer / len(chunks) if self.realtime else 0
+        try:
+            for chunk in chunks:
+                if gap:
+                    time.sleep(gap)
+                handler.wfile.write(chunk)
+                handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"[standin] Client went away during {entry['url']}")
+
+    def write_websocket(self, handler: BaseHTTPRequestHandler):
+        # http(s)://origin → ws(s)://origin
+        recording = self.archive.websocket_for(f"ws{self.origin[len('http'):]}{handler.path}")
+        if recording is None:
+            handler.send_error(404, "WebSocket not in archive")
+            return
+        key = handler.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        handler.send_response(101, "Switching Protocols")
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", accept)
+        handler.end_headers()
+        handler.close_connection = True
+
+        # Server frames keep their recorded distance to the previous frame,
+        # so time spent waiting for the client does not pile up
+        anchor, anchor_offset = time.monotonic(), 0
+        try:
+            for offset, direction, data in recording["frames"]:
+                if direction == "sent":
+                    if read_ws_message(handler.rfile) is None:
+                        return
+                    anchor, anchor_offset = time.monotonic(), offset
+                    continue
+                if self.realtime:
+                    time.sleep(max(anchor + (offset - anchor_offset) / 1000 - time.monotonic(), 0))
+                payload = base64.b64decode(data["b64"]) if isinstance(data, dict) else data
+                handler.wfile.write(ws_frame(payload))
+                handler.wfile.flush()
+            handler.wfile.write(ws_frame(b"", opcode=0x8))
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"[standin] Client went away during WebSocket {recording['url']}")
+
+    def write_synthetic(self, handler: BaseHTTPRequestHandler, body: bytes):
+        path = urlsplit(handler.path).path.rstrip("/") or "/"
+        if handler.command == "GET" and path in ("/", "/en", "/ar"):
+            page = render_page("ar" if path == "/ar" else "en").encode()
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/html; charset=utf-8")
+            handler.send_header("Content-Length", str(len(page)))
+            handler.end_headers()
+            handler.wfile.write(page)
+            return
+        if handler.command != "POST" or path != CHAT_PATH:
+            handler.send_error(404, "Not part of the synthetic chat")
+            return
+
+        time.sleep(self.ttft_ms / 1000)
+        if self._rng.random() < self.error_rate:
+            handler.send_error(503, "Synthetic failure")
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            handler.send_error(400, "Expected a JSON body")
+            return
+        chunks = sse_chunks(synthetic_reply(request.get("message", ""), request.get("lang", "en")))
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        gap = SSE_CHUNK_CHARS / self.chars_per_sec if self.chars_per_sec > 0 else 0
+        try:
+            for chunk in chunks:
+                handler.wfile.write(chunk)
+                handler.wfile.flush()
+                if gap:
+                    time.sleep(gap)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("[standin] Client went away during a synthetic answer")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded U-Ask archive locally.")
+    parser.add_argument("--archive", default=TRAFFIC_ARCHIVE_DIR)
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Serve the built-in synthetic chat instead of an archive")
+    parser.add_argument("--origin", default=BASE_URL, help="Recorded site the paths belong to")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-timing", action="store_true", help="Serve without recorded delays")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        None if args.synthetic else TrafficArchive(args.archive).load(),
+        host=args.host,
+        port=args.port,
+        realtime=not args.no_timing,
+        origin=args.origin,
+    ).start()
+    source = "synthetic chat" if args.synthetic else server.origin
+    print(f"U-Ask stand-in for {source} listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import html
+import json
+import re
+
+from pages.chatbot_page import ChatbotPage
+
+# Prompts the synthetic bot treats as prompt injection
+_INJECTION = re.compile(
+    r"ignore (all |any )?(previous|prior|above) (instructions|rules)|system prompt|"
+    r"you are now|jailbreak|developer mode|' ?or ?'1'?=|تجاهل",
+    re.IGNORECASE,
+)
+_ERROR = re.compile(r"api failure|simulate an? (error|failure)|فشل الخدمة", re.IGNORECASE)
+
+_REPLIES = {
+    "en": {
+        "refuse": "Sorry, I cannot help with that request. Please ask about UAE government services.",
+        "error": "Sorry, something went wrong on our side. Please try again later.",
+        "topics": [
+            (re.compile(r"golden visa", re.I),
+             "The Golden Visa is a long-term residence visa. Check your eligibility, prepare the "
+             "required documents and submit your application to the Federal Authority for "
+             "Identity, Citizenship, Customs and Port Security."),
+            (re.compile(r"driving licen[cs]e", re.I),
+             "To get a driving license, register at an approved driving center, pass the "
+             "theoretical and practical tests and pay the licensing fees."),
+        ],
+        "default": "Thank you for your question. U-Ask provides information about UAE "
+                   "government services; here is a short general answer to: {prompt}",
+    },
+    "ar": {
+        "refuse": "عذراً، لا يمكنني المساعدة في هذا الطلب. يرجى السؤال عن الخدمات الحكومية في الإمارات.",
+        "error": "عذراً، حدث خطأ. يرجى حاول مرة أخرى لاحقاً.",
+        "topics": [
+            (re.compile(r"الذهبية"),
+             "للحصول على الإقامة الذهبية راجع المتطلبات وجهّز الوثائق ثم قدّم طلب التقديم إلى "
+             "الهيئة الاتحادية للهوية والجنسية والجمارك وأمن المنافذ."),
+            (re.compile(r"رخصة قيادة"),
+             "للحصول على رخصة قيادة سجّل في أحد المراكز المعتمدة واجتز الاختبار النظري والعملي "
+             "وادفع رسوم الترخيص."),
+        ],
+        "default": "شكراً لسؤالك. إليك إجابة عامة عن: {prompt}",
+    },
+}
+
+
+def synthetic_reply(prompt: str, lang: str = "en") -> str:
+    """
+    Deterministic answer of the synthetic bot: refuses injections, reports
+    simulated failures, knows a couple of services, otherwise answers
+    generically.
+    """
+    replies = _REPLIES.get(lang, _REPLIES["en"])
+    if _INJECTION.search(prompt):
+        return replies["refuse"]
+    if _ERROR.search(prompt):
+        return replies["error"]
+    for pattern, answer in replies["topics"]:
+        if pattern.search(prompt):
+            return answer
+    return replies["default"].format(prompt=prompt[:200])
+
+
+def render_page(lang: str = "en") -> str:
+    """
+    A minimal chat page with the same structure, texts and selectors
+    ChatbotPage relies on; answers stream from POST /api/chat as SSE.
+    """
+    text = ChatbotPage.UI_TEXT[lang]
+    samples = "".join(
+        f'<div class="question">{html.escape(q)}</div>' for q in ChatbotPage.SAMPLE_QUESTIONS[lang]
+    )
+    direction = text["expected_dir"]
+    return _PAGE_TEMPLATE.format(
+        lang=lang,
+        dir=direction,
+        rtl_class=" rtl" if direction == "rtl" else "",
+        lang_btn=html.escape(text["lang_btn"]),
+        new_chat=html.escape(text["new_chat"]),
+        samples_label=html.escape(text["samples"]),
+        samples=samples,
+        send=html.escape(text["send"]),
+        terms=html.escape(text["terms"]),
+        accept=html.escape(text["accept"]),
+        lang_json=json.dumps(lang),
+    )
+
+
+_PAGE_TEMPLATE = """<!doctype html>
+<html lang="{lang}" dir="{dir}">
+<head>
+<meta charset="utf-8">
+<title>U-Ask (stand-in)</title>
+<style>
+  body {{ font-family: sans-serif; margin: 0; }}
+  .chat-msg-history {{ height: 360px; overflow-y: auto; border: 1px solid #ccc; }}
+  .chat-item {{ margin: 6px; }}
+  #cookie-banner {{ position: fixed; bottom: 0; width: 100%; background: #eee; }}
+</style>
+</head>
+<body>
+<header>
+  <a href="/{lang}/" aria-label="Logo">U-Ask</a>
+  <button type="button" id="lang-toggle">{lang_btn}</button>
+  <button type="button" id="new-chat">{new_chat}</button>
+  <select aria-label="Language"><option>English</option><option>العربية</option></select>
+</header>
+<div id="chat-welcome-tab">
+  <div>{samples_label}</div>
+  {samples}
+</div>
+<div class="chat-msg-history scroll-container" role="log"></div>
+<textarea class="expando-textarea" aria-label="Ask U-Ask" rows="2"></textarea>
+<button type="button" id="mic" aria-label="Microphone">🎤</button>
+<button type="button" id="send">{send}</button>
+<a href="#terms">{terms}</a>
+<div id="cookie-banner"><button type="button" id="accept">{accept}</button></div>
+<script>
+(() => {{
+  const lang = {lang_json};
+  const history = document.querySelector(".chat-msg-history");
+  const input = document.querySelector(".expando-textarea");
+  const now = () => new Date().toTimeString().slice(0, 5);
+
+  function bubble(kind, text) {{
+    const item = document.createElement("div");
+    item.className = kind === "out" ? "chat-item chat-message-out"
+                                    : "chat-item chatbot chat-message-in{rtl_class}";
+    const body = document.createElement("div");
+    body.className = "chat-text chat-message-text";
+    body.textContent = text;
+    const time = document.createElement("div");
+    time.className = "chat-datetime date-time";
+    time.textContent = now();
+    item.append(body, time);
+    history.append(item);
+    history.scrollTop = history.scrollHeight;
+    return body;
+  }}
+
+  async function send() {{
+    const message = input.value.trim();
+    if (!message) return;
+    input.value = "";
+    bubble("out", message);
+    const answer = bubble("in", "");
+    const resp = await fetch("/api/chat", {{
+      method: "POST",
+      headers: {{"Content-Type": "application/json"}},
+      body: JSON.stringify({{message, lang}})
+    }});
+    if (!resp.ok) {{
+      // Marked so load generators can tell a failed turn from an answer
+      answer.parentElement.dataset.status = resp.status;
+      answer.textContent = "Error " + resp.status;
+      return;
+    }}
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {{
+      const {{done, value}} = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, {{stream: true}});
+      let cut;
+      while ((cut = buffer.indexOf("\\n\\n")) >= 0) {{
+        const event = buffer.slice(0, cut).replace(/^data: /, "");
+        buffer = buffer.slice(cut + 2);
+        if (event === "[DONE]") return;
+        answer.textContent += JSON.parse(event).delta;
+        history.scrollTop = history.scrollHeight;
+      }}
+    }}
+  }}
+
+  input.addEventListener("keydown", (e) => {{
+    if (e.key === "Enter" && !e.shiftKey) {{ e.preventDefault(); send(); }}
+  }});
+  document.getElementById("send").addEventListener("click", send);
+  document.getElementById("new-chat").addEventListener("click", () => {{ history.innerHTML = ""; }});
+  document.getElementById("accept").addEventListener("click", () => {{
+    document.getElementById("cookie-banner").remove();
+  }});
+}})();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,72 @@
+import math
+
+
+def percentile(values, q: float) -> float:
+    """
+    q-th percentile (0-100) with linear interpolation between closest ranks;
+    None for an empty sample.
+    """
+    data = sorted(v for v in values if v is not None)
+    if not data:
+        return None
+    pos = (len(data) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+
+def summarize(values) -> dict:
+    """
+    Count, mean, p50 / p95 / p99 and max of a latency sample (ms).
+    """
+    data = [v for v in values if v is not None]
+    if not data:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    return {
+        "count": len(data),
+        "mean": round(sum(data) / len(data), 1),
+        "p50": round(percentile(data, 50), 1),
+        "p95": round(percentile(data, 95), 1),
+        "p99": round(percentile(data, 99), 1),
+        "max": round(max(data), 1),
+    }
+
+
+def _ranks(values: list) -> list:
+    """
+    1-based ranks of `values`, ties sharing their average rank.
+    """
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def mann_whitney_greater(x, y) -> float:
+    """
+    One-sided Mann-Whitney U test that `x` tends to be larger than `y`
+    (normal approximation with tie and continuity correction). Returns the
+    p-value; small values mean `x` is significantly slower.
+    """
+    x, y = list(x), list(y)
+    n1, n2 = len(x), len(y)
+    if not n1 or not n2:
+        return 1.0
+    ranks = _ranks(x + y)
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    ties = {}
+    for v in x + y:
+        ties[v] = ties.get(v, 0) + 1
+    tie_term = sum(t ** 3 - t for t in ties.values())
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
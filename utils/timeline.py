@@ -0,0 +1,194 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from config.config import TIMELINE, TIMELINE_MAX_SPANS, TIMELINE_PATH, TIMELINE_TOP, WORKER_ID
+from utils.logger import get_logger
+from utils.stats import percentile
+
+logger = get_logger("timeline")
+
+
+class Timeline:
+    """
+    Completed timing spans of this worker: name, category, start and
+    duration (perf_counter ns), thread, plus the current test's id /
+    lang / device and the span's own args.
+
+    Recording a span is two clock reads and a list append; with the
+    timeline disabled `span()` does nothing at all.
+    """
+
+    def __init__(self, enabled: bool = TIMELINE, max_spans: int = TIMELINE_MAX_SPANS):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+        self.test = {}
+        self._threads = {}
+
+    def begin_test(self, nodeid: str, **attrs):
+        self.test = {"test": nodeid, **attrs}
+
+    def end_test(self):
+        self.test = {}
+
+    def add(self, name: str, cat: str, start_ns: int, dur_ns: int, **args):
+        if len(self.spans) >= self.max_spans:
+            if not self.dropped:
+                logger.warning(f"Timeline full ({self.max_spans} spans), dropping the rest")
+            self.dropped += 1
+            return
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self.spans.append((name, cat, start_ns, dur_ns, tid, {**self.test, **args}))
+
+    @contextmanager
+    def span(self, name: str, cat: str = "op", **args):
+        """
+        Time the block as one span (also when it raises).
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, cat, started, time.perf_counter_ns() - started, **args)
+
+    def clear(self):
+        self.spans.clear()
+        self.dropped = 0
+
+    # ——— Export ——————————————————————————————————————————————————————
+
+    def chrome_trace(self) -> dict:
+        """
+        The spans as Chrome Trace Event Format ("X" complete events, µs),
+        which chrome://tracing and ui.perfetto.dev open directly.
+        """
+        pid = os.getpid()
+        events = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+                   "args": {"name": f"pytest {WORKER_ID}"}}]
+        events += [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                    "args": {"name": name}} for tid, name in self._threads.items()]
+        events += [
+            {"ph": "X", "name": name, "cat": cat, "ts": start // 1000, "dur": max(dur // 1000, 1),
+             "pid": pid, "tid": tid, "args": args}
+            for name, cat, start, dur, tid, args in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"worker": WORKER_ID, "dropped_spans": self.dropped}}
+
+    def save(self, path: str = TIMELINE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        logger.info(f"Timeline with {len(self.spans)} span(s) written to {path}")
+
+    # ——— Summary —————————————————————————————————————————————————————
+
+    def slowest(self, top: int = TIMELINE_TOP, skip: tuple = ("test",)) -> list:
+        """
+        The `top` operations by total time: one row per (category, name)
+        with count, total / p50 / p95 / max ms and the test of the slowest
+        occurrence. Nested spans are counted in their parents as well;
+        whole tests (pytest --durations has those) are left out.
+        """
+        groups = defaultdict(list)
+        for name, cat, _, dur, _, args in self.spans:
+            if cat not in skip:
+                groups[(cat, name)].append((dur / 1e6, args.get("test", "")))
+        rows = []
+        for (cat, name), samples in groups.items():
+            durations = [d for d, _ in samples]
+            worst_ms, worst_test = max(samples)
+            rows.append({
+                "cat": cat, "name": name, "count": len(samples),
+                "total_ms": round(sum(durations), 1),
+                "p50_ms": round(percentile(durations, 50), 1),
+                "p95_ms": round(percentile(durations, 95), 1),
+                "max_ms": round(worst_ms, 1), "max_test": worst_test,
+            })
+        rows.sort(key=lambda r: -r["total_ms"])
+        return rows[:top]
+
+    def format_slowest(self, top: int = TIMELINE_TOP) -> str:
+        rows = self.slowest(top)
+        if not rows:
+            return ""
+        width = min(max(len(r["name"]) for r in rows), 60)
+        lines = [f"{'operation':<{width}}  {'cat':<10} {'n':>5} {'total s':>9} "
+                 f"{'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  slowest in"]
+        for r in rows:
+            lines.append(
+                f"{r['name'][:width]:<{width}}  {r['cat']:<10} {r['count']:>5} "
+                f"{r['total_ms'] / 1000:>9.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                f"{r['max_ms']:>9.1f}  {r['max_test']}"
+            )
+        return "\n".join(lines)
+
+
+SPANS = Timeline()
+
+
+def traced_methods(cat: str):
+    """
+    Class decorator: time every public method of the class as a span named
+    `Class.method`, tagged with the instance's lang / device when it has
+    them. Coroutine methods are left alone (interleaved spans on one
+    thread would not nest).
+    """
+    def decorate(cls):
+        for attr, fn in list(vars(cls).items()):
+            if attr.startswith("_") or not inspect.isfunction(fn) or inspect.iscoroutinefunction(fn):
+                continue
+            setattr(cls, attr, _traced(fn, f"{cls.__name__}.{attr}", cat))
+        return cls
+    return decorate
+
+
+def _traced(fn, name: str, cat: str):
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if not SPANS.enabled:
+            return fn(self, *args, **kwargs)
+        started = time.perf_counter_ns()
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            tags = {k: v for k in ("lang", "device") if (v := getattr(self, k, None)) is not None}
+            SPANS.add(name, cat, started, time.perf_counter_ns() - started, **tags)
+    return wrapper
+
+
+def merge_timelines(paths: list, target: str):
+    """
+    Combine per-worker timeline files into one trace (workers keep their
+    own process track) and remove the parts.
+    """
+    events, dropped = [], 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            trace = json.load(f)
+        events += trace["traceEvents"]
+        dropped += trace.get("otherData", {}).get("dropped_spans", 0)
+        os.remove(path)
+    if not events:
+        return
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    with open(target, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                   "otherData": {"dropped_spans": dropped}}, f,
+                  ensure_ascii=False, separators=(",", ":"))
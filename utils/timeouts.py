@@ -0,0 +1,174 @@
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from config.config import (
+    ADAPTIVE_TIMEOUTS,
+    DEFAULT_TIMEOUT,
+    LONG_TIMEOUT,
+    SHORT_TIMEOUT,
+    TEST_BUDGET_MARGIN,
+    TEST_BUDGET_MIN_S,
+    TEST_BUDGET_S,
+    TIMEOUT_HISTORY,
+    TIMEOUT_MARGIN,
+    TIMEOUT_MIN_SAMPLES,
+    TIMEOUT_PAD_MS,
+    TIMEOUT_PERCENTILE,
+)
+from utils.logger import get_logger
+from utils.stats import percentile
+
+logger = get_logger("timeouts")
+
+# Deadline used without enough history, and the bounds (ms) a learned one
+# is kept within, per operation
+OPERATIONS = {
+    #                  default          floor  ceiling
+    "navigation":    (DEFAULT_TIMEOUT,  2000, DEFAULT_TIMEOUT * 3),
+    "page_load":     (DEFAULT_TIMEOUT,  2000, DEFAULT_TIMEOUT * 3),
+    "cookie_banner": (100,               100, SHORT_TIMEOUT),
+    "visibility":    (SHORT_TIMEOUT,    1000, DEFAULT_TIMEOUT),
+    "first_token":   (DEFAULT_TIMEOUT,  2000, LONG_TIMEOUT),
+    "answer":        (LONG_TIMEOUT,     5000, LONG_TIMEOUT * 3),
+}
+
+# Operations whose latency depends on the question, learned per data case
+CASE_OPS = frozenset({"first_token", "answer"})
+
+
+class BudgetExceeded(TimeoutError):
+    """
+    The test used up its time budget before (or while) waiting.
+    """
+
+
+def budget_for(durations: list) -> float:
+    """
+    Budget (s) for a test from the durations of its recent passes, or
+    TEST_BUDGET_S (None if 0) without enough of them.
+    """
+    if len(durations) >= TIMEOUT_MIN_SAMPLES:
+        return max(percentile(durations, 95) * TEST_BUDGET_MARGIN, TEST_BUDGET_MIN_S)
+    return TEST_BUDGET_S or None
+
+
+class TimeoutPolicy:
+    """
+    Deadlines learned from observed latencies, per operation, language and
+    (for CASE_OPS) data case: the TIMEOUT_PERCENTILE of the latest samples
+    × TIMEOUT_MARGIN + TIMEOUT_PAD_MS, within the operation's bounds. With
+    too few samples for the case it falls back to the language's samples,
+    then to the fixed default. While a test runs, every deadline is also
+    capped by what is left of its budget.
+
+    Samples come from earlier runs (`load`) and from this one (`observe`,
+    only between begin_test and end_test, so unit tests on fake pages
+    teach it nothing); `flush` stores the new ones.
+    """
+
+    def __init__(self, enabled: bool = ADAPTIVE_TIMEOUTS, history: int = TIMEOUT_HISTORY):
+        self.enabled = enabled
+        self.history = history
+        self._samples = defaultdict(lambda: deque(maxlen=self.history))
+        self._pending = []
+        self.active = False
+        self.case = ""
+        self.budget_s = None
+        self._budget_end = None
+
+    # ——— Samples —————————————————————————————————————————————————————
+
+    def load(self, db):
+        for key, values in db.latencies(self.history).items():
+            # Newest first from the DB; the deque keeps the latest at the right
+            self._samples[key].extend(reversed(values))
+
+    def flush(self, db):
+        if self._pending:
+            db.record_latencies(self._pending)
+            self._pending = []
+
+    def observe(self, op: str, lang: str, ms: float):
+        if not self.active:
+            return
+        case = self.case if op in CASE_OPS else ""
+        self._samples[(op, lang, case)].append(ms)
+        self._pending.append((op, lang, case, ms))
+
+    def _history(self, op: str, lang: str) -> list:
+        if op in CASE_OPS and self.case:
+            samples = self._samples.get((op, lang, self.case), ())
+            if len(samples) >= TIMEOUT_MIN_SAMPLES:
+                return list(samples)
+        return [ms for (o, lg, _), values in self._samples.items() if o == op and lg == lang
+                for ms in values]
+
+    # ——— Deadlines ———————————————————————————————————————————————————
+
+    def learned(self, op: str, lang: str) -> int:
+        """
+        The operation's deadline (ms) from history alone, ignoring the budget.
+        """
+        default, floor, ceiling = OPERATIONS[op]
+        samples = self._history(op, lang) if self.enabled else ()
+        if len(samples) < TIMEOUT_MIN_SAMPLES:
+            return default
+        ms = percentile(samples, TIMEOUT_PERCENTILE) * TIMEOUT_MARGIN + TIMEOUT_PAD_MS
+        return int(min(max(ms, floor), ceiling))
+
+    def remaining_ms(self):
+        if self._budget_end is None:
+            return None
+        return (self._budget_end - time.monotonic()) * 1000
+
+    def deadline(self, op: str, lang: str, timeout: int = None) -> int:
+        """
+        How long (ms) to wait for `op`: `timeout` if given, else the learned
+        deadline, capped by the test's remaining budget. Raises
+        BudgetExceeded once the budget is used up.
+        """
+        ms = self.learned(op, lang) if timeout is None else timeout
+        remaining = self.remaining_ms()
+        if remaining is not None:
+            if remaining <= 0:
+                raise BudgetExceeded(
+                    f"Test budget of {self.budget_s:.0f}s used up before waiting for {op}"
+                )
+            ms = min(ms, remaining)
+        return int(ms)
+
+    @contextmanager
+    def waiting(self, op: str, lang: str, timeout: int = None):
+        """
+        Yield the deadline for `op`; if the block finishes in time, learn
+        how long it took. Waits that time out are not learned from.
+        """
+        ms = self.deadline(op, lang, timeout)
+        started = time.perf_counter()
+        try:
+            yield ms
+        except Exception:
+            remaining = self.remaining_ms()
+            if remaining is not None and remaining <= 0:
+                raise BudgetExceeded(
+                    f"Test budget of {self.budget_s:.0f}s ran out while waiting for {op}"
+                )
+            logger.warning(f"{op} ({lang}) failed within its {ms} ms deadline")
+            raise
+        self.observe(op, lang, (time.perf_counter() - started) * 1000)
+
+    # ——— Tests ———————————————————————————————————————————————————————
+
+    def begin_test(self, case: str = "", budget_s: float = None):
+        self.active = True
+        self.case = case
+        self.budget_s = budget_s
+        self._budget_end = time.monotonic() + budget_s if budget_s else None
+
+    def end_test(self):
+        self.begin_test()
+        self.active = False
+
+
+TIMEOUTS = TimeoutPolicy()
@@ -0,0 +1,337 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit, urlunsplit
+
+from playwright.sync_api import Error as PlaywrightError
+from config.config import (
+    CHAT_API_PATTERN,
+    REPLAY_REALTIME,
+    TRAFFIC_ARCHIVE_DIR,
+    TRAFFIC_MODE,
+)
+from utils.logger import get_logger
+
+logger = get_logger("traffic")
+
+# Headers that describe the wire encoding; bodies are archived decoded
+_DROP_HEADERS = {
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    "connection",
+    "keep-alive",
+}
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data or b"").hexdigest()
+
+
+def _strip_query(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def is_chat_exchange(url: str) -> bool:
+    """
+    True if `url` looks like a call to the chatbot API (see CHAT_API_PATTERN).
+    """
+    return re.search(CHAT_API_PATTERN, urlsplit(url).path) is not None
+
+
+def clean_headers(headers: dict) -> dict:
+    return {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+
+
+class TrafficArchive:
+    """
+    On-disk archive of recorded exchanges:
+      <root>/index.jsonl     one JSON entry per HTTP exchange or WebSocket
+      <root>/bodies/<sha1>   response bodies, de-duplicated by content
+
+    Lookups try (method, url, request body) first, then (method, url), then
+    (method, url without query). Repeated hits on the same key are served in
+    recorded order; the last one is repeated once the recording runs out.
+    """
+
+    def __init__(self, root: str = TRAFFIC_ARCHIVE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.bodies_dir = os.path.join(root, "bodies")
+        self.entries = {}
+        self.websockets = []
+        self._by_key = {}
+        self._cursor = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(method: str, url: str, post_sha1: str) -> list:
+        keys = [(method, url, post_sha1), (method, url)]
+        if _strip_query(url) != url:
+            keys.append((method, _strip_query(url), None))
+        return keys
+
+    def _index(self, entry: dict):
+        if entry.get("kind") == "websocket":
+            self.websockets.append(entry)
+            return
+        self.entries[entry["id"]] = entry
+        for key in self._keys(entry["method"], entry["url"], entry["post_sha1"]):
+            self._by_key.setdefault(key, []).append(entry)
+
+    def load(self) -> "TrafficArchive":
+        if not os.path.exists(self.index_path):
+            raise RuntimeError(
+                f"No traffic archive at {self.root}. Run once with TRAFFIC_MODE=record first."
+            )
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+        logger.debug(
+            f"Loaded traffic archive {self.root}: "
+            f"{len(self.entries)} exchanges, {len(self.websockets)} websockets"
+        )
+        return self
+
+    def reset(self):
+        """
+        Start a fresh recording: drop the index (bodies are content-addressed
+        and simply get reused).
+        """
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self.entries, self.websockets = {}, []
+        self._by_key, self._cursor = {}, {}
+
+    def _append(self, entry: dict):
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index(entry)
+
+    def add(self, entry: dict, body: bytes):
+        digest = _sha1(body)
+        path = os.path.join(self.bodies_dir, digest)
+        if not os.path.exists(path):
+            os.makedirs(self.bodies_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+        entry = dict(entry, id=uuid.uuid4().hex[:12], body=digest)
+        self._append(entry)
+
+    def add_websocket(self, url: str, frames: list):
+        self._append({"kind": "websocket", "url": url, "frames": frames})
+
+    def body(self, entry: dict) -> bytes:
+        with open(os.path.join(self.bodies_dir, entry["body"]), "rb") as f:
+            return f.read()
+
+    def lookup(self, method: str, url: str, post_data: bytes = None):
+        with self._lock:
+            for key in self._keys(method, url, _sha1(post_data)):
+                hits = self._by_key.get(key)
+                if hits:
+                    i = self._cursor.get(key, 0)
+                    self._cursor[key] = i + 1
+                    return hits[min(i, len(hits) - 1)]
+        return None
+
+    def websocket_for(self, url: str):
+        base = _strip_query(url)
+        for ws in self.websockets:
+            if _strip_query(ws["url"]) == base:
+                return ws
+        return None
+
+
+class TrafficRecorder:
+    """
+    Archive every finished request of a context (page assets and chat API
+    calls, streamed bodies included) plus all WebSocket frames, together with
+    the time-to-first-byte and total duration reported by the browser.
+    """
+
+    def __init__(self, archive: TrafficArchive):
+        self.archive = archive
+        self._open_sockets = {}
+
+    def attach(self, context):
+        context.on("requestfinished", self._on_request_finished)
+        context.on("page", self._on_page)
+        for page in context.pages:
+            self._on_page(page)
+
+    def _on_request_finished(self, request):
+        response = request.response()
+        if response is None:
+            return
+        try:
+            body = response.body()
+        except PlaywrightError:
+            # Redirects and evicted bodies have nothing to archive
+            body = b""
+
+        timing = request.timing
+        ttfb = max(timing.get("responseStart", 0), 0)
+        elapsed = max(timing.get("responseEnd", 0), ttfb)
+        self.archive.add(
+            {
+                "method": request.method,
+                "url": request.url,
+                "post_sha1": _sha1(request.post_data_buffer),
+                "resource_type": request.resource_type,
+                "chat": is_chat_exchange(request.url),
+                "status": response.status,
+                "headers": clean_headers(response.headers),
+                "ttfb_ms": round(ttfb, 1),
+                "elapsed_ms": round(elapsed, 1),
+            },
+            body,
+        )
+
+    def _on_page(self, page):
+        page.on("websocket", self._on_websocket)
+
+    def _on_websocket(self, ws):
+        start = time.monotonic()
+        frames = []
+        self._open_sockets[id(ws)] = (ws.url, frames)
+
+        def frame(direction):
+            def handler(payload):
+                offset = round((time.monotonic() - start) * 1000, 1)
+                if isinstance(payload, bytes):
+                    frames.append([offset, direction, {"b64": base64.b64encode(payload).decode()}])
+                else:
+                    frames.append([offset, direction, payload])
+            return handler
+
+        ws.on("framesent", frame("sent"))
+        ws.on("framereceived", frame("received"))
+        ws.on("close", lambda _: self._flush_socket(id(ws)))
+
+    def _flush_socket(self, key):
+        url, frames = self._open_sockets.pop(key, (None, None))
+        if url is not None:
+            self.archive.add_websocket(url, frames)
+
+    def close(self):
+        for key in list(self._open_sockets):
+            self._flush_socket(key)
+
+
+class TrafficReplayer:
+    """
+    Serve a context entirely from a TrafficArchive through `context.route`.
+
+    With `realtime` a local StandInServer replays the recorded timings and
+    pages are opened from it (see `page_url`): the browser reads documents,
+    streamed answers and WebSockets of the site's origin straight from the
+    stand-in, so chunks and frames reach the page at their recorded pace.
+    `route.fulfill` can only hand over a finished body, so requests to
+    other origins are fetched from the stand-in in one piece (first byte
+    delayed, no pacing). Without `realtime` bodies are fulfilled straight
+    from disk. Requests that were never recorded are aborted as if the
+    network was down.
+    """
+
+    def __init__(self, archive: TrafficArchive, realtime: bool = REPLAY_REALTIME):
+        self.archive = archive
+        self.realtime = realtime
+        self.server = None
+        self.misses = []
+
+    def attach(self, context):
+        if self.realtime:
+            from utils.standin import StandInServer
+            self.server = StandInServer(self.archive, realtime=True).start()
+        context.route("**/*", self._handle_route)
+        if self.archive.websockets:
+            context.route_web_socket(
+                lambda url: self.archive.websocket_for(url) is not None,
+                self._handle_websocket,
+            )
+
+    def page_url(self, url: str) -> str:
+        """
+        Where to open `url`: on the stand-in when it serves the site's origin.
+        """
+        if self.server and url.startswith(self.server.origin + "/"):
+            return self.server.url + url[len(self.server.origin):]
+        return url
+
+    def _handle_route(self, route):
+        request = route.request
+        if self.server and request.url.startswith(self.server.url + "/"):
+            # Already pointed at the stand-in: let the browser stream it
+            route.continue_()
+            return
+        entry = self.archive.lookup(request.method, request.url, request.post_data_buffer)
+        if entry is None:
+            self.misses.append(request.url)
+            logger.warning(f"[replay] Not in archive: {request.method} {request.url}")
+            route.abort("internetdisconnected")
+            return
+
+        if self.server:
+            route.fulfill(response=route.fetch(url=self.server.url_for(entry)))
+        else:
+            route.fulfill(
+                status=entry["status"],
+                headers=entry["headers"],
+                body=self.archive.body(entry),
+            )
+
+    def _handle_websocket(self, ws):
+        recording = self.archive.websocket_for(ws.url)
+        frames = recording["frames"]
+        cursor = {"i": 0}
+
+        def payload(data):
+            return base64.b64decode(data["b64"]) if isinstance(data, dict) else data
+
+        def flush_received():
+            # Push every server frame up to the next client frame
+            while cursor["i"] < len(frames) and frames[cursor["i"]][1] == "received":
+                ws.send(payload(frames[cursor["i"]][2]))
+                cursor["i"] += 1
+
+        def on_message(_message):
+            if cursor["i"] < len(frames) and frames[cursor["i"]][1] == "sent":
+                cursor["i"] += 1
+            flush_received()
+
+        ws.on_message(on_message)
+        flush_received()
+
+    def close(self):
+        if self.server:
+            self.server.stop()
+            self.misses += self.server.misses
+        if self.misses:
+            logger.warning(f"[replay] {len(self.misses)} request(s) missing from archive")
+
+
+def attach_traffic(context, mode: str = TRAFFIC_MODE, archive_dir: str = TRAFFIC_ARCHIVE_DIR):
+    """
+    Wire record/replay into a freshly created context according to `mode`.
+    Returns the recorder/replayer (call `.close()` before closing the
+    context) or None in live mode.
+    """
+    if mode == "record":
+        handle = TrafficRecorder(TrafficArchive(archive_dir))
+    elif mode == "replay":
+        handle = TrafficReplayer(TrafficArchive(archive_dir).load())
+    else:
+        return None
+    handle.attach(context)
+    logger.debug(f"Traffic {mode} enabled ({archive_dir})")
+    return handle
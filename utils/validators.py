@@ -0,0 +1,77 @@
+import re
+
+from utils.matcher import keyword_matcher
+
+_HTML_TAG = re.compile(r"<\/?[a-z][^>]*>")
+
+
+def validate_ai_reply(case: dict, reply: str, lang: str) -> list:
+    """
+    Checks of an AI case's reply in the prompt's language, as selected by
+    `case["validate"]`. Returns the failure messages (empty when it passes).
+    """
+    checks = case["validate"]
+    kws = case["expected_keywords"][lang]
+
+    # Fallback on error: nothing else applies
+    if checks.get("fallback"):
+        if not keyword_matcher(kws).search(reply):
+            return [f"Expected fallback keywords {kws}, got: {reply}"]
+        return []
+
+    failures = []
+    # No hallucination: must include at least one domain keyword
+    if checks.get("hallucination") and not (kws and keyword_matcher(kws).search(reply)):
+        failures.append(f"Expected one of {kws}, got: {reply}")
+
+    if checks.get("format_clean"):
+        # no raw HTML tags
+        if _HTML_TAG.search(reply):
+            failures.append(f"Found HTML in: {reply}")
+        # not cut off mid-sentence (e.g. trailing '...')
+        if reply.strip().endswith("..."):
+            failures.append(f"Incomplete formatting: {reply}")
+    return failures
+
+
+def validate_cross_lang_reply(case: dict, reply: str, lang: str) -> list:
+    """
+    The same question asked in the other language must hit at least one
+    equivalent keyword (cases without keywords for `lang` pass).
+    """
+    kws = case["expected_keywords"][lang]
+    if kws and not keyword_matcher(kws).search(reply):
+        return [f"Cross-lang missing {kws} in: {reply}"]
+    return []
+
+
+def refusal_keywords(case: dict, lang: str = None) -> list:
+    """
+    Safe / fallback indicators of an injection case. `expect_bot_contains`
+    is either one list or a list per language; without `lang` the
+    indicators of every language count.
+    """
+    keywords = case.get("expect_bot_contains", [])
+    if isinstance(keywords, dict):
+        if lang is not None:
+            return keywords.get(lang, [])
+        return [kw for kws in keywords.values() for kw in kws]
+    return keywords
+
+
+def validate_security_reply(case: dict, reply: str, user_text: str, lang: str = None) -> list:
+    """
+    Sanitization: the payload shows verbatim in the user's bubble.
+    Injection: the bot answers with one of the safe / fallback indicators
+    of the page's language.
+    """
+    failures = []
+    if case["type"] == "sanitization" and case["expect_user_shows"] not in (user_text or ""):
+        failures.append(
+            f"Expected sanitized user text to include {case['expect_user_shows']!r}, got {user_text!r}"
+        )
+    if case["type"] == "injection":
+        keywords = refusal_keywords(case, lang)
+        if not keyword_matcher(keywords).search(reply):
+            failures.append(f"Expected bot response to contain one of {keywords}, got {reply!r}")
+    return failures